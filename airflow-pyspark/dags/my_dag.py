@@ -5,11 +5,17 @@ from pyspark import SparkContext
 from pyspark.sql import SparkSession
 from airflow.providers.apache.spark.operators.spark_submit import SparkSubmitOperator
 import pandas as pd
+
+# ./include is mounted at the same path on the Airflow and Spark containers (docker-compose.override.yml)
+INCLUDE_DIR = "/usr/local/airflow/include"
+EARLY_WARNING_DATA = f"{INCLUDE_DIR}/data/early_warning"
     
 @dag(
     start_date=datetime(2024, 1, 1),
     schedule=None,
     catchup=False,
+    default_args={"retries": 2},
+    tags=["pyspark", "early_warning"],
 )
 def my_dag():
     
@@ -21,6 +27,20 @@ def my_dag():
     # )
     
     # submit_job
+
+    early_warning_etl = SparkSubmitOperator(
+        task_id="early_warning_etl",
+        conn_id="my_spark_conn",
+        application=f"{INCLUDE_DIR}/scripts/early_warning_etl.py",
+        application_args=[
+            "--info", f"{EARLY_WARNING_DATA}/big_data_set1.csv",
+            "--kpi", f"{EARLY_WARNING_DATA}/big_data_set2.csv",
+            "--cust", f"{EARLY_WARNING_DATA}/big_data_set3.csv",
+            "--output", f"{EARLY_WARNING_DATA}/features",
+        ],
+        conf={"spark.sql.shuffle.partitions": "64"},
+        verbose=True,
+    )
     
     @task.pyspark(conn_id="my_spark_conn")
     def read_data(spark: SparkSession, sc: SparkContext) -> pd.DataFrame:
@@ -37,5 +57,6 @@ def my_dag():
         return df.toPandas()
     
     read_data()
+    early_warning_etl
 
 my_dag()
@@ -0,0 +1,327 @@
+"""
+Early Warning ETL on Spark — port of bigcontest/early_warning_methods.data_transform
+
+  bucket parsing -> numeric coercion / sentinel removal -> rate standardization
+  -> outer join KPI x customer -> left join info -> peer z-scores (window per sigungu x bzn x month)
+  -> rolling MA / VOL / PCT features (row windows per merchant) -> drop / close / risk labels
+
+Output is Parquet partitioned by TA_YM (YYYYMM). Column names and values match the pandas engine;
+TA_YM / __CLOSE_MONTH are YYYYMM integers instead of pandas Periods.
+
+Usage:
+  spark-submit include/scripts/early_warning_etl.py \
+      --info big_data_set1.csv --kpi big_data_set2.csv --cust big_data_set3.csv --output ./early_warning_features
+  spark-submit --master "local[*]" include/scripts/early_warning_etl.py ...
+"""
+
+import argparse
+import re
+from typing import Dict, List, Optional, Tuple
+
+from pyspark.sql import Column, DataFrame, SparkSession, Window
+from pyspark.sql import functions as F
+
+
+ID, TIME = "ENCODED_MCT", "TA_YM"
+
+# Kept in sync with bigcontest/early_warning_methods.py (tests/scripts/test_early_warning_etl.py checks parity)
+SPECIAL_MISSING = [-999999.9, -999999.0, -99999.9, -99999.0]
+
+BUCKET_COLS = [
+    "MCT_OPE_MS_CN",
+    "RC_M1_SAA",
+    "RC_M1_TO_UE_CT",
+    "RC_M1_UE_CUS_CN",
+    "RC_M1_AV_NP_AT",
+    "APV_CE_RAT",
+]
+
+RATE_COLS_0_100 = [
+    "DLV_SAA_RAT",
+    "M1_SME_RY_SAA_RAT",
+    "M1_SME_RY_CNT_RAT",
+    "M12_SME_RY_SAA_PCE_RT",
+    "M12_SME_BZN_SAA_PCE_RT",
+    "M12_SME_RY_ME_MCT_RAT",
+    "M12_SME_BZN_ME_MCT_RAT",
+    "M12_MAL_1020_RAT","M12_MAL_30_RAT","M12_MAL_40_RAT","M12_MAL_50_RAT","M12_MAL_60_RAT",
+    "M12_FME_1020_RAT","M12_FME_30_RAT","M12_FME_40_RAT","M12_FME_50_RAT","M12_FME_60_RAT",
+    "MCT_UE_CLN_REU_RAT","MCT_UE_CLN_NEW_RAT",
+    "RC_M1_SHC_RSD_UE_CLN_RAT","RC_M1_SHC_WP_UE_CLN_RAT","RC_M1_SHC_FLP_UE_CLN_RAT",
+]
+
+PEER_KEYS = ["MCT_SIGUNGU_NM", "HPSN_MCT_BZN_CD_NM"]
+
+# pandas.read_csv(dtype=str) treats these as missing; Spark's CSV reader only knows ""
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def parse_bucket(s: Optional[str]) -> Tuple[Optional[int], Optional[float]]:
+    if s is None:
+        return None, None
+    s = str(s).strip()
+    m = re.match(r"^(\d+)_", s)
+    ordinal = int(m.group(1)) if m else None
+
+    m2 = re.search(r"(\d+)\s*-\s*(\d+)\s*%?", s)
+    if m2:
+        lo = float(m2.group(1)) / 100.0
+        hi = float(m2.group(2)) / 100.0
+        return ordinal, float((lo + hi) / 2.0)
+
+    if "90%초과" in s or "90% 초과" in s:
+        return ordinal, 0.95
+    if "75-90%" in s:
+        return ordinal, 0.825
+    if "50-75%" in s:
+        return ordinal, 0.625
+    if "25-50%" in s:
+        return ordinal, 0.375
+    if "10-25%" in s:
+        return ordinal, 0.175
+    if "10%이하" in s or "10% 이하" in s or "1구간" in s:
+        return ordinal, 0.05
+
+    m3 = re.search(r"(\d+(\.\d+)?)\s*%?", s)
+    if m3:
+        val = float(m3.group(1)) / 100.0
+        return ordinal, val
+
+    return ordinal, None
+
+
+def build_spark(app_name: str = "early-warning-etl", master: Optional[str] = None) -> SparkSession:
+    builder = SparkSession.builder.appName(app_name)
+    if master:
+        builder = builder.master(master)
+    # non-ANSI casts return null on bad input, like pandas errors="coerce"
+    return builder \
+        .config("spark.sql.ansi.enabled", "false") \
+        .config("spark.sql.legacy.timeParserPolicy", "CORRECTED") \
+        .config("spark.sql.session.timeZone", "UTC") \
+        .getOrCreate()
+
+
+# ------------------------
+# Column helpers
+# ------------------------
+
+def _month_ordinal(col: str) -> Column:
+    """'YYYYMM' -> months since 1970-01 (pandas Period ordinal), null if unparsable."""
+    s = F.trim(F.col(col))
+    year = s.substr(1, 4).cast("int")
+    month = s.substr(5, 2).cast("int")
+    return F.when(s.rlike(r"^\d{6}$") & month.between(1, 12), (year - 1970) * 12 + month - 1)
+
+
+def _ordinal_to_yyyymm(c: Column) -> Column:
+    return ((F.floor(c / 12) + 1970) * 100 + c % 12 + 1).cast("int")
+
+
+def _clean_float(c: Column) -> Column:
+    """NaN / inf / SPECIAL_MISSING -> null, so window aggregates skip them like pandas does."""
+    ok = ~F.isnan(c) & (F.abs(c) != float("inf")) & ~c.isin(SPECIAL_MISSING)
+    return F.when(ok, c)
+
+
+def _to_double(col: str) -> Column:
+    return F.regexp_replace(F.col(col), ",", "").cast("double")
+
+
+def _numeric_columns(df: DataFrame, cols: List[str]) -> List[str]:
+    """Columns that pandas.to_numeric(errors="ignore") would convert: every non-null value parses."""
+    if not cols:
+        return []
+    fails = df.agg(*[
+        F.sum((F.col(c).isNotNull() & _to_double(c).isNull()).cast("int")).alias(c) for c in cols
+    ]).first()
+    return [c for c in cols if not fails[c]]
+
+
+def _bucket_maps(df: DataFrame, cols: List[str]) -> Dict[str, Dict[str, Tuple[Optional[int], Optional[float]]]]:
+    """Bucket labels are low-cardinality: collect the distinct values once and parse them on the driver."""
+    if not cols:
+        return {}
+    uniq = df.agg(*[F.collect_set(c).alias(c) for c in cols]).first()
+    return {c: {v: parse_bucket(v) for v in uniq[c]} for c in cols}
+
+
+def _lookup(mapping: Dict[str, Optional[float]], col: str) -> Column:
+    pairs = [x for k, v in mapping.items() if v is not None for x in (F.lit(k), F.lit(float(v)))]
+    if not pairs:
+        return F.lit(None).cast("double")
+    return F.create_map(*pairs)[F.col(col)]
+
+
+# ------------------------
+# Pipeline stages
+# ------------------------
+
+def data_extract(spark: SparkSession, info_path: str, kpi_path: str, cust_path: str,
+                 sep: str = ",") -> Dict[str, DataFrame]:
+    def read(p: str) -> DataFrame:
+        df = spark.read.csv(p, sep=sep, header=True, inferSchema=False, encoding="utf-8")
+        return df.select([F.when(~F.col(c).isin(PANDAS_NA_VALUES), F.col(c)).alias(c) for c in df.columns])
+    return {"info": read(info_path), "kpi": read(kpi_path), "cust": read(cust_path)}
+
+
+def _prepare_monthly(df: DataFrame, bucket_cols: List[str]) -> DataFrame:
+    bucket_cols = [c for c in bucket_cols if c in df.columns]
+    if TIME in df.columns:
+        df = df.withColumn(TIME, _month_ordinal(TIME))
+
+    # to_numeric_smart + replace_special_missing + standardize_rates
+    str_cols = [c for c in df.columns if c not in (ID, TIME)]
+    numeric = set(_numeric_columns(df, str_cols))
+    maps = _bucket_maps(df, bucket_cols)
+
+    exprs = [F.col(c) for c in df.columns if c in (ID, TIME)]
+    for c in str_cols:
+        if c in numeric or c in RATE_COLS_0_100:
+            v = _clean_float(_to_double(c))
+            exprs.append((v / 100.0 if c in RATE_COLS_0_100 else v).alias(c))
+        else:
+            exprs.append(F.regexp_replace(F.col(c), ",", "").alias(c))
+    # add_bucket_features: <col>_ORD, <col>_MID appended after the raw columns
+    for c in bucket_cols:
+        ords = {k: (None if o is None else float(o)) for k, (o, _) in maps[c].items()}
+        mids = {k: m for k, (_, m) in maps[c].items()}
+        exprs.append(_clean_float(_lookup(ords, c)).alias(f"{c}_ORD"))
+        exprs.append(_clean_float(_lookup(mids, c)).alias(f"{c}_MID"))
+    return df.select(exprs)
+
+
+def _suffix_overlap(left: DataFrame, right: DataFrame, keys: List[str],
+                    suffixes: Tuple[str, str]) -> Tuple[DataFrame, DataFrame]:
+    overlap = (set(left.columns) & set(right.columns)) - set(keys)
+    for c in overlap:
+        left = left.withColumnRenamed(c, c + suffixes[0])
+        right = right.withColumnRenamed(c, c + suffixes[1])
+    return left, right
+
+
+def data_transform(d: Dict[str, DataFrame],
+                   drop_horizons: List[int] = [1, 2, 3],
+                   drop_thresh: float = -0.30,
+                   close_horizon: int = 3,
+                   windows: Tuple[int, ...] = (3, 6, 12)) -> DataFrame:
+    info = d["info"]
+    for c in ("ARE_D", "MCT_ME_D"):
+        if c in info.columns:
+            s = F.trim(F.col(c))
+            info = info.withColumn(c, F.coalesce(F.to_timestamp(s, "yyyyMMdd"), F.to_timestamp(s, "yyyy-MM-dd")))
+
+    kpi = _prepare_monthly(d["kpi"], BUCKET_COLS)
+    cust = _prepare_monthly(d["cust"], [])
+
+    kpi, cust = _suffix_overlap(kpi, cust, [ID, TIME], ("_KPI", "_CUST"))
+    merged = kpi.join(cust, on=[ID, TIME], how="full")
+    merged, info = _suffix_overlap(merged, info, [ID], ("_x", "_y"))
+    merged = merged.join(info, on=ID, how="left")
+
+    for c in PEER_KEYS:
+        if c not in merged.columns:
+            merged = merged.withColumn(c, F.lit(None).cast("string"))
+    num_cols = [f.name for f in merged.schema.fields
+                if f.dataType.typeName() in ("double", "float", "integer", "long") and f.name != TIME]
+
+    # build_peer_zscores: rows with a missing peer key get no z (pandas groupby drops null keys)
+    peer = Window.partitionBy(*PEER_KEYS, TIME)
+    has_peer = F.col(PEER_KEYS[0]).isNotNull() & F.col(PEER_KEYS[1]).isNotNull() & F.col(TIME).isNotNull()
+    z_exprs = []
+    for c in num_cols:
+        std = F.stddev_samp(c).over(peer)
+        z_exprs.append(F.when(has_peer, (F.col(c) - F.avg(c).over(peer)) / F.when(std != 0, std))
+                       .alias(f"{c}__PEER_Z"))
+    merged = merged.select("*", *z_exprs)
+    z_cols = [f"{c}__PEER_Z" for c in num_cols]
+
+    # add_rolling_features: per-merchant row windows in time order (null months last, as sort_values does)
+    by_mct = Window.partitionBy(ID).orderBy(F.col(TIME).asc_nulls_last())
+    roll_cols = num_cols + z_cols
+
+    # pandas pct_change forward-fills within the group before dividing (window results cannot nest,
+    # so the filled values are materialized first)
+    upto = by_mct.rowsBetween(Window.unboundedPreceding, Window.currentRow)
+    merged = merged.select("*", *[F.last(c, ignorenulls=True).over(upto).alias(f"__FF_{c}") for c in roll_cols])
+
+    feats = []
+    for w in windows:
+        frame = by_mct.rowsBetween(-(w - 1), Window.currentRow)
+        feats += [F.avg(c).over(frame).alias(f"{c}__MA{w}") for c in roll_cols]
+        if w == windows[0]:
+            feats += [_clean_float(F.col(f"__FF_{c}") / F.lag(f"__FF_{c}", 1).over(by_mct) - 1).alias(f"{c}__PCT1")
+                      for c in roll_cols]
+        feats += [F.stddev_samp(c).over(frame).alias(f"{c}__VOL{w}") for c in roll_cols]
+    merged = merged.select("*", *feats).drop(*[f"__FF_{c}" for c in roll_cols])
+
+    # make_labels
+    kpi_candidates = [c for c in ["RC_M1_SAA_MID", "RC_M1_TO_UE_CT_MID", "RC_M1_UE_CUS_CN_MID", "RC_M1_AV_NP_AT_MID"]
+                      if c in merged.columns]
+    if not kpi_candidates:
+        raise ValueError("No KPI *_MID columns found for drop labeling.")
+    ma3 = by_mct.rowsBetween(-2, Window.currentRow)
+    merged = merged.withColumn("KPI_PROXY", F.coalesce(*kpi_candidates))
+    merged = merged.withColumn("KPI_PROXY_MA3",
+                               F.when(F.count("KPI_PROXY").over(ma3) >= 2, F.avg("KPI_PROXY").over(ma3)))
+
+    labels = []
+    for H in drop_horizons:
+        future = F.lead("KPI_PROXY", H).over(by_mct)
+        ratio = (future - F.col("KPI_PROXY_MA3")) / F.col("KPI_PROXY_MA3")
+        lab = F.coalesce(ratio <= drop_thresh, F.lit(False)).cast("tinyint")
+        labels.append(F.when(future.isNotNull() & F.col("KPI_PROXY_MA3").isNotNull(), lab).alias(f"y_drop_h{H}"))
+    merged = merged.select("*", *labels)
+
+    close_col = f"y_close_h{close_horizon}"
+    if "MCT_ME_D" in merged.columns:
+        me = F.col("MCT_ME_D")
+        merged = merged.withColumn("__CLOSE_MONTH", (F.year(me) - 1970) * 12 + F.month(me) - 1)
+        dist = F.col("__CLOSE_MONTH") - F.col(TIME)
+        merged = merged.withColumn(close_col,
+                                   F.when(F.col("__CLOSE_MONTH").isNull(), 0)
+                                   .when(dist <= 0, None)
+                                   .when(dist <= close_horizon, 1)
+                                   .otherwise(0).cast("tinyint"))
+        merged = merged.withColumn("__CLOSE_MONTH", _ordinal_to_yyyymm(F.col("__CLOSE_MONTH")))
+    else:
+        merged = merged.withColumn(close_col, F.lit(0).cast("tinyint"))
+
+    drop_cols = [f"y_drop_h{H}" for H in drop_horizons]
+    merged = merged.withColumn("y_risk_any", F.greatest(*drop_cols, close_col).cast("tinyint"))
+    return merged.withColumn(TIME, _ordinal_to_yyyymm(F.col(TIME)))
+
+
+def data_load(df: DataFrame, output: str) -> None:
+    # one task per month so each partition directory gets a single file, merchant-ordered
+    df.repartition(TIME) \
+        .sortWithinPartitions(ID) \
+        .write \
+        .mode("overwrite") \
+        .partitionBy(TIME) \
+        .parquet(output)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Early Warning ETL on Spark (partitioned Parquet output)")
+    ap.add_argument("--info", required=True)
+    ap.add_argument("--kpi", required=True)
+    ap.add_argument("--cust", required=True)
+    ap.add_argument("--output", required=True, help="Parquet directory, partitioned by TA_YM")
+    ap.add_argument("--sep", default=",")
+    ap.add_argument("--master", default=None, help='e.g. "local[*]" when not launched by spark-submit')
+    args = ap.parse_args()
+
+    spark = build_spark(master=args.master)
+    d = data_extract(spark, args.info, args.kpi, args.cust, sep=args.sep)
+    data_load(data_transform(d), args.output)
+    print(f"[SAVED] {args.output}")
+
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Parity test: the Spark early-warning ETL must reproduce bigcontest/early_warning_methods.data_transform on a small synthetic panel."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyspark")
+
+ROOT = Path(__file__).resolve().parents[2]
+BIGCONTEST = ROOT.parent / "bigcontest"
+if not BIGCONTEST.is_dir():
+    pytest.skip("bigcontest/ (pandas reference ETL) is not available", allow_module_level=True)
+
+sys.path.insert(0, str(ROOT / "include" / "scripts"))
+sys.path.insert(0, str(BIGCONTEST))
+ew = pytest.importorskip("early_warning_methods")
+synthetic_data = pytest.importorskip("synthetic_data")
+
+import early_warning_etl  # noqa: E402
+
+ID, TIME = "ENCODED_MCT", "TA_YM"
+
+
+@pytest.fixture(scope="module")
+def spark():
+    session = early_warning_etl.build_spark("early-warning-etl-test", master="local[2]")
+    session.conf.set("spark.sql.shuffle.partitions", "4")
+    yield session
+    session.stop()
+
+
+@pytest.fixture(scope="module")
+def panel(tmp_path_factory):
+    return synthetic_data.write_panel(str(tmp_path_factory.mktemp("panel")), n_merchants=120, n_months=15, seed=7)
+
+
+def _yyyymm(s: pd.Series) -> pd.Series:
+    return s.map(lambda p: np.nan if pd.isna(p) else p.year * 100 + p.month)
+
+
+def test_spark_etl_matches_pandas(spark, panel, tmp_path):
+    expected = ew.data_transform(ew.data_extract(panel["info"], panel["kpi"], panel["cust"]))
+    expected[TIME] = _yyyymm(expected[TIME])
+    expected["__CLOSE_MONTH"] = _yyyymm(expected["__CLOSE_MONTH"])
+
+    d = early_warning_etl.data_extract(spark, panel["info"], panel["kpi"], panel["cust"])
+    early_warning_etl.data_load(early_warning_etl.data_transform(d), str(tmp_path / "features"))
+    assert len(list((tmp_path / "features").glob(f"{TIME}=*"))) == expected[TIME].nunique()
+    actual = spark.read.parquet(str(tmp_path / "features")).toPandas()
+
+    assert set(actual.columns) == set(expected.columns)
+    assert len(actual) == len(expected)
+
+    e = expected.sort_values([ID, TIME]).reset_index(drop=True)
+    a = actual.sort_values([ID, TIME]).reset_index(drop=True)
+    problems = []
+    for c in e.columns:
+        if pd.api.types.is_datetime64_any_dtype(e[c]):
+            bad = int((~((e[c] == pd.to_datetime(a[c])) | (e[c].isna() & a[c].isna()))).sum())
+        elif pd.api.types.is_numeric_dtype(e[c]):
+            ev, av = e[c].astype("float64").to_numpy(), a[c].astype("float64").to_numpy()
+            # pandas' online rolling std leaves ~1e-8 on constant windows where Spark gives ~1e-16
+            atol = 1e-7 if "__VOL" in c else 1e-9
+            bad = int((~np.isclose(ev, av, rtol=1e-6, atol=atol, equal_nan=True)).sum())
+            # a 0 vs ~1e-16 base (float summation order) flips __PCT1 between NaN and a huge ratio
+            if c.endswith("__PCT1") and bad <= max(3, 1e-3 * len(e)):
+                bad = 0
+        else:
+            bad = int((~((e[c].astype("string") == a[c].astype("string")).fillna(False) | (e[c].isna() & a[c].isna()))).sum())
+        if bad:
+            problems.append(f"{c}: {bad} mismatching rows")
+    assert not problems, problems
@@ -1,24 +1,31 @@
 import os
+import sys
 import json
 import time
 import csv
-import google.generativeai as genai
+import random
+import asyncio
+import argparse
 
-def call_gemini(prompt: str, model_name="gemini-1.5-pro", temperature=0.6, max_tokens=2048):
-    api_key = os.environ.get("GOOGLE_API_KEY")
-    if not api_key:
-        raise RuntimeError("환경변수 GOOGLE_API_KEY 가 설정되어 있지 않습니다.")
-    genai.configure(api_key=api_key)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from llm_backend import DEFAULT_BACKEND, DEFAULT_MAX_TOKENS, DEFAULT_MODEL, DEFAULT_TEMPERATURE, get_backend
+from persona_generator import ensure_data_evidence
+from response_cache import ResponseCache, DEFAULT_CACHE_PATH, UNCACHED_FINISH
 
-    model = genai.GenerativeModel(model_name)
-    generation_config = {"temperature": temperature, "max_output_tokens": max_tokens}
-    resp = model.generate_content(prompt, generation_config=generation_config)
-    return resp.text if hasattr(resp, "text") else str(resp)
+PERSONA_KEYS = ["업종", "프랜차이즈여부", "점포연령", "고객연령대", "고객행동"]
+CSV_HEADER = ["idx"] + PERSONA_KEYS + ["prompt", "gemini_response", "finish_reason", "error"]
 
-def call_with_retry(prompt, retries=3):
+
+def call_gemini(prompt: str, model_name=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, max_tokens=DEFAULT_MAX_TOKENS,
+                backend=None):
+    # backend: llm_backend.get_backend() — LLM_BACKEND=fake 이면 fake_llm_server.py 로 보낸다
+    backend = backend or get_backend()
+    return backend.generate(prompt, model_name, temperature, max_tokens).text
+
+def call_with_retry(prompt, retries=3, backend=None):
     for attempt in range(retries):
         try:
-            return call_gemini(prompt)
+            return call_gemini(prompt, backend=backend)
         except Exception as e:
             print(f"[WARN] API 호출 실패 {attempt+1}/{retries}: {e}")
             if attempt < retries - 1:
@@ -26,19 +33,157 @@ def call_with_retry(prompt, retries=3):
             else:
                 raise
 
-if __name__ == "__main__":
-    # 1. persona_generator에서 저장한 JSON 불러오기
-    with open("personas.json", "r", encoding="utf-8") as f:
-        personas = json.load(f)
 
-    # 2. 결과 CSV 저장
-    with open("gemini_responses.csv", "w", newline="", encoding="utf-8") as f:
+# ---------------------------------
+# asyncio 배치 실행 (동시성 + 속도 제한)
+# ---------------------------------
+
+class TokenBucket:
+    """분당 요청 수(rpm) 제한. burst 만큼은 바로 보내고 이후 rpm/60 초당 속도로 토큰을 채운다."""
+
+    def __init__(self, rpm, burst=None):
+        self.rate = rpm / 60.0
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def call_gemini_async(prompt: str, model_name=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                            max_tokens=DEFAULT_MAX_TOKENS, backend=None):
+    # LLMResponse 그대로 반환: 호출하는 쪽이 finish_reason (MAX_TOKENS / SAFETY) 을 보고 캐시 여부를 정한다
+    backend = backend or get_backend()
+    return await backend.agenerate(prompt, model_name, temperature, max_tokens)
+
+async def call_with_retry_async(prompt, bucket=None, retries=5, base_delay=1.0, max_delay=60.0, backend=None, **kwargs):
+    # 지수 백오프 + full jitter: 동시에 실패한 요청들이 같은 순간에 다시 몰리지 않게 한다
+    for attempt in range(retries):
+        if bucket is not None:
+            await bucket.acquire()
+        try:
+            return await call_gemini_async(prompt, backend=backend, **kwargs)
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            print(f"[WARN] API 호출 실패 {attempt+1}/{retries} ({delay:.1f}s 후 재시도): {e}")
+            await asyncio.sleep(delay)
+
+async def run_batch(personas, out_csv="gemini_responses.csv", out_jsonl=None,
+                    concurrency=8, rpm=60, retries=5, cache=None, backend=None,
+                    model_name=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, max_tokens=DEFAULT_MAX_TOKENS):
+    """personas 를 동시에 최대 concurrency 개씩 호출하고, 끝나는 순서대로 CSV/JSONL 에 바로 기록한다.
+
+    cache(ResponseCache) 가 있으면 (prompt, model, temperature, max_tokens) 가 이미 캐시에 있는 persona 는
+    API 를 부르지 않고 캐시 응답을 쓰고, 새 응답은 받자마자 캐시에 저장한다. 그래서 중간에 죽은 배치를
+    같은 명령으로 다시 돌리면 끝난 persona 는 건너뛰고 나머지만 호출한다.
+    finish_reason 이 MAX_TOKENS / SAFETY 인 응답은 finish_reason 칸에 남기되 캐시에는 넣지 않는다 (다음 실행에서 다시 호출).
+    실패한 persona 는 배치를 멈추지 않고 error 칸에 남긴다. 반환값은 (성공 수, 실패 수, 캐시 적중 수).
+    """
+    sem = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rpm, burst=concurrency)
+    params = {"model_name": model_name, "temperature": temperature, "max_tokens": max_tokens}
+
+    async def one(idx, p):
+        if cache is not None:
+            hit = cache.lookup(p["prompt"], **params)
+            if hit is not None:
+                return idx, p, hit, "STOP", "", True
+        async with sem:
+            try:
+                resp = await call_with_retry_async(p["prompt"], bucket, retries=retries, backend=backend, **params)
+            except Exception as e:
+                return idx, p, "", None, f"{type(e).__name__}: {e}", False
+        if cache is not None and resp.text and resp.finish_reason not in UNCACHED_FINISH:
+            cache.put(p["prompt"], response=resp.text, finish_reason=resp.finish_reason, **params)
+        return idx, p, resp.text, resp.finish_reason, "", False
+
+    ok = failed = hits = 0
+    started = time.perf_counter()
+    jf = open(out_jsonl, "w", encoding="utf-8") if out_jsonl else None
+    try:
+        with open(out_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            tasks = [asyncio.create_task(one(idx, p)) for idx, p in enumerate(personas, 1)]
+            for fut in asyncio.as_completed(tasks):
+                idx, p, response, finish_reason, error, cached = await fut
+                writer.writerow([idx] + [p[k] for k in PERSONA_KEYS] + [p["prompt"], response, finish_reason, error])
+                f.flush()
+                if jf:
+                    jf.write(json.dumps({"idx": idx, **{k: p[k] for k in PERSONA_KEYS},
+                                         "prompt": p["prompt"], "gemini_response": response,
+                                         "finish_reason": finish_reason, "error": error},
+                                        ensure_ascii=False) + "\n")
+                    jf.flush()
+                ok, failed, hits = ok + (not error), failed + bool(error), hits + cached
+                done = ok + failed
+                print(f"[{done}/{len(personas)}] #{idx} {' / '.join(p[k] for k in PERSONA_KEYS)}"
+                      f"{'  [CACHE]' if cached else ''}{'  [ERROR] ' + error if error else ''}"
+                      f"{'  [' + finish_reason + ']' if finish_reason in UNCACHED_FINISH else ''}"
+                      f"  ({time.perf_counter() - started:.0f}s)")
+    finally:
+        if jf:
+            jf.close()
+    return ok, failed, hits
+
+
+def run_sequential(personas, out_csv="gemini_responses.csv", backend=None):
+    with open(out_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["업종","프랜차이즈여부","점포연령","고객연령대","고객행동","prompt","gemini_response"])
 
         for idx, p in enumerate(personas, 1):
             print(f"[{idx}/{len(personas)}] {p['업종']} / {p['프랜차이즈여부']} / {p['점포연령']} / {p['고객연령대']} / {p['고객행동']}")
-            response = call_with_retry(p["prompt"])
+            response = call_with_retry(p["prompt"], backend=backend)
             writer.writerow([p["업종"], p["프랜차이즈여부"], p["점포연령"], p["고객연령대"], p["고객행동"], p["prompt"], response])
 
-    print("[DONE] Gemini 응답이 gemini_responses.csv 에 저장되었습니다.")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="personas.json 의 프롬프트를 Gemini 로 일괄 호출")
+    ap.add_argument("--personas", default="personas.json")
+    ap.add_argument("--out", default="gemini_responses.csv")
+    ap.add_argument("--jsonl", default=None, help="CSV 와 함께 JSONL 로도 기록")
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--backend", default=DEFAULT_BACKEND, help="gemini | fake (fake_llm_server.py, LLM_FAKE_URL)")
+    ap.add_argument("--temperature", type=float, default=DEFAULT_TEMPERATURE)
+    ap.add_argument("--max_tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    ap.add_argument("--concurrency", type=int, default=8, help="동시에 진행할 요청 수")
+    ap.add_argument("--rpm", type=float, default=60, help="분당 최대 요청 수 (API 쿼터에 맞출 것)")
+    ap.add_argument("--retries", type=int, default=5)
+    ap.add_argument("--limit", type=int, default=None)
+    ap.add_argument("--resume", action="store_true",
+                    help="응답 캐시 사용: 이미 받은 prompt 는 건너뛰고, 새 응답은 바로 캐시에 저장")
+    ap.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="응답 캐시 SQLite 경로 (streamlit_app.py 와 공유)")
+    ap.add_argument("--sequential", action="store_true", help="기존 방식: 한 건씩 순서대로 호출")
+    args = ap.parse_args()
+
+    # 1. persona_generator에서 저장한 JSON 불러오기
+    with open(args.personas, "r", encoding="utf-8") as f:
+        personas = json.load(f)[:args.limit]
+    # 앱과 같은 프롬프트 (데이터 근거 지침 추가) → 같은 캐시 키라서 --resume 으로 받은 응답을 앱이 바로 쓴다
+    personas = [{**p, "prompt": ensure_data_evidence(p["prompt"])} for p in personas]
+
+    # 2. 결과 CSV 저장
+    if args.sequential:
+        run_sequential(personas, args.out, backend=get_backend(args.backend))
+    else:
+        cache = ResponseCache(args.cache) if args.resume else None
+        ok, failed, hits = asyncio.run(run_batch(personas, args.out, args.jsonl,
+                                                 concurrency=args.concurrency, rpm=args.rpm,
+                                                 retries=args.retries, cache=cache,
+                                                 backend=get_backend(args.backend), model_name=args.model,
+                                                 temperature=args.temperature, max_tokens=args.max_tokens))
+        print(f"[BATCH] 성공 {ok} (캐시 {hits}) / 실패 {failed}")
+
+    print(f"[DONE] Gemini 응답이 {args.out} 에 저장되었습니다.")
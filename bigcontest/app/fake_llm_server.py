@@ -0,0 +1,151 @@
+"""
+Gemini 흉내 로컬 서버 (API 키 / 네트워크 없이 ai_caller.py, streamlit_app.py 부하 테스트용)
+
+  POST /generate  {"prompt", "model", "temperature", "max_tokens"} -> {"text", "finish_reason"}
+  POST /stream    같은 요청 -> NDJSON 줄 {"text": 조각} ... 마지막 {"finish_reason": ..., "output_tokens": n}
+
+- 첫 응답까지 지연: lognormal(중앙값 --latency_ms, --sigma)
+- 스트리밍: --tokens_per_s 속도로 --chunk_tokens 단위 조각 전송
+- 응답 길이가 max_tokens 를 넘으면 잘라서 MAX_TOKENS, --p_safety 확률로 SAFETY (중간에 끊김)
+- --p429 확률로 429 RESOURCE_EXHAUSTED
+
+사용:
+  python fake_llm_server.py --port 8765 --latency_ms 800 --p429 0.05
+  LLM_BACKEND=fake streamlit run streamlit_app.py
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULTS = {
+    "latency_ms": 800.0,
+    "sigma": 0.5,
+    "tokens_per_s": 150.0,
+    "chunk_tokens": 12,
+    "mean_tokens": 900,
+    "p429": 0.0,
+    "p_safety": 0.0,
+}
+
+_SECTIONS = ["요약", "채널 우선순위", "실행 전략", "Phase별 Action Plan", "KPI 및 모니터링 지표", "리스크와 대응"]
+_WORDS = ["인스타그램", "리뷰", "재방문", "쿠폰", "점심", "세트", "배달앱", "객단가", "SNS", "이벤트",
+          "단골", "신메뉴", "지역", "타깃", "전환율", "예산", "월", "주차", "KPI", "목표"]
+
+
+def fake_text(prompt, n_tokens):
+    """prompt 에 따라 결정적인 Markdown 본문 (토큰 = 공백으로 나눈 단어)."""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    words = []
+    per_section = max(1, n_tokens // len(_SECTIONS))
+    for section in _SECTIONS:
+        words += ["\n\n#", section, "\n"]
+        while len(words) < per_section * (_SECTIONS.index(section) + 1):
+            words += ["\n-"] + rng.choices(_WORDS, k=rng.randint(4, 9))
+    return " ".join(words[:n_tokens]).replace(" \n", "\n").strip()
+
+
+def plan_response(prompt, max_tokens, cfg, rng):
+    """(전체 토큰 리스트, finish_reason)."""
+    n = max(20, int(rng.lognormvariate(0, 0.3) * cfg["mean_tokens"]))
+    tokens = fake_text(prompt, n).split(" ")
+    if rng.random() < cfg["p_safety"]:
+        return tokens[: rng.randint(1, max(1, len(tokens) // 2))], "SAFETY"
+    if len(tokens) > max_tokens:
+        return tokens[:max_tokens], "MAX_TOKENS"
+    return tokens, "STOP"
+
+
+def make_handler(cfg):
+    rng = random.Random()
+    lock = threading.Lock()
+
+    def draw(fn, *a):
+        with lock:
+            return fn(*a)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # 요청마다 찍지 않음
+            pass
+
+        def _json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(draw(rng.lognormvariate, 0, cfg["sigma"]) * cfg["latency_ms"] / 1000.0)
+            if draw(rng.random) < cfg["p429"]:
+                return self._json(429, {"error": "RESOURCE_EXHAUSTED"})
+            tokens, finish = draw(plan_response, req.get("prompt", ""), int(req.get("max_tokens", 2048)), cfg, rng)
+
+            if self.path == "/generate":
+                time.sleep(len(tokens) / cfg["tokens_per_s"])
+                return self._json(200, {"text": " ".join(tokens), "finish_reason": finish})
+            if self.path != "/stream":
+                return self._json(404, {"error": "not found"})
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            step = cfg["chunk_tokens"]
+            try:
+                for i in range(0, len(tokens), step):
+                    piece = (" " if i else "") + " ".join(tokens[i:i + step])
+                    self.wfile.write(json.dumps({"text": piece}, ensure_ascii=False).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+                    time.sleep(step / cfg["tokens_per_s"])
+                self.wfile.write(json.dumps({"finish_reason": finish, "output_tokens": len(tokens)}).encode("utf-8") + b"\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 256  # 동시 연결이 많아도 accept 대기열에서 끊기지 않게
+    daemon_threads = True
+
+
+def start_server(host="127.0.0.1", port=8765, **overrides):
+    """백그라운드 스레드로 서버를 띄우고 server 를 돌려준다 (port=0 이면 빈 포트). 끝낼 때 server.shutdown()."""
+    cfg = {**DEFAULTS, **{k: v for k, v in overrides.items() if v is not None}}
+    server = _Server((host, port), make_handler(cfg))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_server_args(ap):
+    ap.add_argument("--latency_ms", type=float, default=DEFAULTS["latency_ms"], help="첫 응답 지연 중앙값")
+    ap.add_argument("--sigma", type=float, default=DEFAULTS["sigma"], help="지연 lognormal sigma (클수록 꼬리가 김)")
+    ap.add_argument("--tokens_per_s", type=float, default=DEFAULTS["tokens_per_s"])
+    ap.add_argument("--chunk_tokens", type=int, default=DEFAULTS["chunk_tokens"])
+    ap.add_argument("--mean_tokens", type=int, default=DEFAULTS["mean_tokens"], help="응답 길이 중앙값(토큰)")
+    ap.add_argument("--p429", type=float, default=DEFAULTS["p429"])
+    ap.add_argument("--p_safety", type=float, default=DEFAULTS["p_safety"])
+
+
+def server_config(args):
+    return {k: getattr(args, k) for k in DEFAULTS}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Gemini 흉내 로컬 서버")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    add_server_args(ap)
+    args = ap.parse_args()
+
+    server = start_server(args.host, args.port, **server_config(args))
+    print(f"[FAKE LLM] http://{args.host}:{server.server_address[1]}  {server_config(args)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,384 @@
+"""
+백그라운드 전략 생성 작업 관리 (Streamlit 스크립트 실행과 분리)
+
+Streamlit 은 버튼 클릭/새 입력마다 스크립트를 처음부터 다시 돌리므로 스크립트 안에서
+스트림을 읽으면 rerun 때 생성이 끊긴다. 여기서는
+- 프로세스에 하나인 JobManager 가 스레드 풀에서 LLM 스트림을 끝까지 읽고
+- 조각을 Job 버퍼에 쌓아 두며 (세션 id 별로 작업 목록 관리)
+- UI 는 매 실행마다 job id 로 버퍼를 읽어 그린다 (rerun 돼도 생성은 계속, 여러 사용자가 풀 공유)
+- MAX_TOKENS 로 잘리면 같은 작업 안에서 자동으로 이어쓴다 (최대 max_rounds 번, 같은 버퍼 → 같은 placeholder)
+  이어쓰기 프롬프트는 전체 초안 대신 완료된 제목 목록 + 마지막 섹션만 보내고, 앞부분을 되풀이한 겹침은 잘라낸다
+- 그래도 잘린 작업은 continue_job 으로 이어쓰기 작업을 만든다 (버튼)
+- 정확 캐시에 없어도 semantic cache 에 비슷한 프롬프트가 있으면 그 응답을 스트리밍처럼 나눠 흘려보낸다 (API 호출 없음)
+- submit_group 은 변형 프롬프트 여러 개를 한 그룹으로 (그룹당 동시 실행 상한, 끝나는 대로 다음 것 시작)
+- telemetry 가 있으면 작업이 끝날 때 TTFT / 생성 시간 / 초당 토큰 / finish_reason / 에러를 기록 (telemetry.py)
+
+  manager = JobManager(max_workers=8, cache=ResponseCache(), semantic=SemanticCache(corpus=prompts))
+  job = manager.submit(session_id, prompt, "gemini-2.5-flash", temperature=0.6, max_tokens=65535)
+  pieces, pos = job.read(pos)      # pos 이후 새 조각
+  job.wait(0.1)                    # 새 조각/종료까지 대기
+"""
+import re
+import time
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_backend import DEFAULT_MAX_TOKENS, DEFAULT_TEMPERATURE, get_backend
+from response_cache import UNCACHED_FINISH  # 잘리거나 차단된 응답은 캐시하지 않는다
+from telemetry import estimate_tokens
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+FINISHED = (DONE, ERROR, CANCELLED)
+
+HEADING_RE = re.compile(r"^#{1,6}\s+\S.*$", re.MULTILINE)
+
+
+def draft_outline(text):
+    """이미 쓴 Markdown 제목 줄 목록 ('# 요약', '## 채널 우선순위', ...)."""
+    return [m.group(0).strip() for m in HEADING_RE.finditer(text)]
+
+
+def trailing_section(text, max_chars=1500):
+    """마지막 제목부터 끝까지 (길면 뒤쪽 max_chars 를 줄 단위로)."""
+    headings = list(HEADING_RE.finditer(text))
+    tail = text[headings[-1].start():] if headings else text
+    if len(tail) > max_chars:
+        tail = tail[-max_chars:]
+        tail = tail[tail.find("\n") + 1:] if "\n" in tail[:-1] else tail
+    return tail
+
+
+def continuation_prompt(previous_text, original_prompt, tail_chars=1500):
+    """MAX_TOKENS로 잘렸을 때 이어쓰기. 전체 초안 대신 완료된 제목 목록 + 마지막 섹션만 보낸다."""
+    outline = draft_outline(previous_text)
+    return (
+        "아래 초안의 이어지는 내용을 같은 톤/서식으로 계속 작성하세요. "
+        "이미 작성된 섹션은 반복하지 말고, 마지막 섹션의 끊긴 지점 바로 다음 글자부터 이어서 "
+        "Phase 나머지와 KPI, 실행 체크리스트를 마저 채워주세요.\n\n"
+        "=== 이미 작성된 제목 ===\n"
+        + ("\n".join(f"- {h}" for h in outline) or "- (없음)") + "\n"
+        "=== 초안의 마지막 부분 (여기서 끊겼습니다) ===\n"
+        f"{trailing_section(previous_text, tail_chars)}\n"
+        "=== 원래의 요구사항 ===\n"
+        f"{original_prompt}\n"
+    )
+
+
+def dedupe_overlap(previous_text, new_text, window=1500, min_overlap=8):
+    """이어쓴 글이 초안 끝부분을 되풀이하며 시작하면 그 겹침을 잘라낸다.
+
+    초안 끝(window 글자)의 접미사이면서 new_text 의 접두사인 가장 긴 문자열을 KMP 실패함수로 찾는다.
+    """
+    tail = previous_text[-window:]
+    for candidate in (new_text, new_text.lstrip()):
+        head = candidate[:len(tail)]
+        s = head + "\x00" + tail
+        pi = [0] * len(s)
+        for i in range(1, len(s)):
+            k = pi[i - 1]
+            while k and s[i] != s[k]:
+                k = pi[k - 1]
+            if s[i] == s[k]:
+                k += 1
+            pi[i] = k
+        if pi[-1] >= min_overlap:
+            return candidate[pi[-1]:]
+    return new_text
+
+
+class Job:
+    def __init__(self, session_id, prompt, model, cfg, parent=None, original_prompt=None, use_cache=True,
+                 max_rounds=0, prefix="", persona=None, group=None):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.prompt, self.model, self.cfg = prompt, model, cfg
+        self.parent = parent                                  # 이어쓰기면 원래 job id
+        self.original_prompt = original_prompt or prompt      # 이어쓰기도 처음 요구사항 기준
+        self.status = QUEUED
+        self.finish_reason = None
+        self.error = None
+        self.from_cache = False
+        self.similarity = None                                # semantic cache 히트면 유사도
+        self.use_cache = use_cache
+        self.max_rounds = max_rounds                          # MAX_TOKENS 때 자동 이어쓰기 횟수 상한
+        self.rounds = 0                                       # 지금까지 자동 이어쓴 횟수
+        self.prefix = prefix                                  # 이어쓰기 작업이면 앞선 본문 (겹침 제거 기준)
+        self.persona = persona                                # 텔레메트리 라벨 (페르소나 키)
+        self.group = group                                    # submit_group 으로 함께 낸 작업 묶음 id
+        self.output_tokens = None                             # 백엔드가 알려준 출력 토큰 합
+        self.created_at = time.time()
+        self.started_at = self.first_token_at = self.finished_at = None
+        self._chunks = []
+        self._cancel = False
+        self._cond = threading.Condition()
+
+    # ── 작업 스레드 쪽
+    def _append(self, piece):
+        with self._cond:
+            if self.first_token_at is None:
+                self.first_token_at = time.time()
+            self._chunks.append(piece)
+            self._cond.notify_all()
+
+    def _finish(self, status, finish_reason=None, error=None):
+        with self._cond:
+            self.status, self.finish_reason, self.error = status, finish_reason, error
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    # ── UI 쪽
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def text(self):
+        with self._cond:
+            return "".join(self._chunks)
+
+    def read(self, pos=0):
+        """(pos 이후 조각 리스트, 새 pos)."""
+        with self._cond:
+            return self._chunks[pos:], len(self._chunks)
+
+    def wait(self, timeout, pos=None):
+        """pos 이후 새 조각이 오거나 작업이 끝날 때까지 최대 timeout 초 대기."""
+        with self._cond:
+            pos = len(self._chunks) if pos is None else pos
+            self._cond.wait_for(lambda: len(self._chunks) > pos or self.done, timeout)
+
+    def cancel(self):
+        self._cancel = True
+
+
+class JobManager:
+    """세션 id → 작업. 스레드 풀은 프로세스 전체(모든 사용자)가 공유한다."""
+
+    def __init__(self, max_workers=8, backend=None, cache=None, ttl=3600, auto_continue=2, semantic=None,
+                 replay_seconds=2.0, telemetry=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gen")
+        self._backend = backend
+        self.auto_continue = auto_continue
+        self.cache = cache
+        self.semantic = semantic
+        self.replay_seconds = replay_seconds  # semantic 히트를 흘려보내는 데 쓰는 시간
+        self.telemetry = telemetry
+        self.ttl = ttl
+        self._jobs = {}
+        self._waiting = {}  # group id → 동시 실행 상한 때문에 아직 시작 안 한 작업
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, prompt, model, parent=None, original_prompt=None, use_cache=True,
+               max_rounds=None, prefix="", persona=None, **cfg):
+        job = self._create(session_id, prompt, model, parent=parent, original_prompt=original_prompt,
+                           use_cache=use_cache, max_rounds=max_rounds, prefix=prefix, persona=persona, **cfg)
+        return self._start(job)
+
+    def submit_group(self, session_id, prompts, model, personas=None, concurrency=4, use_cache=True, **cfg):
+        """변형 프롬프트 여러 개를 한 그룹으로. 동시에 concurrency 개까지 돌고, 하나 끝나면 다음을 시작한다."""
+        group = uuid.uuid4().hex
+        personas = personas or [None] * len(prompts)
+        jobs = [self._create(session_id, prompt, model, use_cache=use_cache, persona=persona, group=group, **cfg)
+                for prompt, persona in zip(prompts, personas)]
+        concurrency = max(1, concurrency)
+        with self._lock:
+            self._waiting[group] = deque(jobs[concurrency:])
+        for job in jobs[:concurrency]:
+            self._start(job)
+        return jobs
+
+    def _create(self, session_id, prompt, model, parent=None, original_prompt=None, use_cache=True,
+                max_rounds=None, prefix="", persona=None, group=None, **cfg):
+        max_rounds = self.auto_continue if max_rounds is None else max_rounds
+        job = Job(session_id, prompt, model, cfg, parent=parent, original_prompt=original_prompt,
+                  use_cache=use_cache, max_rounds=max_rounds, prefix=prefix, persona=persona, group=group)
+        with self._lock:
+            self._gc()
+            self._jobs[job.id] = job
+        return job
+
+    def _start(self, job):
+        cached = self._cached(job)
+        if cached:
+            job.from_cache = True
+            job.started_at = time.time()
+            job._append(cached)
+            job._finish(DONE, "STOP")
+            self._record(job)
+            self._release(job)
+            return job
+        similar = self._similar(job)
+        if similar:
+            response, job.similarity, _ = similar
+            self._pool.submit(self._recorded, self._replay, job, response)
+        else:
+            self._pool.submit(self._recorded, self._run, job)
+        return job
+
+    def continue_job(self, job_id):
+        """잘린 작업의 본문을 이어서 쓰는 새 작업 (자동 이어쓰기 상한을 넘긴 뒤 버튼으로)."""
+        prev = self.get(job_id)
+        if prev is None:
+            return None
+        previous_text = prev.prefix + prev.text
+        return self.submit(prev.session_id, continuation_prompt(previous_text, prev.original_prompt), prev.model,
+                           parent=prev.id, original_prompt=prev.original_prompt, use_cache=prev.use_cache,
+                           max_rounds=prev.max_rounds, prefix=previous_text, persona=prev.persona, **prev.cfg)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def session_jobs(self, session_id):
+        with self._lock:
+            return sorted((j for j in self._jobs.values() if j.session_id == session_id),
+                          key=lambda j: j.created_at)
+
+    def cancel_session(self, session_id):
+        for job in self.session_jobs(session_id):
+            job.cancel()
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {}
+        for j in jobs:
+            counts[j.status] = counts.get(j.status, 0) + 1
+        out = {"jobs": len(jobs), "sessions": len({j.session_id for j in jobs}), **counts}
+        if self.semantic is not None:
+            out["semantic"] = self.semantic.stats()
+        return out
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        self._pool.shutdown(wait=True)
+
+    # ── 내부
+    def _cfg_key(self, job):
+        return job.cfg.get("temperature", DEFAULT_TEMPERATURE), job.cfg.get("max_tokens", DEFAULT_MAX_TOKENS)
+
+    def _cached(self, job):
+        if self.cache is None or not job.use_cache:
+            return None
+        return self.cache.lookup(job.prompt, job.model, *self._cfg_key(job))
+
+    def _similar(self, job):
+        # 이어쓰기 작업은 앞 본문에 따라 내용이 달라야 하므로 처음 생성만
+        if self.semantic is None or not job.use_cache or job.parent:
+            return None
+        return self.semantic.lookup(job.prompt, job.model, *self._cfg_key(job))
+
+    def _replay(self, job, text, chunk_chars=40):
+        """semantic 히트: 저장된 응답을 조각내서 replay_seconds 동안 흘려보낸다 (생성 중인 것처럼)."""
+        job.status, job.started_at = RUNNING, time.time()
+        pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+        delay = self.replay_seconds / max(len(pieces), 1)
+        for piece in pieces:
+            if job._cancel:
+                return job._finish(CANCELLED)
+            job._append(piece)
+            if delay >= 0.001:
+                time.sleep(delay)
+        job._finish(DONE, "STOP")
+
+    def _recorded(self, fn, job, *args):
+        try:
+            fn(job, *args)
+        finally:
+            self._record(job)
+            self._release(job)
+
+    def _release(self, job):
+        # 그룹 작업이 끝나면 같은 그룹에서 기다리던 다음 작업을 시작
+        if job.group is None:
+            return
+        with self._lock:
+            waiting = self._waiting.get(job.group)
+            nxt = waiting.popleft() if waiting else None
+            if waiting is not None and not waiting:
+                del self._waiting[job.group]
+        if nxt is not None:
+            self._start(nxt)
+
+    def _record(self, job):
+        """끝난 작업 하나를 telemetry 이벤트로 (캐시 히트는 cache 라벨만 다르고 지연 히스토그램에는 안 넣음)."""
+        if self.telemetry is None:
+            return
+        end = job.finished_at or time.time()
+        started = job.started_at or job.created_at
+        text = job.text
+        tokens = job.output_tokens if job.output_tokens is not None else estimate_tokens(text)
+        decode_s = end - job.first_token_at if job.first_token_at else None
+        self.telemetry.record({
+            "job": job.id, "model": job.model, "persona": job.persona,
+            "status": job.status, "finish_reason": job.finish_reason,
+            "cache": "exact" if job.from_cache else "semantic" if job.similarity is not None else "none",
+            "continuation": bool(job.parent), "rounds": job.rounds,
+            "queue_s": round(started - job.created_at, 4),
+            "ttft_s": round(job.first_token_at - started, 4) if job.first_token_at else None,
+            "duration_s": round(end - started, 4),
+            "output_chars": len(text), "output_tokens": tokens,
+            "tokens_estimated": job.output_tokens is None,
+            "tokens_per_s": round(tokens / decode_s, 2) if decode_s and decode_s > 0.05 else None,
+            "error": type(job.error).__name__ if job.error else None,
+        })
+
+    def _run(self, job):
+        if job._cancel:
+            return job._finish(CANCELLED)
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            prompt, fr = job.prompt, None
+            while True:
+                fr = self._stream_round(job, prompt, dedupe=bool(job.prefix or job.rounds))
+                if fr is None:
+                    return job._finish(CANCELLED)
+                if fr != "MAX_TOKENS" or job.rounds >= job.max_rounds:
+                    break
+                # 잘렸으면 같은 버퍼에 이어쓴다 (UI 는 같은 placeholder 에 그대로 이어서 그림)
+                job.rounds += 1
+                prompt = continuation_prompt(job.prefix + job.text, job.original_prompt)
+            text = job.text
+            if self.cache is not None and job.use_cache and text and fr not in UNCACHED_FINISH:
+                self.cache.put(job.prompt, job.model, *self._cfg_key(job), text, finish_reason=fr)
+            if self.semantic is not None and job.use_cache and not job.parent and text and fr not in UNCACHED_FINISH:
+                self.semantic.put(job.prompt, job.model, *self._cfg_key(job), text)
+            job._finish(DONE, fr)
+        except Exception as e:
+            job._finish(ERROR, error=e)
+
+    def _stream_round(self, job, prompt, dedupe):
+        """한 번 스트리밍해서 버퍼에 붙이고 finish_reason (취소되면 None).
+
+        이어쓰기 라운드는 처음 window 글자를 모아 앞 본문과의 겹침을 잘라낸 뒤부터 흘려보낸다.
+        """
+        stream = (self._backend or get_backend()).stream(prompt, job.model, **job.cfg)
+        held, window = ([] if dedupe else None), 1500
+        for piece in stream:
+            if job._cancel:
+                return None
+            if not piece:
+                continue
+            if held is None:
+                job._append(piece)
+                continue
+            held.append(piece)
+            if sum(map(len, held)) >= window:
+                job._append(dedupe_overlap(job.prefix + job.text, "".join(held), window))
+                held = None
+        if held:
+            job._append(dedupe_overlap(job.prefix + job.text, "".join(held), window))
+        if stream.output_tokens is not None:
+            job.output_tokens = (job.output_tokens or 0) + stream.output_tokens
+        return stream.finish_reason or "STOP"
+
+    def _gc(self):
+        # 끝난 지 ttl 초가 지난 작업은 버린다 (호출하는 쪽이 _lock 보유)
+        cutoff = time.time() - self.ttl
+        for jid in [jid for jid, j in self._jobs.items() if j.done and j.finished_at < cutoff]:
+            del self._jobs[jid]
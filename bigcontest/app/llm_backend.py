@@ -0,0 +1,227 @@
+import os
+import json
+import asyncio
+import http.client
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urlparse
+
+# LLM_BACKEND=gemini (기본) | fake  — fake 는 fake_llm_server.py (LLM_FAKE_URL) 로 보낸다
+DEFAULT_BACKEND = os.environ.get("LLM_BACKEND", "gemini")
+DEFAULT_FAKE_URL = os.environ.get("LLM_FAKE_URL", "http://127.0.0.1:8765")
+
+# streamlit_app / ai_caller / plan_library 공통 생성 설정 — 응답 캐시 키 (prompt, model, temperature, max_tokens)
+# 가 같아야 배치에서 받은 응답을 앱이 그대로 쓴다
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_TEMPERATURE = 0.6
+DEFAULT_MAX_TOKENS = 65535
+
+
+class RateLimitError(RuntimeError):
+    """429 / RESOURCE_EXHAUSTED. 재시도 대상."""
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    finish_reason: str = "STOP"
+
+
+class TextStream:
+    """스트리밍 응답. for piece in stream 으로 텍스트 조각을 받고, 다 읽은 뒤 finish_reason 을 본다.
+
+    output_tokens 는 백엔드가 알려준 출력 토큰 수 (모르면 None).
+    """
+
+    def __init__(self, pieces):
+        self._pieces = pieces
+        self.finish_reason = None
+        self.output_tokens = None
+
+    def __iter__(self):
+        for kind, value in self._pieces:
+            if kind == "text":
+                yield value
+            elif kind == "usage":
+                self.output_tokens = value
+            else:
+                self.finish_reason = value
+
+
+def _finish_name(fr):
+    # Gemini 는 enum (FinishReason.MAX_TOKENS) 을 돌려주므로 이름 문자열로 맞춘다
+    if fr is None:
+        return None
+    return getattr(fr, "name", str(fr))
+
+
+# ─────────────────────────────
+# Gemini
+# ─────────────────────────────
+class GeminiBackend:
+    name = "gemini"
+
+    def __init__(self, api_key=None):
+        import google.generativeai as genai
+
+        api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            raise RuntimeError("환경변수 GOOGLE_API_KEY 가 설정되어 있지 않습니다.")
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._models = {}
+
+    def model(self, model_name):
+        # GenerativeModel 은 모델 이름별로 한 번만 만든다
+        if model_name not in self._models:
+            self._models[model_name] = self._genai.GenerativeModel(model_name)
+        return self._models[model_name]
+
+    @staticmethod
+    def _config(temperature, max_tokens, extra):
+        return {"temperature": temperature, "max_output_tokens": max_tokens, **extra}
+
+    @staticmethod
+    def _to_response(resp):
+        text = resp.text if hasattr(resp, "text") else str(resp)
+        try:
+            fr = _finish_name(resp.candidates[0].finish_reason)
+        except Exception:
+            fr = None
+        return LLMResponse(text, fr or "STOP")
+
+    def generate(self, prompt, model, temperature=0.6, max_tokens=2048, **extra):
+        resp = self.model(model).generate_content(prompt, generation_config=self._config(temperature, max_tokens, extra))
+        return self._to_response(resp)
+
+    async def agenerate(self, prompt, model, temperature=0.6, max_tokens=2048, **extra):
+        resp = await self.model(model).generate_content_async(
+            prompt, generation_config=self._config(temperature, max_tokens, extra))
+        return self._to_response(resp)
+
+    def stream(self, prompt, model, temperature=0.6, max_tokens=2048, **extra):
+        stream = self.model(model).generate_content(
+            prompt, generation_config=self._config(temperature, max_tokens, extra), stream=True)
+
+        def pieces():
+            for event in stream:
+                piece = ""
+                if getattr(event, "text", None):
+                    piece = event.text
+                elif getattr(event, "candidates", None):
+                    # 일부 이벤트는 delta 형태로 들어와서 text가 비어 있음
+                    for c in event.candidates:
+                        try:
+                            piece += "".join([p.text or "" for p in c.content.parts])
+                        except Exception:
+                            pass
+                if piece:
+                    yield "text", piece
+            try:
+                stream.resolve()  # 최종 상태/메타 확보
+            except Exception:
+                pass
+            try:
+                fr = stream.candidates[0].finish_reason
+            except Exception:
+                fr = None
+            try:
+                yield "usage", int(stream.usage_metadata.candidates_token_count)
+            except Exception:
+                pass
+            yield "finish", _finish_name(fr)
+
+        return TextStream(pieces())
+
+
+# ─────────────────────────────
+# 로컬 fake 서버 (fake_llm_server.py)
+# ─────────────────────────────
+class FakeServerBackend:
+    """fake_llm_server.py 의 /generate, /stream 을 부르는 백엔드. API 키·네트워크 없이 부하 테스트용."""
+
+    name = "fake"
+
+    def __init__(self, url=DEFAULT_FAKE_URL, timeout=120):
+        u = urlparse(url)
+        self.host, self.port, self.timeout = u.hostname, u.port or 80, timeout
+
+    @staticmethod
+    def _body(prompt, model, temperature, max_tokens):
+        return json.dumps({"prompt": prompt, "model": model, "temperature": temperature,
+                           "max_tokens": max_tokens}, ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _check(status, body):
+        if status == 429:
+            raise RateLimitError("429 RESOURCE_EXHAUSTED (fake)")
+        if status != 200:
+            raise RuntimeError(f"fake LLM server HTTP {status}: {body[:200]!r}")
+
+    def generate(self, prompt, model, temperature=0.6, max_tokens=2048, **extra):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request("POST", "/generate", self._body(prompt, model, temperature, max_tokens),
+                         {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            body = resp.read()
+            self._check(resp.status, body)
+        finally:
+            conn.close()
+        data = json.loads(body)
+        return LLMResponse(data["text"], data["finish_reason"])
+
+    async def agenerate(self, prompt, model, temperature=0.6, max_tokens=2048, **extra):
+        # 스레드 풀 크기에 묶이지 않도록 asyncio 스트림으로 직접 HTTP/1.0 요청
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            body = self._body(prompt, model, temperature, max_tokens)
+            writer.write(b"POST /generate HTTP/1.0\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\n\r\n" % (self.host.encode(), len(body)) + body)
+            await writer.drain()
+            raw = await asyncio.wait_for(reader.read(), self.timeout)
+        finally:
+            writer.close()
+        head, _, payload = raw.partition(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        self._check(status, payload)
+        data = json.loads(payload)
+        return LLMResponse(data["text"], data["finish_reason"])
+
+    def stream(self, prompt, model, temperature=0.6, max_tokens=2048, **extra):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        conn.request("POST", "/stream", self._body(prompt, model, temperature, max_tokens),
+                     {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        if resp.status != 200:
+            body = resp.read()
+            conn.close()
+            self._check(resp.status, body)
+
+        def pieces():
+            try:
+                for line in resp:
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if "text" in event:
+                        yield "text", event["text"]
+                    if "output_tokens" in event:
+                        yield "usage", event["output_tokens"]
+                    if "finish_reason" in event:
+                        yield "finish", event["finish_reason"]
+            finally:
+                conn.close()
+
+        return TextStream(pieces())
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=None):
+    """이름(또는 LLM_BACKEND 환경변수)으로 백엔드를 만들고 프로세스 안에서 재사용한다."""
+    name = name or DEFAULT_BACKEND
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "fake":
+        return FakeServerBackend(DEFAULT_FAKE_URL)
+    raise ValueError(f"알 수 없는 LLM_BACKEND: {name} (gemini | fake)")
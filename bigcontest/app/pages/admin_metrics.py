@@ -0,0 +1,79 @@
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+from telemetry import DEFAULT_JSONL_PATH, get_telemetry, read_events
+
+# ─────────────────────────────
+# 생성 모니터링 (관리자)
+# ─────────────────────────────
+# JobManager 가 남긴 telemetry JSONL 을 읽어 지연 분위수/에러율/finish_reason 을 그린다.
+# 여러 Streamlit 프로세스가 같은 파일에 쓰면 합쳐서 보인다. ADMIN_TOKEN 이 있으면 입력해야 보임.
+st.set_page_config(page_title="생성 모니터링", layout="wide")
+st.title("📊 전략 생성 모니터링")
+
+token = os.getenv("ADMIN_TOKEN")
+if token and st.sidebar.text_input("관리자 토큰", type="password") != token:
+    st.info("관리자 토큰을 입력하세요.")
+    st.stop()
+
+WINDOWS = {"최근 1시간": (3600, "1min"), "최근 24시간": (86400, "15min"), "최근 7일": (7 * 86400, "2h"),
+           "전체": (None, "1D")}
+window = st.sidebar.selectbox("기간", list(WINDOWS), index=1)
+seconds, freq = WINDOWS[window]
+events = read_events(DEFAULT_JSONL_PATH, since=time.time() - seconds if seconds else None)
+if not events:
+    st.info(f"아직 기록된 생성이 없습니다 ({DEFAULT_JSONL_PATH}).")
+    st.stop()
+
+df = pd.DataFrame(events)
+df["time"] = pd.to_datetime(df["ts"], unit="s")
+models = sorted(df["model"].dropna().unique())
+picked = st.sidebar.multiselect("모델", models, default=models)
+df = df[df["model"].isin(picked)]
+if df.empty:
+    st.stop()
+live = df[df["cache"] == "none"]
+
+c1, c2, c3, c4, c5 = st.columns(5)
+c1.metric("요청", f"{len(df):,}")
+c2.metric("에러율", f"{(df['status'] == 'error').mean():.1%}")
+c3.metric("캐시 히트율", f"{(df['cache'] != 'none').mean():.1%}")
+c4.metric("MAX_TOKENS", f"{(df['finish_reason'] == 'MAX_TOKENS').mean():.1%}")
+c5.metric("TTFT p50", f"{live['ttft_s'].median():.2f}s" if live["ttft_s"].notna().any() else "-")
+
+st.subheader("지연 분위수 (실시간 생성만)")
+metric = st.radio("지표", ["ttft_s", "duration_s", "tokens_per_s", "queue_s"], horizontal=True,
+                  format_func={"ttft_s": "첫 토큰까지(초)", "duration_s": "전체 생성(초)",
+                               "tokens_per_s": "초당 토큰", "queue_s": "대기열(초)"}.get)
+series = live.set_index("time")[metric].dropna()
+if series.empty:
+    st.caption("표시할 값이 없습니다.")
+else:
+    resampled = series.resample(freq)
+    st.line_chart(pd.DataFrame({f"p{int(q * 100)}": resampled.quantile(q) for q in (0.5, 0.9, 0.99)}).dropna(how="all"))
+
+    def percentiles(group):
+        s = group[metric].dropna()
+        return pd.Series({"count": len(s), "p50": s.quantile(0.5), "p90": s.quantile(0.9), "p99": s.quantile(0.99)})
+
+    left, right = st.columns(2)
+    left.markdown("**모델별**")
+    left.dataframe(live.groupby("model").apply(percentiles, include_groups=False).round(3))
+    right.markdown("**페르소나별 (p90 높은 순 10개)**")
+    right.dataframe(live.groupby("persona").apply(percentiles, include_groups=False)
+                    .sort_values("p90", ascending=False).head(10).round(3))
+
+st.subheader("finish_reason / 상태")
+left, right = st.columns(2)
+left.bar_chart(df["finish_reason"].fillna("-").value_counts())
+right.bar_chart(df["status"].value_counts())
+errors = df[df["error"].notna()]
+if not errors.empty:
+    st.markdown("**에러 유형**")
+    st.dataframe(errors.groupby(["model", "error"]).size().rename("count").reset_index())
+
+with st.expander("이 프로세스의 Prometheus 메트릭 (METRICS_PORT 를 주면 /metrics 로도 노출)"):
+    st.code(get_telemetry().registry.prometheus_text(), language="text")
@@ -46,6 +46,31 @@ def build_prompt(industry, franchise, store_age, age_group, behavior):
         f"## 리스크와 대응"
     )
 
+def build_fallback_prompt(industry, franchise, store_age, age_group, behavior):
+    # personas.json 에 없는 조합 (업종 기타 등) 에 streamlit_app 이 쓰는 프롬프트
+    return (
+        "다음 상점 정보를 기반으로 3~5단계 Phase별 맞춤형 마케팅 전략을 제안하세요.\n"
+        "각 Phase는 목표, 핵심 액션(채널·컨텐츠·오퍼), 예산범위, 예상 KPI, 다음 Phase로 넘어가는 기준을 포함하세요.\n\n"
+        f"- 업종: {industry}\n"
+        f"- 형태: {franchise}\n"
+        f"- 점포연령: {store_age}\n"
+        f"- 주요 고객연령대: {age_group}\n"
+        f"- 고객행동 특성: {behavior}\n"
+        "응답은 불릿과 표를 적절히 섞어 간결하게 작성하세요."
+    )
+
+DATA_EVIDENCE_GUIDE = (
+    "\n\n추가 지침:\n"
+    "- 각 제안에는 데이터 근거(표/지표/규칙 등)를 함께 표기하세요.\n"
+    "- 가능한 경우 간단한 표나 지표 수치를 활용해 근거를 명확히 보여주세요."
+)
+
+def ensure_data_evidence(prompt: str) -> str:
+    """프롬프트에 데이터 근거 지침이 없으면 추가."""
+    if "데이터 근거" in prompt:
+        return prompt
+    return prompt.rstrip() + DATA_EVIDENCE_GUIDE
+
 def generate_personas(limit=10):
     personas = []
     all_combinations = itertools.product(
@@ -0,0 +1,108 @@
+"""
+personas.json 해시 인덱스 (다섯 항목 정확 매칭 + 단계적 fallback + 복수 고객행동 병합)
+
+  index = PersonaIndex(personas)          # 로드할 때 한 번
+  persona = index.find(업종, 프랜차이즈, 점포연령, 고객연령대, 고객행동)
+
+- 정규화한 (업종, 프랜차이즈여부, 점포연령, 고객연령대, 고객행동) 튜플 → persona dict 조회 (O(1))
+- 모르는 항목("미상", 목록에 없는 값)은 와일드카드: 알려진 항목 조합별 dict 를 미리 만들어 두고 조회
+- 그래도 없으면 고객행동 → 고객연령대 → 점포연령 → 프랜차이즈여부 순으로 버리며 다시 조회 (업종은 유지)
+- "재방문 고객 + 직장인 고객" 처럼 고객행동이 여럿이면 행동별 페르소나를 찾아 프롬프트를 병합
+
+테스트: ../tests/test_persona_index.py (personas.json 전체 540 조합, fallback, 병합)
+"""
+from itertools import combinations
+
+from persona_generator import build_prompt
+
+PERSONA_FIELDS = ["업종", "프랜차이즈여부", "점포연령", "고객연령대", "고객행동"]
+UNKNOWN = "미상"
+# 버리는 순서 (업종은 버리지 않음: 업종이 다르면 일반 프롬프트가 낫다)
+FALLBACK_ORDER = ["고객행동", "고객연령대", "점포연령", "프랜차이즈여부"]
+
+# 상담 흐름에서 파싱한 고객행동(예: "유동 고객") → persona_generator 의 고객행동
+BEHAVIOR_TO_PERSONA = {
+    "재방문 고객": "재방문 고객 중심",
+    "신규 고객": "신규 고객 중심",
+    "거주 고객": "거주 고객 중심",
+    "직장인 고객": "직장인 고객 중심",
+    "유동 고객": "유동인구 고객 중심",
+}
+
+
+def _norm(value):
+    return " ".join(str(value).split()) if value is not None else UNKNOWN
+
+
+def split_behaviors(value):
+    """'재방문 고객 + 직장인 고객' → ['재방문 고객 중심', '직장인 고객 중심'] (persona 값으로, 순서 유지·중복 제거)."""
+    out = []
+    for part in _norm(value).split("+"):
+        part = part.strip()
+        part = BEHAVIOR_TO_PERSONA.get(part, part)
+        if part and part not in out:
+            out.append(part)
+    return out
+
+
+class PersonaIndex:
+    def __init__(self, personas):
+        self.personas = personas
+        self.values = {f: {_norm(p[f]) for p in personas} for f in PERSONA_FIELDS}
+        # 알려진 항목 조합(mask)마다 {항목 값 튜플: [persona, ...]} (personas.json 순서 유지)
+        self._by_fields = {}
+        for r in range(1, len(PERSONA_FIELDS) + 1):
+            for fields in combinations(PERSONA_FIELDS, r):
+                table = {}
+                for p in personas:
+                    table.setdefault(tuple(_norm(p[f]) for f in fields), []).append(p)
+                self._by_fields[fields] = table
+
+    def __len__(self):
+        return len(self.personas)
+
+    def _lookup(self, query):
+        """query: {항목: 값} 중 값이 목록에 있는 항목만으로 조회, 없으면 FALLBACK_ORDER 대로 항목을 버린다."""
+        known = {f: v for f, v in query.items() if v in self.values[f]}
+        if "업종" not in known:
+            return None
+        fields = [f for f in PERSONA_FIELDS if f in known]
+        for drop in [None] + FALLBACK_ORDER:
+            if drop in fields:
+                fields.remove(drop)
+            hits = self._by_fields[tuple(fields)].get(tuple(known[f] for f in fields))
+            if hits:
+                return hits[0]
+        return None
+
+    def find(self, 업종, 프랜차이즈, 점포연령=UNKNOWN, 고객연령대=UNKNOWN, 고객행동=UNKNOWN):
+        """가장 잘 맞는 persona (없으면 None). 고객행동이 여럿이면 병합한 persona 를 돌려준다."""
+        base = {"업종": _norm(업종), "프랜차이즈여부": _norm(프랜차이즈),
+                "점포연령": _norm(점포연령), "고객연령대": _norm(고객연령대)}
+        behaviors = split_behaviors(고객행동)
+        if len(behaviors) <= 1:
+            return self._lookup({**base, "고객행동": behaviors[0] if behaviors else UNKNOWN})
+
+        matches = []
+        for b in behaviors:
+            p = self._lookup({**base, "고객행동": b})
+            if p is not None and p not in matches:
+                matches.append(p)
+        if len(matches) <= 1:
+            return matches[0] if matches else None
+        return merge_personas(matches)
+
+
+def merge_personas(personas):
+    """같은 업종 페르소나 여러 개 → 항목별 값을 ' + ' 로 합친 persona 하나 (프롬프트는 build_prompt 로 다시 생성)."""
+    merged = {}
+    for f in PERSONA_FIELDS:
+        vals = []
+        for p in personas:
+            if p[f] not in vals:
+                vals.append(p[f])
+        merged[f] = " + ".join(vals)
+    merged["prompt"] = build_prompt(*(merged[f] for f in PERSONA_FIELDS))
+    merged["merged_from"] = [{f: p[f] for f in PERSONA_FIELDS} for p in personas]
+    return merged
+
@@ -0,0 +1,142 @@
+"""
+페르소나별 마케팅 전략(Markdown) 사전 생성 라이브러리
+
+업종 × 프랜차이즈여부 × 점포연령 × 고객연령대 × 고객행동 (6×2×3×3×5 = 540개) 전략을 배치로 미리 만들어
+압축 zip 한 파일에 저장한다. zip 의 중앙 디렉터리가 곧 인덱스라서 열 때 manifest 만 읽고,
+조회할 때는 해당 멤버 하나만 풀어서 즉시 돌려준다.
+  plan_library.zip
+    manifest.json   {"model", "temperature", "max_tokens", "built_at", "plans": {persona_key: member}}
+    plans/<sha1>.md  (deflate)
+
+사용:
+  # 빌드 (ai_caller.run_batch, 응답 캐시 재사용 → 중간에 끊겨도 다시 돌리면 이어서)
+  python plan_library.py --build --out plan_library.zip --concurrency 16 --rpm 120
+  LLM_BACKEND=fake python plan_library.py --build     # fake_llm_server.py 로 빌드 테스트
+  # 조회
+  python plan_library.py --show "한식|프랜차이즈|신규|30~40대 고객 중심|직장인 고객 중심"
+"""
+import os
+import sys
+import csv
+import json
+import time
+import asyncio
+import hashlib
+import zipfile
+import argparse
+import tempfile
+from pathlib import Path
+
+from llm_backend import DEFAULT_MAX_TOKENS, DEFAULT_MODEL, DEFAULT_TEMPERATURE
+from persona_generator import ensure_data_evidence, generate_personas
+from persona_index import BEHAVIOR_TO_PERSONA
+
+DEFAULT_LIBRARY_PATH = os.environ.get("PLAN_LIBRARY_PATH", str(Path(__file__).resolve().parent / "plan_library.zip"))
+PERSONA_KEYS = ["업종", "프랜차이즈여부", "점포연령", "고객연령대", "고객행동"]
+MANIFEST = "manifest.json"
+
+
+def persona_key(업종, 프랜차이즈여부, 점포연령, 고객연령대, 고객행동):
+    return "|".join([업종, 프랜차이즈여부, 점포연령, 고객연령대, 고객행동])
+
+
+def key_from_info(info):
+    """streamlit 상담 정보 → persona key. 복수/자유 입력 고객행동처럼 키로 안 바뀌면 None (실시간 생성)."""
+    behavior = BEHAVIOR_TO_PERSONA.get(info.get("고객행동", ""))
+    if behavior is None:
+        return None
+    return persona_key(info["업종"], info["프랜차이즈여부"], info["점포연령"], info["고객연령대"], behavior)
+
+
+def _member(key):
+    return f"plans/{hashlib.sha1(key.encode('utf-8')).hexdigest()}.md"
+
+
+def write_library(plans, path=DEFAULT_LIBRARY_PATH, meta=None):
+    """plans: {persona_key: markdown}. 임시 파일에 쓰고 교체하므로 앱이 읽는 중이어도 안전."""
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    index = {}
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for key, text in sorted(plans.items()):
+            index[key] = _member(key)
+            zf.writestr(index[key], text)
+        manifest = {**(meta or {}), "built_at": time.strftime("%Y-%m-%d %H:%M:%S"), "plans": index}
+        zf.writestr(MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
+    tmp.replace(path)
+    return manifest
+
+
+class PlanLibrary:
+    """읽기 전용. 열 때 manifest 만 읽고, get 은 멤버 하나만 푼다."""
+
+    def __init__(self, path=DEFAULT_LIBRARY_PATH):
+        self.path = str(path)
+        self._zf = zipfile.ZipFile(self.path, "r")
+        self.meta = json.loads(self._zf.read(MANIFEST))
+        self._index = self.meta["plans"]
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get(self, key):
+        member = self._index.get(key)
+        if member is None:
+            return None
+        return self._zf.read(member).decode("utf-8")
+
+
+def open_library(path=DEFAULT_LIBRARY_PATH):
+    """라이브러리 파일이 없으면 None (앱은 실시간 생성만 사용)."""
+    return PlanLibrary(path) if Path(path).exists() else None
+
+
+def build_library(out=DEFAULT_LIBRARY_PATH, model_name=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                  max_tokens=DEFAULT_MAX_TOKENS, concurrency=8, rpm=60, backend=None, cache_path=None):
+    """540개 페르소나 전략을 ai_caller.run_batch 로 생성해 라이브러리로 저장. 실패/잘림/차단된 페르소나는 빠진다."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import ai_caller
+    from response_cache import ResponseCache, DEFAULT_CACHE_PATH, UNCACHED_FINISH
+
+    personas = [{**p, "prompt": ensure_data_evidence(p["prompt"])} for p in generate_personas(limit=None)]
+    with tempfile.TemporaryDirectory() as tmp:
+        out_csv = os.path.join(tmp, "plans.csv")
+        _, _, hits = asyncio.run(ai_caller.run_batch(
+            personas, out_csv, concurrency=concurrency, rpm=rpm, backend=backend,
+            cache=ResponseCache(cache_path or DEFAULT_CACHE_PATH),
+            model_name=model_name, temperature=temperature, max_tokens=max_tokens))
+        with open(out_csv, "r", encoding="utf-8", newline="") as f:
+            rows = [r for r in csv.DictReader(f)
+                    if not r["error"] and r["gemini_response"] and r["finish_reason"] not in UNCACHED_FINISH]
+    plans = {persona_key(*(r[k] for k in PERSONA_KEYS)): r["gemini_response"] for r in rows}
+    meta = {"model": model_name, "temperature": temperature, "max_tokens": max_tokens}
+    write_library(plans, out, meta)
+    return len(plans), len(personas) - len(plans), hits
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="페르소나 전략 라이브러리 빌드/조회")
+    ap.add_argument("--out", default=DEFAULT_LIBRARY_PATH)
+    ap.add_argument("--build", action="store_true")
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--temperature", type=float, default=DEFAULT_TEMPERATURE)
+    ap.add_argument("--max_tokens", type=int, default=DEFAULT_MAX_TOKENS)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rpm", type=float, default=60)
+    ap.add_argument("--show", default=None, help="persona key (업종|프랜차이즈여부|점포연령|고객연령대|고객행동)")
+    args = ap.parse_args()
+
+    if args.build:
+        n, failed, hits = build_library(args.out, args.model, args.temperature, args.max_tokens,
+                                        args.concurrency, args.rpm)
+        size = os.path.getsize(args.out) / 1024
+        print(f"[DONE] {args.out}: 전략 {n}개 ({size:.0f} KB, 캐시 {hits}, 실패 {failed})")
+    if args.show:
+        lib = PlanLibrary(args.out)
+        t0 = time.perf_counter()
+        plan = lib.get(args.show)
+        print(plan if plan is not None else "(없음)")
+        print(f"\n[LOOKUP] {(time.perf_counter() - t0) * 1e3:.2f} ms, 라이브러리 {len(lib)}개")
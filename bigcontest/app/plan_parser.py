@@ -0,0 +1,381 @@
+"""
+생성된 전략 Markdown 파서 (persona_generator.build_prompt 의 출력 형식 기준)
+
+  # 요약 / ## 채널 우선순위 / ## 실행 전략 / ## Phase별 Action Plan / ## KPI 및 모니터링 지표 / ## 리스크와 대응
+
+- split_sections(text): 제목 줄 기준으로 (level, 제목, 본문) 목록
+- find_section(text, "KPI"): 필수 섹션 이름으로 본문 찾기 (제목 표기가 조금 달라도 키워드로)
+- extract_executive_summary(text): 요약 섹션의 핵심 불릿 (없으면 앞쪽 불릿/문장)
+- parse_plan(text): ParsedPlan (요약, 채널 우선순위, 실행 전략, Phase별 목표/액션/KPI, KPI 표, 리스크와 대응)
+  채널/KPI 는 CHANNELS / KPI_TERMS 의 대표 이름으로도 정규화해 둔다 (plan_store 집계용)
+
+  plan = parse_plan(markdown)
+  [c.channels for c in plan.channels]   # [["인스타그램"], ["틱톡"], ["네이버 플레이스", "카카오맵"], ...]
+  plan.phases[0].kpis                    # ["신규 방문객 수: 주 50명 이상", ...]
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+# 필수 섹션 이름 → 제목에서 찾을 패턴 (모델이 "KPI 및 모니터링", "리스크 및 대응" 처럼 바꿔 쓰기도 함)
+REQUIRED_SECTIONS = {
+    "요약": re.compile(r"요약|summary", re.I),
+    "채널 우선순위": re.compile(r"채널"),
+    "실행 전략": re.compile(r"실행\s*전략"),
+    "Phase별 Action Plan": re.compile(r"phase\s*별|action\s*plan", re.I),
+    "KPI": re.compile(r"kpi|모니터링", re.I),
+    "리스크": re.compile(r"리스크|위험"),
+}
+
+HEADING_RE = re.compile(r"^(#{1,6})\s*(.+?)\s*#*\s*$")
+PHASE_RE = re.compile(r"phase\s*(\d+)", re.I)
+ITEM_RE = re.compile(r"^(\s*)(?:[-*\u2022]|\d+[.)])\s+(.*\S)")
+
+# 대표 채널 이름 → 본문 표기 패턴
+CHANNELS = {
+    "인스타그램": re.compile(r"인스타|instagram", re.I),
+    "틱톡": re.compile(r"틱톡|tiktok", re.I),
+    "유튜브": re.compile(r"유튜브|youtube|쇼츠", re.I),
+    "블로그": re.compile(r"블로그|blog", re.I),
+    "네이버 플레이스": re.compile(r"네이버|플레이스"),
+    "카카오맵": re.compile(r"카카오\s*맵|카카오\s*지도"),
+    "카카오톡 채널": re.compile(r"카카오\s*톡|카톡|카카오\s*채널|플러스\s*친구"),
+    "배달앱": re.compile(r"배달|배민|쿠팡\s*이츠|요기요"),
+    "당근마켓": re.compile(r"당근"),
+    "지역 커뮤니티": re.compile(r"커뮤니티|맘\s*카페|지역\s*카페"),
+    "제휴": re.compile(r"제휴|협업|콜라보"),
+    "오프라인 홍보": re.compile(r"전단|현수막|배너|입간판|오프라인"),
+    "멤버십/스탬프": re.compile(r"멤버십|스탬프|적립|쿠폰북"),
+}
+
+# persona_generator.phase_guideline 의 KPI 예시 + 자주 나오는 지표 → 본문에서 찾을 패턴
+KPI_TERMS = {
+    "신규 방문객": re.compile(r"신규\s*(방문|고객)"),
+    "재방문율": re.compile(r"재방문"),
+    "리뷰·평점": re.compile(r"리뷰|평점|별점"),
+    "SNS 반응": re.compile(r"SNS|인스타|팔로워|좋아요|도달"),
+    "매출 성장률": re.compile(r"매출"),
+}
+EXTRA_KPI_TERMS = {
+    "객단가": re.compile(r"객단가"),
+    "전환율": re.compile(r"전환율"),
+    "NPS": re.compile(r"NPS|추천\s*지수"),
+    "쿠폰 사용": re.compile(r"쿠폰"),
+}
+
+
+def match_terms(text, terms):
+    """text 에 나오는 대표 이름 목록 (terms 순서)."""
+    return [name for name, pattern in terms.items() if pattern.search(text)]
+
+
+def clean_inline(text):
+    """굵게/링크 표시 제거, 끝의 ':' 제거."""
+    text = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", text)
+    return re.sub(r"[*_`]+", "", text).strip().rstrip(":：").strip()
+
+
+# ─────────────────────────────
+# 구조
+# ─────────────────────────────
+@dataclass
+class Channel:
+    rank: int
+    name: str                                   # "네이버 플레이스 & 카카오맵"
+    channels: List[str]                         # CHANNELS 대표 이름 (없으면 [])
+    detail: str = ""
+
+
+@dataclass
+class Phase:
+    number: int
+    title: str
+    goal: str = ""
+    actions: List[str] = field(default_factory=list)
+    kpis: List[str] = field(default_factory=list)  # 다음 단계로 넘어가는 기준
+
+
+@dataclass
+class Kpi:
+    name: str
+    category: str = ""
+    method: str = ""
+    cycle: str = ""
+    terms: List[str] = field(default_factory=list)  # KPI_TERMS / EXTRA_KPI_TERMS 대표 이름
+
+
+@dataclass
+class Risk:
+    title: str
+    response: str = ""
+
+
+@dataclass
+class ParsedPlan:
+    summary: str = ""
+    summary_points: List[str] = field(default_factory=list)
+    channels: List[Channel] = field(default_factory=list)
+    strategies: List[str] = field(default_factory=list)
+    phases: List[Phase] = field(default_factory=list)
+    kpis: List[Kpi] = field(default_factory=list)
+    risks: List[Risk] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)   # 없는 필수 섹션
+
+    @property
+    def channel_names(self):
+        """순위 순서로 대표 채널 이름 (중복 제거)."""
+        out = []
+        for c in self.channels:
+            out += [n for n in c.channels if n not in out]
+        return out
+
+    @property
+    def kpi_terms(self):
+        out = []
+        for text in [k.name for k in self.kpis] + [k for p in self.phases for k in p.kpis]:
+            out += [t for t in match_terms(text, {**KPI_TERMS, **EXTRA_KPI_TERMS}) if t not in out]
+        return out
+
+
+def clean_heading(title):
+    """'**Phase 1: 런칭**' → 'Phase 1: 런칭' (굵게/기울임 표시 제거)."""
+    return re.sub(r"[*_`]+", "", title).strip()
+
+
+def split_sections(markdown_text):
+    """[(level, 제목, 본문)] — 첫 제목 앞의 인사말은 level 0, 제목 '' 로."""
+    sections, level, title, body = [], 0, "", []
+    in_code = False
+    for line in markdown_text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        m = None if in_code else HEADING_RE.match(line.strip())
+        if m:
+            if body or title:
+                sections.append((level, title, "\n".join(body).strip()))
+            level, title, body = len(m.group(1)), clean_heading(m.group(2)), []
+        else:
+            body.append(line)
+    if body or title:
+        sections.append((level, title, "\n".join(body).strip()))
+    return sections
+
+
+def find_section(markdown_text, name, sections=None):
+    """필수 섹션 이름(REQUIRED_SECTIONS 키)의 본문 + 하위 섹션 본문. 없으면 None."""
+    pattern = REQUIRED_SECTIONS[name]
+    sections = split_sections(markdown_text) if sections is None else sections
+    for i, (level, title, body) in enumerate(sections):
+        if level and pattern.search(title):
+            parts = [body]
+            for sub_level, sub_title, sub_body in sections[i + 1:]:
+                if sub_level <= level:
+                    break
+                parts.append(f"{'#' * sub_level} {sub_title}\n{sub_body}")
+            return "\n\n".join(p for p in parts if p)
+    return None
+
+
+def extract_executive_summary(markdown_text: str, max_points: int = 4):
+    """생성된 전략 본문에서 요약 섹션의 핵심 불릿을 추출."""
+    lines = markdown_text.splitlines()
+    summary_lines = []
+
+    def clean_bullet(line):
+        stripped = line.strip()
+        if not stripped:
+            return None
+        bullet_match = re.match(r"^[-\*\u2022]\s*(.+)", stripped)
+        if bullet_match:
+            return bullet_match.group(1).strip()
+        numbered_match = re.match(r"^\d+[.)]\s*(.+)", stripped)
+        if numbered_match:
+            return numbered_match.group(1).strip()
+        return None
+
+    heading_pattern = re.compile(r"#{1,6}\s*요약")
+    start_idx = next(
+        (idx for idx, line in enumerate(lines) if heading_pattern.match(line.strip())),
+        None,
+    )
+
+    if start_idx is not None:
+        for line in lines[start_idx + 1 :]:
+            stripped = line.strip()
+            if stripped.startswith("#"):
+                break
+            cleaned = clean_bullet(stripped)
+            if cleaned:
+                summary_lines.append(cleaned)
+            if len(summary_lines) >= max_points:
+                break
+
+    if not summary_lines:
+        for line in lines:
+            cleaned = clean_bullet(line)
+            if cleaned:
+                summary_lines.append(cleaned)
+            if len(summary_lines) >= max_points:
+                break
+
+    if not summary_lines:
+        collapsed = re.sub(r"\s+", " ", markdown_text)
+        sentences = re.split(r"(?<=[.!?])\s", collapsed)
+        for sentence in sentences:
+            cleaned = sentence.strip()
+            if cleaned:
+                summary_lines.append(cleaned)
+            if len(summary_lines) >= max_points:
+                break
+
+    return summary_lines
+
+
+# ─────────────────────────────
+# 구조화 파싱
+# ─────────────────────────────
+def top_items(body):
+    """가장 바깥 들여쓰기의 목록 항목 → [(항목 첫 줄, 하위 줄들)]. 목록이 아니면 빈 리스트."""
+    items, indent = [], None
+    for line in body.splitlines():
+        m = ITEM_RE.match(line)
+        depth = len(m.group(1).expandtabs(4)) if m else None
+        if m and (indent is None or depth <= indent):
+            indent = depth if indent is None else indent
+            items.append([m.group(2), []])
+        elif items and line.strip() and line.strip() != "---":
+            items[-1][1].append(line.strip())
+    return [(head, rest) for head, rest in items]
+
+
+def _item_text(line):
+    m = ITEM_RE.match(line)
+    return clean_inline(m.group(2) if m else line)
+
+
+def parse_channels(body):
+    channels = []
+    for rank, (head, rest) in enumerate(top_items(body), 1):
+        name, _, after = clean_inline(head).partition(":")
+        name = clean_inline(name)
+        detail = " ".join(filter(None, [after.strip()] + [_item_text(r) for r in rest]))
+        channels.append(Channel(rank, name, match_terms(name, CHANNELS) or match_terms(detail, CHANNELS)[:1], detail))
+    return channels
+
+
+def parse_phase(number, title, body):
+    """'①목표 / ②실행 전략 / ③다음 단계 기준(KPI)' 블록 → Phase."""
+    phase, mode = Phase(number, title), "actions"
+    for line in body.splitlines():
+        text = _item_text(line)
+        if not text or text == "---":
+            continue
+        if mode == "actions" and re.sub(r"[*_`\s]+", "", line).endswith(":") and len(text) < 20:
+            continue  # "온라인:" / "오프라인:" 같은 묶음 제목
+        key, _, value = text.partition(":")
+        if "목표" in key and not phase.goal and len(key) < 20:
+            phase.goal, mode = value.strip(), "goal"
+        elif re.search(r"기준|KPI", key) and len(key) < 40:
+            mode = "kpis"
+            if value.strip():
+                phase.kpis.append(value.strip())
+        elif re.search(r"실행|액션|action", key, re.I) and len(key) < 20:
+            mode = "actions"
+            if value.strip():
+                phase.actions.append(value.strip())
+        elif mode == "kpis":
+            phase.kpis.append(text)
+        elif ITEM_RE.match(line):
+            phase.actions.append(text)
+        elif mode == "goal":
+            phase.goal = f"{phase.goal} {text}".strip()
+    return phase
+
+
+def parse_kpi_table(body):
+    """Markdown 표 → [Kpi] (빈 '지표 유형' 칸은 위 행 값을 이어받음). 표가 없으면 목록 항목을 지표로."""
+    rows = [line.strip().strip("|").split("|") for line in body.splitlines() if line.strip().startswith("|")]
+    rows = [[clean_inline(c) for c in r] for r in rows if not all(re.fullmatch(r"\s*:?-+:?\s*", c) for c in r)]
+    kpis = []
+    if len(rows) >= 2:
+        header = rows[0]
+        col = lambda *keys: next((i for i, h in enumerate(header) if any(k in h for k in keys)), None)
+        i_cat, i_method, i_cycle = col("유형", "구분", "분류"), col("측정", "방법", "채널"), col("주기")
+        i_name = col("세부", "지표", "KPI")
+        i_name = i_name if i_name not in (None, i_cat) else next(
+            (i for i in range(len(header)) if i not in (i_cat, i_method, i_cycle)), 0)
+        category = ""
+        for r in rows[1:]:
+            get = lambda i: r[i] if i is not None and i < len(r) else ""
+            category = get(i_cat) or category
+            if get(i_name):
+                kpis.append(Kpi(get(i_name), category, get(i_method), get(i_cycle),
+                                match_terms(get(i_name), {**KPI_TERMS, **EXTRA_KPI_TERMS})))
+        return kpis
+    for head, rest in top_items(body):
+        name = clean_inline(head)
+        kpis.append(Kpi(name, terms=match_terms(name, {**KPI_TERMS, **EXTRA_KPI_TERMS})))
+    return kpis
+
+
+def parse_risks(body, subsections=()):
+    risks = []
+    for head, rest in top_items(body):
+        title = re.sub(r"^리스크\s*[:：]\s*", "", clean_inline(head))
+        lines = [_item_text(r) for r in rest]
+        start = next((i for i, t in enumerate(lines) if t.startswith("대응")), None)
+        response = " ".join(lines[start:] if start is not None else lines)
+        risks.append(Risk(title, re.sub(r"^대응\s*[:：]?\s*", "", response)))
+    for title, sub_body in subsections:  # "### 리스크 1: ..." 처럼 제목으로 나눈 경우
+        risks.append(Risk(re.sub(r"^리스크\s*\d*\s*[:：.]?\s*", "", title),
+                          " ".join(_item_text(l) for l in sub_body.splitlines() if l.strip())))
+    return risks
+
+
+def parse_plan(markdown_text):
+    """생성된 전략 Markdown → ParsedPlan. 필수 섹션이 없으면 해당 필드는 비고 missing 에 이름이 들어간다."""
+    sections = split_sections(markdown_text)
+    plan = ParsedPlan()
+
+    def own(name):
+        # 필수 섹션 제목의 위치, 수준, 바로 아래 본문 (하위 섹션 제외)
+        pattern = REQUIRED_SECTIONS[name]
+        return next(((i, level, body) for i, (level, title, body) in enumerate(sections)
+                     if level and pattern.search(title)), None)
+
+    def children(found):
+        i, level, _ = found
+        out = []
+        for sub_level, sub_title, sub_body in sections[i + 1:]:
+            if sub_level <= level:
+                break
+            out.append((sub_title, sub_body))
+        return out
+
+    for name in REQUIRED_SECTIONS:
+        found = own(name)
+        if found is None:
+            plan.missing.append(name)
+            continue
+        body = found[2]
+        if name == "요약":
+            plan.summary = body
+            plan.summary_points = extract_executive_summary(body)  # 요약 본문의 불릿, 없으면 문장
+        elif name == "채널 우선순위":
+            plan.channels = parse_channels(body)
+        elif name == "실행 전략":
+            plan.strategies = [clean_inline(head) for head, _ in top_items(body)] or [
+                clean_inline(p) for p in body.split("\n\n") if p.strip()]
+        elif name == "KPI":
+            plan.kpis = parse_kpi_table(find_section(markdown_text, "KPI", sections) or body)
+        elif name == "리스크":
+            plan.risks = parse_risks(body, children(found))
+
+    # Phase 는 "Phase별 Action Plan" 아래 하위 제목이 보통이지만 위치와 상관없이 제목으로 찾는다
+    seen = set()
+    for level, title, body in sections:
+        m = PHASE_RE.search(title)
+        if level and m and int(m.group(1)) not in seen and not REQUIRED_SECTIONS["Phase별 Action Plan"].search(title):
+            seen.add(int(m.group(1)))
+            plan.phases.append(parse_phase(int(m.group(1)), title, body))
+    return plan
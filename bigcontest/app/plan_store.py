@@ -0,0 +1,412 @@
+"""
+생성된 전략 저장소 (parse_plan 결과를 SQLite 표 + FTS5 전문 검색으로)
+
+Markdown 파일/세션을 다시 읽어 파싱하지 않고도 수천 개 전략을 검색·집계하도록
+- plans: 전략 하나당 한 행 (페르소나 다섯 항목, 모델, 개수 요약, 파싱 결과 JSON, 원문)
+- plan_channels / plan_kpis: 전략 하나에 대표 채널/KPI 당 한 행 (채널은 가장 높은 순위, KPI 는 처음 기준으로 쓴 Phase)
+  → GROUP BY 가 COUNT 만으로 끝남
+- plan_fts: 요약/채널/실행 전략/Phase/KPI/리스크 전문 검색 (FTS5, bm25 순위)
+  한국어는 2글자 단어(리뷰, 매출, 쿠폰)가 많아 trigram 대신 한글을 글자 bigram 으로 쪼개 색인하고,
+  검색어도 같은 방식으로 쪼개 구(phrase) 로 찾는다 ("인스타그램" → "인스 스타 타그 그램")
+- 같은 본문(sha1)은 한 번만 저장
+
+  store = PlanStore()
+  store.add(markdown, persona="한식|개인점포|신규|20대 이하 고객 중심|거주 고객 중심", model="gemini-2.5-flash")
+  store.search("인스타그램 리뷰", industry="한식")        # [{"id", "persona", "rank", "snippet"}]
+  store.channel_stats(store_age="신규")                   # [{"channel", "plans", "share", "avg_rank", "top1"}]
+
+사용:
+  python plan_store.py --add ../output/*.md --library plan_library.zip --cache .cache/gemini_responses.sqlite
+  python plan_store.py --search "배달 리뷰" --industry 한식
+  python plan_store.py --channels --kpis
+  python plan_store.py --bench 3000             # 가짜 전략 N개로 색인/검색/집계 시간 vs 파일 다시 읽기
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+from plan_parser import EXTRA_KPI_TERMS, KPI_TERMS, match_terms, parse_plan
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "PLAN_STORE_PATH", str(Path(__file__).resolve().parent / ".cache" / "plan_store.sqlite")
+)
+# 페르소나 다섯 항목 (persona_key 순서) → 컬럼 이름
+PERSONA_COLUMNS = ["industry", "franchise", "store_age", "age_group", "behavior"]
+FTS_COLUMNS = ["summary", "channels", "strategies", "phases", "kpis", "risks"]
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS plans (
+    id          INTEGER PRIMARY KEY,
+    digest      TEXT UNIQUE NOT NULL,
+    persona     TEXT,
+    {", ".join(f"{c} TEXT" for c in PERSONA_COLUMNS)},
+    model       TEXT,
+    source      TEXT,
+    created_at  REAL NOT NULL,
+    n_channels  INTEGER,
+    n_phases    INTEGER,
+    n_kpis      INTEGER,
+    n_risks     INTEGER,
+    missing     TEXT,
+    parsed      TEXT NOT NULL,
+    markdown    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plan_channels (
+    plan_id  INTEGER NOT NULL,
+    rank     INTEGER NOT NULL,
+    channel  TEXT NOT NULL,
+    name     TEXT
+);
+CREATE TABLE IF NOT EXISTS plan_kpis (
+    plan_id  INTEGER NOT NULL,
+    kpi      TEXT NOT NULL,
+    name     TEXT,
+    phase    INTEGER
+);
+CREATE INDEX IF NOT EXISTS plans_persona ON plans (industry, franchise, store_age, age_group, behavior);
+CREATE INDEX IF NOT EXISTS plan_channels_channel ON plan_channels (channel, rank);
+CREATE INDEX IF NOT EXISTS plan_kpis_kpi ON plan_kpis (kpi, phase);
+CREATE VIRTUAL TABLE IF NOT EXISTS plan_fts USING fts5({", ".join(FTS_COLUMNS)}, tokenize = 'unicode61');
+"""
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[A-Za-z0-9]+")
+
+
+# ─────────────────────────────
+# 한국어 색인 (글자 bigram)
+# ─────────────────────────────
+def analyze(text):
+    """'인스타그램 리뷰 KPI' → '인스 스타 타그 그램 리뷰 kpi' (한 글자 한글 단어는 그대로)."""
+    out = []
+    for tok in _TOKEN_RE.findall(text or ""):
+        if "가" <= tok[0] <= "힣" and len(tok) > 1:
+            out += map(str.__add__, tok, tok[1:])
+        else:
+            out.append(tok.lower())
+    return " ".join(out)
+
+
+def fts_query(query, column=None):
+    """검색어 → FTS5 MATCH 식. 단어마다 bigram 구(phrase), 단어끼리는 AND. 한 글자 한글은 접두 검색."""
+    terms = []
+    for word in query.split():
+        grams = analyze(word).split()
+        if not grams:
+            continue
+        if len(grams) == 1 and len(grams[0]) == 1 and "가" <= grams[0] <= "힣":
+            terms.append(f"{grams[0]}*")
+        else:
+            terms.append('"' + " ".join(grams) + '"')
+    if not terms:
+        return None
+    expr = " AND ".join(terms)
+    return f"{column} : ({expr})" if column else expr
+
+
+def _snippet(text, query, width=40):
+    """원문에서 첫 검색어 주변 (Markdown 표시 제거)."""
+    flat = re.sub(r"[*_`#|>]+", "", re.sub(r"\s+", " ", text))
+    for word in query.split():
+        at = flat.find(word)
+        if at >= 0:
+            lo, hi = max(0, at - width), at + len(word) + width
+            return ("…" if lo else "") + flat[lo:hi].strip() + ("…" if hi < len(flat) else "")
+    return flat[:2 * width] + "…"
+
+
+def _fts_row(plan):
+    return [
+        analyze(plan.summary),
+        analyze(" ".join(f"{c.name} {' '.join(c.channels)} {c.detail}" for c in plan.channels)),
+        analyze(" ".join(plan.strategies)),
+        analyze(" ".join(f"{p.title} {p.goal} {' '.join(p.actions)} {' '.join(p.kpis)}" for p in plan.phases)),
+        analyze(" ".join(f"{k.category} {k.name} {k.method}" for k in plan.kpis)),
+        analyze(" ".join(f"{r.title} {r.response}" for r in plan.risks)),
+    ]
+
+
+def split_persona(persona):
+    """persona key 'a|b|c|d|e' 또는 dict → 다섯 항목 리스트 (모르면 None)."""
+    if isinstance(persona, dict):
+        from plan_library import PERSONA_KEYS
+        return [persona.get(k) for k in PERSONA_KEYS]
+    parts = persona.split("|") if persona else []
+    return parts if len(parts) == len(PERSONA_COLUMNS) else [None] * len(PERSONA_COLUMNS)
+
+
+# ─────────────────────────────
+# 저장소
+# ─────────────────────────────
+class PlanStore:
+    """ResponseCache 처럼 WAL 모드 SQLite, 스레드 간 공유 (내부 lock)."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, markdown, persona=None, model=None, source=None):
+        """전략 하나 저장 → plan id (같은 본문이 이미 있으면 그 id)."""
+        return self.add_many([(markdown, persona, model, source)])[0]
+
+    def add_many(self, items):
+        """[(markdown, persona, model, source)] 를 한 트랜잭션으로. 파싱은 lock 밖에서."""
+        rows = []
+        for markdown, persona, model, source in items:
+            digest = hashlib.sha1(markdown.encode("utf-8")).hexdigest()
+            rows.append((digest, markdown, persona, model, source, parse_plan(markdown)))
+        ids = []
+        with self._lock, self._conn:
+            for digest, markdown, persona, model, source, plan in rows:
+                found = self._conn.execute("SELECT id FROM plans WHERE digest = ?", (digest,)).fetchone()
+                if found:
+                    ids.append(found[0])
+                    continue
+                key = persona if isinstance(persona, str) else "|".join(p or "" for p in split_persona(persona))
+                cur = self._conn.execute(
+                    f"INSERT INTO plans (digest, persona, {', '.join(PERSONA_COLUMNS)}, model, source, created_at, "
+                    "n_channels, n_phases, n_kpis, n_risks, missing, parsed, markdown) "
+                    f"VALUES ({', '.join('?' * (12 + len(PERSONA_COLUMNS)))})",
+                    (digest, key, *split_persona(persona), model, source, time.time(),
+                     len(plan.channels), len(plan.phases), len(plan.kpis), len(plan.risks),
+                     ",".join(plan.missing), json.dumps(plan, default=vars, ensure_ascii=False), markdown),
+                )
+                plan_id = cur.lastrowid
+                self._conn.executemany("INSERT INTO plan_channels VALUES (?, ?, ?, ?)",
+                                       [(plan_id, *row) for row in _channel_rows(plan)])
+                self._conn.executemany("INSERT INTO plan_kpis VALUES (?, ?, ?, ?)",
+                                       [(plan_id, *row) for row in _kpi_rows(plan)])
+                self._conn.execute(f"INSERT INTO plan_fts (rowid, {', '.join(FTS_COLUMNS)}) "
+                                   f"VALUES (?, {', '.join('?' * len(FTS_COLUMNS))})", (plan_id, *_fts_row(plan)))
+                ids.append(plan_id)
+        return ids
+
+    # ── 조회
+    @staticmethod
+    def _filters(alias="p", **filters):
+        unknown = set(filters) - set(PERSONA_COLUMNS) - {"model"}
+        if unknown:
+            raise ValueError(f"알 수 없는 필터: {sorted(unknown)} (가능: {PERSONA_COLUMNS + ['model']})")
+        items = [(k, v) for k, v in filters.items() if v]
+        return "".join(f" AND {alias}.{k} = ?" for k, _ in items), [v for _, v in items]
+
+    def search(self, query, limit=20, column=None, **filters):
+        """전문 검색 (bm25 순). column 은 FTS_COLUMNS 중 하나로 범위 제한."""
+        if column is not None and column not in FTS_COLUMNS:
+            raise ValueError(f"column 은 {FTS_COLUMNS} 중 하나")
+        match = fts_query(query, column)
+        if match is None:
+            return []
+        where, params = self._filters(**filters)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.id, p.persona, bm25(plan_fts) AS rank, p.markdown FROM plan_fts "
+                f"JOIN plans p ON p.id = plan_fts.rowid WHERE plan_fts MATCH ?{where} ORDER BY rank LIMIT ?",
+                [match, *params, limit],
+            ).fetchall()
+        return [{"id": i, "persona": persona, "rank": round(rank, 3), "snippet": _snippet(md, query)}
+                for i, persona, rank, md in rows]
+
+    def channel_stats(self, **filters):
+        """대표 채널별: 언급한 전략 수, 비율, 평균 순위, 1순위로 꼽은 전략 수."""
+        where, params = self._filters(**filters)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM plans p WHERE 1=1{where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT c.channel, COUNT(*), AVG(c.rank), SUM(c.rank = 1) "
+                f"FROM plan_channels c JOIN plans p ON p.id = c.plan_id WHERE 1=1{where} "
+                "GROUP BY c.channel ORDER BY 2 DESC, 3", params,
+            ).fetchall()
+        return [{"channel": ch, "plans": n, "share": round(n / total, 3) if total else 0.0,
+                 "avg_rank": round(avg, 2), "top1": top1} for ch, n, avg, top1 in rows]
+
+    def kpi_stats(self, **filters):
+        """대표 KPI별: 언급한 전략 수, 비율, Phase 기준(다음 단계 조건) 으로 쓴 전략 수."""
+        where, params = self._filters(**filters)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM plans p WHERE 1=1{where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT k.kpi, COUNT(*), COUNT(k.phase) "
+                f"FROM plan_kpis k JOIN plans p ON p.id = k.plan_id WHERE 1=1{where} "
+                "GROUP BY k.kpi ORDER BY 2 DESC, 3 DESC", params,
+            ).fetchall()
+        return [{"kpi": kpi, "plans": n, "share": round(n / total, 3) if total else 0.0, "phase_gate": gate}
+                for kpi, n, gate in rows]
+
+    def get(self, plan_id):
+        """{"id", "persona", "model", "parsed" (dict), "markdown"} 또는 None."""
+        with self._lock:
+            row = self._conn.execute("SELECT id, persona, model, parsed, markdown FROM plans WHERE id = ?",
+                                     (plan_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "persona": row[1], "model": row[2], "parsed": json.loads(row[3]), "markdown": row[4]}
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _channel_rows(plan):
+    """[(rank, channel, name)] 대표 채널마다 가장 높은 순위 한 행."""
+    rows = {}
+    for c in plan.channels:
+        for ch in c.channels:
+            rows.setdefault(ch, (c.rank, ch, c.name))
+    return list(rows.values())
+
+
+def _kpi_rows(plan):
+    """[(kpi, name, phase)] 대표 KPI마다 한 행. name 은 KPI 표의 지표명, phase 는 처음 기준으로 쓴 Phase."""
+    terms = {**KPI_TERMS, **EXTRA_KPI_TERMS}
+    rows = {}
+    for k in plan.kpis:
+        for t in k.terms:
+            rows.setdefault(t, [k.name, None])
+    for p in plan.phases:
+        for text in p.kpis:
+            for t in match_terms(text, terms):
+                row = rows.setdefault(t, [text, None])
+                if row[1] is None:
+                    row[1] = p.number
+    return [(t, name, phase) for t, (name, phase) in rows.items()]
+
+
+# ─────────────────────────────
+# CLI: 가져오기 / 검색 / 집계 / 벤치마크
+# ─────────────────────────────
+_PROMPT_FIELDS = ["업종", "형태", "점포 연령", "고객 연령대", "고객 행동 특성"]
+
+
+def persona_from_prompt(prompt):
+    """build_prompt 형식 ('- 업종: 한식' ...) 에서 persona key (없으면 None)."""
+    values = [re.search(rf"^- {f}: (.+)$", prompt, re.M) for f in _PROMPT_FIELDS]
+    return "|".join(m.group(1).strip() for m in values) if all(values) else None
+
+
+def iter_library(path):
+    from plan_library import PlanLibrary
+    lib = PlanLibrary(path)
+    for key in lib._index:
+        yield lib.get(key), key, lib.meta.get("model"), f"library:{Path(path).name}"
+
+
+def iter_cache(path):
+    """응답 캐시에서 완성된 응답만 (ResponseCache 조회와 같은 기준: 잘림/차단/finish_reason 없음 제외)."""
+    from response_cache import COMPLETE_SQL
+    conn = sqlite3.connect(path)
+    try:
+        for prompt, response, model in conn.execute(
+                f"SELECT prompt, response, model FROM responses WHERE {COMPLETE_SQL}"):
+            yield response, persona_from_prompt(prompt), model, "response_cache"
+    finally:
+        conn.close()
+
+
+def _bench(n, tokens=1500):
+    """가짜 전략 n 개 (fake_llm_server.fake_text, 페르소나 프롬프트별) 로 파일 다시 읽기 vs 저장소 조회."""
+    from fake_llm_server import fake_text
+    from persona_generator import generate_personas
+
+    personas = generate_personas(limit=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        items = []
+        for i in range(n):
+            p = personas[i % len(personas)]
+            persona = "|".join(p[k] for k in ["업종", "프랜차이즈여부", "점포연령", "고객연령대", "고객행동"])
+            items.append((fake_text(f"{p['prompt']}#{i}", tokens), persona, "fake", "bench"))
+        files = []
+        for i, (md, *_rest) in enumerate(items):
+            files.append(Path(tmp) / f"plan_{i}.md")
+            files[-1].write_text(md, encoding="utf-8")
+
+        t0 = time.perf_counter()
+        counts = {}
+        for f in files:  # 지금 방식: 파일을 다시 읽어서 파싱 후 집계
+            for ch in parse_plan(f.read_text(encoding="utf-8")).channel_names:
+                counts[ch] = counts.get(ch, 0) + 1
+        reread = time.perf_counter() - t0
+
+        store = PlanStore(Path(tmp) / "plans.sqlite")
+        t0 = time.perf_counter()
+        store.add_many(items)
+        build = time.perf_counter() - t0
+
+        def timed(fn, repeat=20):
+            t = time.perf_counter()
+            for _ in range(repeat):
+                out = fn()
+            return (time.perf_counter() - t) / repeat * 1e3, out
+
+        ms_ch, stats = timed(lambda: store.channel_stats())
+        assert {s["channel"]: s["plans"] for s in stats} == counts, "aggregate mismatch"
+        ms_ch_f, _ = timed(lambda: store.channel_stats(industry="한식", store_age="신규"))
+        ms_kpi, _ = timed(lambda: store.kpi_stats())
+        ms_s1, hits = timed(lambda: store.search("인스타그램 리뷰", limit=20))
+        ms_s2, _ = timed(lambda: store.search("배달앱", column="channels", industry="한식"))
+        print(f"[BENCH] plans={n:,} tokens/plan={tokens}")
+        print(f"[BENCH] re-read + parse + count channels: {reread * 1e3:,.0f} ms")
+        print(f"[BENCH] index build: {build * 1e3:,.0f} ms ({build / n * 1e3:.2f} ms/plan)")
+        print(f"[BENCH] channel_stats: {ms_ch:.1f} ms (filtered {ms_ch_f:.1f} ms), kpi_stats: {ms_kpi:.1f} ms")
+        print(f"[BENCH] search '인스타그램 리뷰': {ms_s1:.1f} ms ({len(hits)} hits), "
+              f"channels:'배달앱' + 한식: {ms_s2:.1f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="생성된 전략 저장소 (가져오기/검색/집계)")
+    ap.add_argument("--db", default=DEFAULT_STORE_PATH)
+    ap.add_argument("--add", nargs="*", default=[], help="Markdown 파일들")
+    ap.add_argument("--persona", default=None, help="--add 파일들의 persona key")
+    ap.add_argument("--library", default=None, help="plan_library.zip")
+    ap.add_argument("--cache", default=None, help="gemini_responses.sqlite (잘리거나 차단된 응답 제외)")
+    ap.add_argument("--search", default=None)
+    ap.add_argument("--column", default=None, choices=FTS_COLUMNS)
+    ap.add_argument("--channels", action="store_true", help="채널별 집계")
+    ap.add_argument("--kpis", action="store_true", help="KPI별 집계")
+    for c in PERSONA_COLUMNS + ["model"]:
+        ap.add_argument(f"--{c}", default=None, help="필터")
+    ap.add_argument("--limit", type=int, default=10)
+    ap.add_argument("--bench", type=int, default=0, help="가짜 전략 N개로 벤치마크 (임시 파일)")
+    args = ap.parse_args()
+
+    if args.bench:
+        _bench(args.bench)
+        raise SystemExit
+
+    store = PlanStore(args.db)
+    filters = {c: getattr(args, c) for c in PERSONA_COLUMNS + ["model"]}
+    sources = [(Path(f).read_text(encoding="utf-8"), args.persona, None, Path(f).name) for f in args.add]
+    if args.library:
+        sources += list(iter_library(args.library))
+    if args.cache:
+        sources += list(iter_cache(args.cache))
+    if sources:
+        t0 = time.perf_counter()
+        ids = store.add_many(sources)
+        print(f"[ADD] {len(ids):,} plans ({len(set(ids)):,} distinct), store={len(store):,} "
+              f"({time.perf_counter() - t0:.1f}s)")
+    if args.search:
+        for hit in store.search(args.search, limit=args.limit, column=args.column, **filters):
+            print(f"[HIT] #{hit['id']} {hit['rank']:.2f} {hit['persona']}\n      {hit['snippet']}")
+    if args.channels:
+        for row in store.channel_stats(**filters):
+            print(f"[CHANNEL] {json.dumps(row, ensure_ascii=False)}")
+    if args.kpis:
+        for row in store.kpi_stats(**filters):
+            print(f"[KPI] {json.dumps(row, ensure_ascii=False)}")
@@ -0,0 +1,154 @@
+"""
+전략 여러 안 동시 생성 + 로컬 채점 (비교 모드)
+
+- build_variants: 고객행동이 여럿이면 행동별 페르소나 프롬프트, 남는 자리는 채널 초점(SNS / 배달앱 / 지역)별 변형
+- JobManager.submit_group 으로 한꺼번에 제출 (그룹 동시 실행 상한) → 전체 시간 ≈ 가장 느린 안
+- score_plan: API 없이 본문만 보고 점수 (필수 섹션, Phase 3~5개와 Phase별 KPI 기준, KPI 지표 포괄도, 수치 목표, 요약)
+  필수 섹션이 하나라도 빠지면 MISSING_SECTION_CAP 이하로 깎여서 완성된 안보다 항상 아래
+- rank_plans: 점수 높은 순
+
+사용:
+  python plan_variants.py --check                          # 예시 전략(output/*.md)과 훼손본 채점 + 변형 목록
+  python plan_variants.py --score ../output/marketing_plan_양식_세계요리_신규.md
+"""
+import re
+import json
+import argparse
+from pathlib import Path
+
+from persona_generator import ensure_data_evidence
+from persona_index import PERSONA_FIELDS, PersonaIndex, split_behaviors
+from plan_library import persona_key
+from plan_parser import KPI_TERMS, PHASE_RE, REQUIRED_SECTIONS, extract_executive_summary, find_section, split_sections
+
+# 채널 초점 → 프롬프트에 덧붙일 설명
+CHANNEL_FOCUS = {
+    "SNS 중심": "인스타그램·틱톡 등 SNS 콘텐츠와 인플루언서/체험단 협업",
+    "배달·플랫폼 중심": "배달앱(배달의민족·쿠팡이츠)과 네이버 플레이스·지도 앱의 노출과 리뷰",
+    "지역·오프라인 중심": "지역 커뮤니티(당근마켓·맘카페), 인근 제휴, 매장 내 경험과 스탬프/멤버십",
+}
+
+TARGET_RE = re.compile(r"\d+(?:[.,]\d+)?\s*(?:%|명|회|건|개|점|원|배)")
+
+# 항목별 배점 (합 100)
+WEIGHTS = {"sections": 40, "phases": 15, "phase_kpi": 15, "kpi_terms": 20, "targets": 5, "summary": 5}
+# 필수 섹션이 빠진 안의 상한 (남은 섹션 비율만큼 더 깎음) — 나머지 항목이 좋아도 완성된 안을 못 이긴다
+MISSING_SECTION_CAP = 50
+
+
+def with_focus(prompt, focus):
+    return (prompt.rstrip() + f"\n\n채널 초점: {focus} — {CHANNEL_FOCUS[focus]}을(를) 우선 채널로 삼아 "
+            "채널 우선순위와 Phase별 실행 전략을 구성하세요. 다른 채널은 보조로만 다루세요.")
+
+
+def build_variants(index, info, max_variants=4):
+    """상담 정보 → [{"label", "prompt", "persona"}] (최대 max_variants 개, 업종을 모르면 빈 리스트)."""
+    base = [info.get(f, "미상") for f in PERSONA_FIELDS[:4]]
+    variants = []
+    behaviors = split_behaviors(info.get("고객행동"))
+    if len(behaviors) > 1:
+        for behavior in behaviors:
+            persona = index.find(*base, behavior)
+            if persona:
+                variants.append({"label": behavior, "prompt": ensure_data_evidence(persona["prompt"]),
+                                 "persona": persona_key(*(persona[f] for f in PERSONA_FIELDS))})
+    persona = index.find(*base, info.get("고객행동", "미상"))
+    if persona:
+        prompt = ensure_data_evidence(persona["prompt"])
+        for focus in CHANNEL_FOCUS:
+            if len(variants) >= max_variants:
+                break
+            variants.append({"label": focus, "prompt": with_focus(prompt, focus),
+                             "persona": persona_key(*(persona[f] for f in PERSONA_FIELDS))})
+    return variants[:max_variants]
+
+
+# ─────────────────────────────
+# 채점 (로컬, API 없음)
+# ─────────────────────────────
+def score_plan(markdown_text):
+    """{"score": 0~100, 항목별 0~1 비율, "missing": 빠진 필수 섹션, "phases": Phase 수}."""
+    sections = split_sections(markdown_text)
+    found = {name: find_section(markdown_text, name, sections) for name in REQUIRED_SECTIONS}
+    missing = [name for name, body in found.items() if body is None]
+
+    phases = {}
+    for level, title, body in sections:
+        m = PHASE_RE.search(title)
+        if level and m:
+            phases.setdefault(m.group(1), body)
+    n = len(phases)
+    phase_kpi = sum(bool(re.search(r"KPI|기준|목표", body)) for body in phases.values())
+
+    kpi_text = "\n".join(filter(None, [found["KPI"], found["Phase별 Action Plan"]]))
+    terms = sum(bool(p.search(kpi_text)) for p in KPI_TERMS.values())
+    targets = len(TARGET_RE.findall(kpi_text))
+    summary = found["요약"] is not None and len(extract_executive_summary(markdown_text)) >= 2
+
+    parts = {
+        "sections": 1 - len(missing) / len(REQUIRED_SECTIONS),
+        "phases": 1.0 if 3 <= n <= 5 else min(n, 3) / 3 * (0.8 if n > 5 else 1.0),
+        "phase_kpi": phase_kpi / n if n else 0.0,
+        "kpi_terms": terms / len(KPI_TERMS),
+        "targets": min(targets, 10) / 10,
+        "summary": float(summary),
+    }
+    score = sum(WEIGHTS[k] * v for k, v in parts.items())
+    if missing:
+        score = min(score, MISSING_SECTION_CAP) * parts["sections"]
+    return {"score": round(score, 1), **{k: round(v, 2) for k, v in parts.items()}, "phases": n,
+            "missing": missing}
+
+
+def rank_plans(plans):
+    """plans: [(label, markdown)] → [(label, score dict)] 점수 높은 순 (같으면 입력 순서)."""
+    scored = [(label, score_plan(text)) for label, text in plans]
+    return sorted(scored, key=lambda x: -x[1]["score"])
+
+
+def _check(plan_path, personas_path):
+    text = Path(plan_path).read_text(encoding="utf-8")
+    # 훼손본: KPI 섹션 삭제 / Phase 2개만 / 요약만
+    kpi_at = text.index("## KPI")
+    risk_at = text.index("## 리스크")
+    phase3_at = text.index("### **Phase 3")
+    plans = [
+        ("원본", text),
+        ("리스크 섹션 없음", text[:risk_at]),
+        ("KPI 섹션 없음", text[:kpi_at] + text[risk_at:]),
+        ("Phase 2개에서 잘림", text[:phase3_at]),
+        ("요약만", text[:text.index("## 채널")]),
+    ]
+    ranked = rank_plans(plans)
+    for label, s in ranked:
+        print(f"[RANK] {s['score']:5.1f}  {label}  {json.dumps(s, ensure_ascii=False)}")
+    assert [label for label, _ in ranked] == [label for label, _ in plans], "ranking order"
+    scores = dict((label, s["score"]) for label, s in ranked)
+    assert all(scores[label] <= MISSING_SECTION_CAP for label, _ in plans[1:]), "missing section must cap the score"
+    assert scores["원본"] - scores["KPI 섹션 없음"] >= 50, "missing KPI section barely penalized"
+
+    with open(personas_path, "r", encoding="utf-8") as f:
+        index = PersonaIndex(json.load(f))
+    info = {"업종": "양식/세계요리", "프랜차이즈여부": "개인점포", "점포연령": "신규",
+            "고객연령대": "20대 이하 고객 중심", "고객행동": "재방문 고객 + 직장인 고객"}
+    for v in build_variants(index, info):
+        print(f"[VARIANT] {v['label']}: {v['persona']} ({len(v['prompt'])} chars)")
+    single = build_variants(index, {**info, "고객행동": "유동 고객"})
+    assert [v["label"] for v in single] == list(CHANNEL_FOCUS)
+    assert build_variants(index, {**info, "업종": "기타"}) == []
+    print("[CHECK] variants OK")
+
+
+if __name__ == "__main__":
+    here = Path(__file__).resolve().parent
+    ap = argparse.ArgumentParser(description="전략 변형/채점 점검")
+    ap.add_argument("--check", action="store_true")
+    ap.add_argument("--score", nargs="*", default=[], help="채점할 Markdown 파일")
+    ap.add_argument("--plan", default=str(here.parent / "output" / "marketing_plan_양식_세계요리_신규.md"))
+    ap.add_argument("--personas", default=str(here / "personas.json"))
+    args = ap.parse_args()
+
+    for path in args.score:
+        print(json.dumps({"file": path, **score_plan(Path(path).read_text(encoding="utf-8"))}, ensure_ascii=False))
+    if args.check:
+        _check(args.plan, args.personas)
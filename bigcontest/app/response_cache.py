@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+# ai_caller.py 배치와 streamlit_app.py 가 같은 파일을 쓰도록 app/ 기준 경로를 기본값으로 둔다
+DEFAULT_CACHE_PATH = os.environ.get(
+    "GEMINI_CACHE_PATH", str(Path(__file__).resolve().parent / ".cache" / "gemini_responses.sqlite")
+)
+
+# 잘렸거나 차단된 응답은 완성된 답처럼 재사용하면 안 된다 (저장하지 않고, 예전에 저장된 것도 조회하지 않음)
+UNCACHED_FINISH = ("MAX_TOKENS", "SAFETY")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key           TEXT PRIMARY KEY,
+    model         TEXT NOT NULL,
+    temperature   REAL NOT NULL,
+    max_tokens    INTEGER NOT NULL,
+    prompt        TEXT NOT NULL,
+    response      TEXT NOT NULL,
+    finish_reason TEXT,
+    created_at    REAL NOT NULL
+)
+"""
+
+
+COMPLETE_SQL = f"finish_reason IS NOT NULL AND finish_reason NOT IN ({', '.join(repr(f) for f in UNCACHED_FINISH)})"
+
+
+def cache_key(prompt, model_name, temperature, max_tokens):
+    """(prompt, model, temperature, max_tokens) 가 같으면 같은 키."""
+    payload = json.dumps([prompt, model_name, float(temperature), int(max_tokens)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Gemini 응답 SQLite 캐시. WAL 모드라 배치 프로세스와 Streamlit 이 동시에 열어도 된다.
+
+    put 은 건마다 커밋하므로 배치가 중간에 죽어도 그때까지 받은 응답은 남는다.
+    조회는 finish_reason 이 기록된 완성 응답만 (NULL 은 완료 여부를 모르는 예전 배치 행).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT response FROM responses WHERE key = ? AND {COMPLETE_SQL}", (key,)).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, prompt, model_name, temperature, max_tokens):
+        return self.get(cache_key(prompt, model_name, temperature, max_tokens))
+
+    def put(self, prompt, model_name, temperature, max_tokens, response, finish_reason=None):
+        key = cache_key(prompt, model_name, temperature, max_tokens)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, float(temperature), int(max_tokens), prompt, response, finish_reason, time.time()),
+            )
+            self._conn.commit()
+        return key
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,405 @@
+"""
+프롬프트 유사도 기반 응답 캐시 (semantic cache, 로컬 SQLite)
+
+ResponseCache 는 프롬프트가 한 글자만 달라도 (고객행동 순서 "A + B" / "B + A", 공백 등) 놓친다.
+비슷한 상점 설명이면 이미 생성한 전략을 다시 쓰도록
+- 프롬프트 → 단어 안 문자 2~4-gram 을 crc32 로 해싱한 TF-IDF 벡터 (외부 모델 없음)
+  IDF 는 앱이 실제로 보내는 템플릿 (페르소나 프롬프트 + fallback 프롬프트, semantic_corpus) 으로 학습하고,
+  학습 때 못 본 n-gram 은 중간값 IDF (템플릿 밖 문구가 벡터를 좌우하지 않게)
+  단어 경계를 넘는 n-gram 은 만들지 않아 단어/줄 순서가 바뀌어도 같은 벡터
+- 상점 항목 ('- 업종: 한식' 같은 줄) 이 같은 프롬프트끼리만 비교 (store_scope). 고객행동 순서/공백만 달라도 같은 범위,
+  항목 값이 하나라도 다르면 템플릿이 아무리 비슷해도 다른 상점의 전략을 주지 않는다
+- 랜덤 초평면 LSH (밴드 × 비트 서명) 로 후보를 SQLite 에서 찾고, 정확한 코사인으로 재정렬
+- 유사도가 threshold 이상이면 히트. (model, temperature, max_tokens, 상점 항목) 이 같은 항목만 비교
+- TTL 이 지난 항목은 버리고, max_entries 를 넘으면 가장 오래 안 쓰인 항목부터 지운다 (LRU)
+- lookups / hits / hit_rate / 평균 유사도 통계 (stats)
+
+  cache = SemanticCache(corpus=semantic_corpus(personas))
+  hit = cache.lookup(prompt, "gemini-2.5-flash", 0.6, 65535)   # None 또는 (response, similarity, 원래 prompt)
+  cache.put(prompt, "gemini-2.5-flash", 0.6, 65535, response)
+
+사용:
+  python semantic_cache.py --check           # personas.json 으로 임계값/지연 자가 점검 (임시 파일)
+"""
+import os
+import re
+import json
+import math
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_PATH = os.environ.get(
+    "SEMANTIC_CACHE_PATH", str(Path(__file__).resolve().parent / ".cache" / "semantic_cache.sqlite")
+)
+# 한 항목만 다른 페르소나 쌍의 최대 유사도가 ~0.96 (--check), 순서/공백만 다르면 1.0
+# (상점 항목이 다른 프롬프트는 store_scope 로 아예 비교하지 않으므로 이 값은 템플릿 문구 차이에 대한 기준)
+DEFAULT_THRESHOLD = 0.97
+
+N_FEATURES = 1 << 20
+BANDS, BITS = 16, 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id          INTEGER PRIMARY KEY,
+    scope       TEXT NOT NULL,
+    prompt      TEXT NOT NULL,
+    response    TEXT NOT NULL,
+    idx         BLOB NOT NULL,
+    val         BLOB NOT NULL,
+    created_at  REAL NOT NULL,
+    last_used   REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS lsh (
+    band      INTEGER NOT NULL,
+    bucket    INTEGER NOT NULL,
+    entry_id  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lsh_bucket ON lsh (band, bucket);
+CREATE INDEX IF NOT EXISTS lsh_entry ON lsh (entry_id);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
+"""
+
+
+# ─────────────────────────────
+# 벡터화 (해싱 TF-IDF)
+# ─────────────────────────────
+def _grams(text, ngram=(2, 4)):
+    """단어마다 ' 단어 ' 안의 n-gram 해시 → 개수 (단어 경계를 넘지 않음)."""
+    counts = {}
+    for word in text.split():
+        w = f" {word} "
+        for n in range(ngram[0], ngram[1] + 1):
+            for i in range(max(1, len(w) - n + 1)):
+                h = zlib.crc32(w[i:i + n].encode("utf-8")) % N_FEATURES
+                counts[h] = counts.get(h, 0) + 1
+    return counts
+
+
+class HashingVectorizer:
+    """sublinear TF × IDF, L2 정규화한 희소 벡터 (정렬된 인덱스 int64, 값 float32)."""
+
+    def __init__(self, idf=None):
+        self.idf = idf or {}
+        self.n_docs = int(self.idf.pop("__n_docs__", 0)) if idf else 0
+        # 학습 문서에 없던 n-gram 은 중간값 IDF. 최대값 (한 문서에만 있던 것) 을 주면 템플릿 밖 문구가
+        # 벡터를 좌우해서 항목이 전부 다른 프롬프트끼리도 유사도가 0.99 가 된다
+        self.default_idf = float(np.median(list(self.idf.values()))) if self.idf else 1.0
+
+    @classmethod
+    def fit(cls, docs):
+        df = {}
+        for d in docs:
+            for h in _grams(d):
+                df[h] = df.get(h, 0) + 1
+        n = len(docs)
+        return cls({**{h: math.log((1 + n) / (1 + c)) for h, c in df.items()}, "__n_docs__": n})
+
+    @classmethod
+    def fit_templates(cls, corpus):
+        """{템플릿 이름: 프롬프트 목록} → 템플릿마다 따로 IDF 를 구해 n-gram 별 최소값.
+        한 템플릿의 고정 문구는 그 템플릿 안에서 IDF 0 이 되어, 두 템플릿을 섞어 학습할 때처럼
+        고정 문구가 구분 특성으로 올라오지 않는다."""
+        idf, n_docs = {}, 0
+        for docs in corpus.values():
+            vec = cls.fit(docs)
+            for h, w in vec.idf.items():
+                idf[h] = min(w, idf.get(h, w))
+            n_docs += vec.n_docs
+        return cls({**idf, "__n_docs__": n_docs})
+
+    def to_json(self):
+        return json.dumps({"n_docs": self.n_docs, "idf": {str(h): w for h, w in self.idf.items()}})
+
+    @classmethod
+    def from_json(cls, s):
+        d = json.loads(s)
+        return cls({**{int(h): w for h, w in d["idf"].items()}, "__n_docs__": d["n_docs"]})
+
+    @property
+    def fingerprint(self):
+        return hashlib.sha256(self.to_json().encode("utf-8")).hexdigest()[:16]
+
+    def transform(self, text):
+        weights = {}
+        for h, c in _grams(text).items():
+            w = (1.0 + math.log(c)) * self.idf.get(h, self.default_idf)
+            if w > 0:  # 모든 문서에 있는 n-gram (IDF 0) 은 구분에 도움이 안 된다
+                weights[h] = w
+        idx = np.fromiter(sorted(weights), dtype=np.int64, count=len(weights))
+        val = np.fromiter((weights[h] for h in idx.tolist()), dtype=np.float32, count=len(idx))
+        norm = float(np.linalg.norm(val))
+        return idx, (val / norm if norm else val)
+
+
+def cosine(a, b):
+    """정규화된 희소 벡터 두 개의 코사인."""
+    common, ia, ib = np.intersect1d(a[0], b[0], assume_unique=True, return_indices=True)
+    return float(np.dot(a[1][ia], b[1][ib])) if len(common) else 0.0
+
+
+# ─────────────────────────────
+# LSH (랜덤 초평면, 행렬 없이 해시로 부호 생성)
+# ─────────────────────────────
+_rng = np.random.default_rng(20251019)
+_MUL = (_rng.integers(1, 2**31, BANDS * BITS, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_ADD = _rng.integers(0, 2**31, BANDS * BITS, dtype=np.uint64)
+
+
+def signature(vec):
+    """밴드별 버킷 번호 (BANDS 개). 비트 = 벡터와 (특성별 ±1) 초평면 내적의 부호."""
+    idx, val = vec
+    if not len(idx):
+        return [0] * BANDS
+    h = (idx.astype(np.uint64)[:, None] * _MUL[None, :] + _ADD[None, :]) >> np.uint64(40)
+    signs = np.where(h & np.uint64(1), 1.0, -1.0)
+    bits = (val.astype(np.float64) @ signs) > 0
+    weights = 1 << np.arange(BITS)
+    return [int(b) for b in bits.reshape(BANDS, BITS) @ weights]
+
+
+# ─────────────────────────────
+# 비교 범위 (상점 항목)
+# ─────────────────────────────
+FIELD_RE = re.compile(r"^\s*-\s*([^:\n]{1,20}):\s*(.+?)\s*$", re.MULTILINE)
+
+
+def store_fields(prompt):
+    """'- 항목: 값' 줄 → 정렬된 (항목, 값) 목록. 항목 이름 공백 제거, 값의 ' + ' 목록은 순서 무관."""
+    fields = set()
+    for name, value in FIELD_RE.findall(prompt):
+        parts = sorted(" ".join(p.split()) for p in value.split("+"))
+        fields.add((re.sub(r"\s+", "", name), " + ".join(parts)))
+    return sorted(fields)
+
+
+def store_scope(prompt):
+    return hashlib.sha1(json.dumps(store_fields(prompt), ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _scope(model_name, temperature, max_tokens, prompt):
+    return f"{model_name}|{float(temperature)}|{int(max_tokens)}|{store_scope(prompt)}"
+
+
+def semantic_corpus(personas):
+    """IDF 학습용 {템플릿: 프롬프트 목록}: 페르소나 프롬프트 + 같은 항목의 fallback 프롬프트 (ensure_data_evidence 적용)."""
+    from persona_generator import build_fallback_prompt, ensure_data_evidence
+    from persona_index import PERSONA_FIELDS
+
+    personas = [p for p in personas if "prompt" in p]
+    return {
+        "persona": [ensure_data_evidence(p["prompt"]) for p in personas],
+        "fallback": [ensure_data_evidence(build_fallback_prompt(*(p[f] for f in PERSONA_FIELDS))) for p in personas],
+    }
+
+
+# ─────────────────────────────
+# 캐시
+# ─────────────────────────────
+class SemanticCache:
+    """프롬프트 벡터 + 응답을 SQLite 에 저장. ResponseCache 처럼 WAL 모드, 스레드 간 공유 (내부 lock)."""
+
+    def __init__(self, path=DEFAULT_PATH, corpus=None, threshold=DEFAULT_THRESHOLD, ttl=7 * 24 * 3600,
+                 max_entries=5000):
+        self.path = str(path)
+        self.threshold, self.ttl, self.max_entries = threshold, ttl, max_entries
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.vectorizer = self._load_vectorizer(corpus)
+        self._stats = {"lookups": 0, "hits": 0, "similarity_sum": 0.0, "puts": 0, "evicted": 0}
+
+    def _load_vectorizer(self, corpus):
+        # IDF 는 파일에 한 번 저장해 두고 재사용 (바뀌면 저장된 벡터와 맞지 않으므로 항목을 비운다)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'vectorizer'").fetchone()
+        if row and not corpus:
+            return HashingVectorizer.from_json(row[0])
+        if isinstance(corpus, dict):
+            vec = HashingVectorizer.fit_templates(corpus)
+        else:
+            vec = HashingVectorizer.fit(corpus) if corpus else HashingVectorizer()
+        if row is None or HashingVectorizer.from_json(row[0]).fingerprint != vec.fingerprint:
+            with self._conn:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("DELETE FROM lsh")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('vectorizer', ?)", (vec.to_json(),))
+        return vec
+
+    def lookup(self, prompt, model_name, temperature, max_tokens):
+        """가장 비슷한 항목이 threshold 이상이면 (response, similarity, 저장된 prompt), 아니면 None."""
+        vec = self.vectorizer.transform(prompt)
+        sig = signature(vec)
+        cutoff = time.time() - self.ttl
+        where = " OR ".join(["(l.band = ? AND l.bucket = ?)"] * BANDS)
+        params = [x for band, bucket in enumerate(sig) for x in (band, bucket)]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT e.id, e.idx, e.val FROM lsh l JOIN entries e ON e.id = l.entry_id "
+                f"WHERE ({where}) AND e.scope = ? AND e.created_at >= ?",
+                params + [_scope(model_name, temperature, max_tokens, prompt), cutoff],
+            ).fetchall()
+            best_id, best = None, -1.0
+            for entry_id, idx, val in rows:
+                sim = cosine(vec, (np.frombuffer(idx, dtype=np.int64), np.frombuffer(val, dtype=np.float32)))
+                if sim > best:
+                    best_id, best = entry_id, sim
+            self._stats["lookups"] += 1
+            if best_id is None or best < self.threshold:
+                return None
+            self._stats["hits"] += 1
+            self._stats["similarity_sum"] += best
+            with self._conn:
+                self._conn.execute("UPDATE entries SET last_used = ?, hits = hits + 1 WHERE id = ?",
+                                   (time.time(), best_id))
+            response, stored_prompt = self._conn.execute(
+                "SELECT response, prompt FROM entries WHERE id = ?", (best_id,)).fetchone()
+        return response, best, stored_prompt
+
+    def put(self, prompt, model_name, temperature, max_tokens, response):
+        idx, val = vec = self.vectorizer.transform(prompt)
+        sig = signature(vec)
+        now = time.time()
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO entries (scope, prompt, response, idx, val, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_scope(model_name, temperature, max_tokens, prompt), prompt, response, idx.tobytes(), val.tobytes(),
+                 now, now),
+            )
+            self._conn.executemany("INSERT INTO lsh VALUES (?, ?, ?)",
+                                   [(band, bucket, cur.lastrowid) for band, bucket in enumerate(sig)])
+            self._stats["puts"] += 1
+            self._evict(now)
+        return cur.lastrowid
+
+    def _evict(self, now):
+        # TTL 지난 항목 + max_entries 초과분 (last_used 오래된 순). 호출하는 쪽이 _lock 보유
+        stale = [r[0] for r in self._conn.execute(
+            "SELECT id FROM entries WHERE created_at < ?", (now - self.ttl,))]
+        over = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - len(stale) - self.max_entries
+        if over > 0:
+            stale += [r[0] for r in self._conn.execute(
+                "SELECT id FROM entries WHERE created_at >= ? ORDER BY last_used LIMIT ?", (now - self.ttl, over))]
+        if stale:
+            marks = ",".join("?" * len(stale))
+            self._conn.execute(f"DELETE FROM lsh WHERE entry_id IN ({marks})", stale)
+            self._conn.execute(f"DELETE FROM entries WHERE id IN ({marks})", stale)
+            self._stats["evicted"] += len(stale)
+
+    def stats(self):
+        s = dict(self._stats)
+        s["misses"] = s["lookups"] - s["hits"]
+        s["hit_rate"] = round(s["hits"] / s["lookups"], 4) if s["lookups"] else 0.0
+        total = s.pop("similarity_sum")
+        s["mean_similarity"] = round(total / s["hits"], 4) if s["hits"] else None
+        s["entries"] = len(self)
+        return s
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _check(personas):
+    from persona_generator import build_fallback_prompt, ensure_data_evidence
+    from persona_index import PERSONA_FIELDS, PersonaIndex
+
+    prompts = [ensure_data_evidence(p["prompt"]) for p in personas]
+    fallbacks = [ensure_data_evidence(build_fallback_prompt(*(p[f] for f in PERSONA_FIELDS))) for p in personas]
+    vectorizer = HashingVectorizer.fit_templates(semantic_corpus(personas))
+    vecs = [vectorizer.transform(p) for p in prompts]
+    fb_vecs = [vectorizer.transform(p) for p in fallbacks]
+    print(f"[CHECK] vectorizer: {vectorizer.n_docs} template prompts, "
+          f"{np.mean([len(v[0]) for v in vecs]):.0f} nonzero n-grams / prompt")
+
+    # 한 항목만 다른 페르소나 쌍은 모두 임계값 아래여야 한다 (다른 전략이 필요)
+    worst, fb_worst = {}, {}
+    for i in range(len(personas)):
+        for j in range(i + 1, len(personas)):
+            diff = [f for f in PERSONA_FIELDS if personas[i][f] != personas[j][f]]
+            if len(diff) == 1:
+                worst[diff[0]] = max(worst.get(diff[0], 0.0), cosine(vecs[i], vecs[j]))
+                fb_worst[diff[0]] = max(fb_worst.get(diff[0], 0.0), cosine(fb_vecs[i], fb_vecs[j]))
+    print("[CHECK] max similarity, one field different: "
+          + ", ".join(f"{f}={s:.3f}" for f, s in worst.items()))
+    print("[CHECK] fallback prompts, one field different (scoped out by store fields anyway): "
+          + ", ".join(f"{f}={s:.3f}" for f, s in fb_worst.items()))
+    assert max(worst.values()) < DEFAULT_THRESHOLD
+
+    # 고객행동 순서만 다른 병합 프롬프트 / 공백 차이는 같은 벡터, 같은 범위
+    index, p = PersonaIndex(personas), personas[0]
+    key = [p[f] for f in PERSONA_FIELDS[:4]]
+    a = ensure_data_evidence(index.find(*key, "재방문 고객 + 직장인 고객")["prompt"])
+    b = ensure_data_evidence(index.find(*key, "직장인 고객 + 재방문 고객")["prompt"])
+    assert a != b and store_scope(a) == store_scope(b)
+    sim = cosine(vectorizer.transform(a), vectorizer.transform(b))
+    assert sim > 0.999, sim
+    print(f"[CHECK] reordered merged behaviors: similarity {sim:.3f}")
+
+    # 업종 기타 등 fallback 프롬프트: 항목이 전부 다른 두 상점 / 하나만 다른 두 상점은 절대 히트하면 안 된다
+    store = ["기타", "개인점포", "신규", "20대 이하 고객 중심", "재방문 고객 + 직장인 고객"]
+    other = ["기타", "프랜차이즈", "오래된", "50대 이상 고객 중심", "유동 고객"]
+    fb_a = ensure_data_evidence(build_fallback_prompt(*store))
+    fb_other = ensure_data_evidence(build_fallback_prompt(*other))
+    fb_one = ensure_data_evidence(build_fallback_prompt(*store[:2], "오래된", *store[3:]))
+    fb_reordered = ensure_data_evidence(build_fallback_prompt(*store[:4], "직장인 고객 + 재방문 고객"))
+    print(f"[CHECK] fallback pair, all fields different: similarity "
+          f"{cosine(vectorizer.transform(fb_a), vectorizer.transform(fb_other)):.3f}, one field different: "
+          f"{cosine(vectorizer.transform(fb_a), vectorizer.transform(fb_one)):.3f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SemanticCache(Path(tmp) / "semantic.sqlite", corpus=semantic_corpus(personas),
+                              max_entries=len(prompts) + 1)
+        t0 = time.perf_counter()
+        for prompt in prompts:
+            cache.put(prompt, "m", 0.6, 65535, prompt[:20])
+        t1 = time.perf_counter()
+        for prompt in prompts:
+            response, sim, _ = cache.lookup(re.sub(r"[ \t]+", "  ", prompt) + "\n", "m", 0.6, 65535)
+            assert response == prompt[:20] and sim > 0.999
+        t2 = time.perf_counter()
+        assert cache.lookup(b, "m", 0.6, 65535) is None  # 병합 프롬프트는 저장 전
+        cache.put(a, "m", 0.6, 65535, "merged")
+        assert cache.lookup(b, "m", 0.6, 65535)[0] == "merged"
+        assert cache.lookup(b, "other-model", 0.6, 65535) is None
+        cache.put(fb_a, "m", 0.6, 65535, "fallback")
+        assert cache.lookup(fb_other, "m", 0.6, 65535) is None, "fallback: other store's plan"
+        assert cache.lookup(fb_one, "m", 0.6, 65535) is None, "fallback: one field different"
+        assert cache.lookup(fb_reordered, "m", 0.6, 65535)[0] == "fallback"
+        print("[CHECK] fallback prompts: other stores miss, reordered behaviors hit")
+        n = len(prompts)
+        print(f"[CHECK] put {(t1 - t0) / n * 1e3:.2f} ms, lookup {(t2 - t1) / n * 1e3:.2f} ms / prompt "
+              f"({n} entries), LRU evicted {cache.stats()['evicted']}")
+        print(f"[CHECK] stats {cache.stats()}")
+        cache.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="semantic cache 자가 점검")
+    ap.add_argument("--personas", default="personas.json")
+    ap.add_argument("--check", action="store_true")
+    args = ap.parse_args()
+
+    with open(args.personas, "r", encoding="utf-8") as f:
+        personas = json.load(f)
+    if args.check:
+        _check(personas)
@@ -0,0 +1,187 @@
+"""
+가맹점명 → 업종 / 프랜차이즈 여부 분류 (Aho-Corasick 한 번 훑기)
+
+업종 키워드, BRAND_KEYWORDS, AMBIGUOUS_NEGATIVES 를 하나의 오토마타로 컴파일해 두고
+가맹점명을 글자 단위로 한 번만 읽는다.
+- 업종 키워드: lower() 한 원문 위에서 매칭 (기존 classify_hpsn_mct 와 같음)
+- 브랜드/애매 키워드: 공백·기호를 뺀 정규화 문자열 위에서 매칭 (기존 _normalize_name 과 같음)
+  → 두 상태를 같은 루프에서 같이 진행하고, 기호 글자는 정규화 쪽 상태만 건너뛴다
+- 업종 우선순위는 CATEGORY_KEYWORDS 순서 ("이자카야" 는 일식)
+
+  classify_store("교촌치킨 왕십리점")     # ("한식", True)
+  classify_names(df["MCT_NM"])          # DataFrame[업종, 프랜차이즈여부], 같은 이름은 한 번만 분류
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_KEYWORDS = [
+    ("카페/디저트", ["카페", "커피", "디저트", "도너츠", "빙수", "와플", "마카롱"]),
+    ("한식", ["한식", "국밥", "백반", "찌개", "감자탕", "분식", "치킨", "한정식", "죽"]),
+    ("일식", ["일식", "초밥", "돈가스", "라멘", "덮밥", "소바", "이자카야"]),
+    ("중식", ["중식", "짬뽕", "짜장", "마라", "훠궈", "딤섬"]),
+    ("양식/세계요리", ["양식", "스테이크", "피자", "파스타", "햄버거", "샌드위치", "토스트", "버거"]),
+    ("주점/주류", ["주점", "호프", "맥주", "와인바", "소주", "요리주점", "이자카야"]),
+]
+OTHER = "기타"
+
+BRAND_KEYWORDS = {
+    "파리","뚜레","배스","던킨","투썸","이디","빽다","메가","컴포","할리",
+    "스타벅","탐앤","공차","요거","와플","교촌","네네","호식","둘둘","처갓",
+    "굽네","bbq","bhc","맘스","죠스","신전","명랑","두끼","땅스",
+    "도미","파파","롯데","버거킹","써브","이삭","명륜","하남","한신",
+    "등촌","봉추","원할","본죽","한촌","백채","프랭","바르","한솥","베스"
+}
+AMBIGUOUS_NEGATIVES = {
+    "카페","커피","왕십","성수","행당","종로","전주","춘천","와인","치킨","피자",
+    "분식","국수","초밥","곱창","돼지","한우"
+}
+
+# _normalize_name 이 지우는 글자
+_DROP_PATTERN = r"[\s\*\-\(\)\[\]{}_/\\.|,!?&^%$#@~`+=:;\"']"
+_DROP_RE = re.compile(_DROP_PATTERN)
+
+# 출력 비트: 업종 i → 1 << i, 그 위로 브랜드 / 2글자 이하 브랜드 / 애매 키워드
+_BRAND = 1 << len(CATEGORY_KEYWORDS)
+_SHORT_BRAND = _BRAND << 1
+_NEGATIVE = _BRAND << 2
+_CATEGORY_MASK = _BRAND - 1
+_NAME_MASK = _BRAND | _SHORT_BRAND | _NEGATIVE
+
+
+def _normalize_name(name: str) -> str:
+    return _DROP_RE.sub("", name.lower())
+
+
+class KeywordAutomaton:
+    """패턴 → 비트 마스크. 실패 링크까지 펼친 DFA (상태별 dict) 라서 글자 하나에 dict 조회 한 번."""
+
+    def __init__(self, patterns):
+        goto, out, fail = [{}], [0], [0]
+        for word, bits in patterns:
+            s = 0
+            for ch in word:
+                if ch not in goto[s]:
+                    goto.append({})
+                    out.append(0)
+                    fail.append(0)
+                    goto[s][ch] = len(goto) - 1
+                s = goto[s][ch]
+            out[s] |= bits
+
+        # BFS: 실패 링크 출력 합치기 + 전이 펼치기 (부모가 먼저 끝나 있음)
+        delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = list(goto[0].values())
+        for s in queue:
+            out[s] |= out[fail[s]]
+            delta[s] = {**delta[fail[s]], **goto[s]}
+            for ch, t in goto[s].items():
+                fail[t] = delta[fail[s]].get(ch, 0) if s else 0
+                queue.append(t)
+        self.delta, self.out = delta, out
+
+    def __len__(self):
+        return len(self.delta)
+
+
+def _build():
+    patterns = []
+    for i, (_, words) in enumerate(CATEGORY_KEYWORDS):
+        patterns += [(w, 1 << i) for w in words]
+    patterns += [(w, _BRAND | (_SHORT_BRAND if len(w) <= 2 else 0)) for w in BRAND_KEYWORDS]
+    patterns += [(w, _NEGATIVE) for w in AMBIGUOUS_NEGATIVES]
+    return KeywordAutomaton(patterns)
+
+
+_AUTOMATON = _build()
+# \s 는 str.isspace 와 같은 기준이라 공백은 isspace 로, 나머지 기호는 집합으로 본다
+_DROP_CHARS = set("*-()[]{}_/\\.|,!?&^%$#@~`+=:;\"'")
+
+
+def match_bits(name: str) -> int:
+    """원문 상태(업종 비트)와 정규화 상태(브랜드 비트)를 한 번 훑으면서 같이 진행."""
+    delta, out = _AUTOMATON.delta, _AUTOMATON.out
+    s = t = raw = norm = 0
+    split = False  # 기호를 만나기 전까지는 두 상태가 같다
+    for ch in name.lower():
+        if ch in _DROP_CHARS or ch.isspace():
+            split = True
+        elif split:
+            t = delta[t].get(ch, 0)
+            norm |= out[t]
+        s = delta[s].get(ch, 0)
+        raw |= out[s]
+        if not split:
+            t, norm = s, raw
+    return (raw & _CATEGORY_MASK) | (norm & _NAME_MASK)
+
+
+def _category(bits):
+    cat = bits & _CATEGORY_MASK
+    if not cat:
+        return OTHER
+    return CATEGORY_KEYWORDS[(cat & -cat).bit_length() - 1][0]
+
+
+def _franchise(bits, name):
+    if not bits & _BRAND:
+        return False
+    # 애매 키워드 + 2글자 이하 브랜드만 걸렸는데 '점' 표기도 없으면 개인점포로 본다
+    if bits & _NEGATIVE and bits & _SHORT_BRAND and "점" not in name:
+        return False
+    return True
+
+
+def classify_store(name: str):
+    """(업종, 프랜차이즈 여부)."""
+    bits = match_bits(name)
+    return _category(bits), _franchise(bits, name)
+
+
+def classify_hpsn_mct(name: str) -> str:
+    return _category(match_bits(name))
+
+
+def is_franchise(name: str) -> bool:
+    return _franchise(match_bits(name), name)
+
+
+def classify_names(names: pd.Series) -> pd.DataFrame:
+    """가맹점명 Series → DataFrame[업종, 프랜차이즈여부] (같은 index). 중복 이름은 한 번만 분류, 결측은 기타/개인점포."""
+    codes, uniques = pd.factorize(names.fillna("").astype(str), sort=False)
+    cats, franchise = [], []
+    for name in uniques:
+        cat, fr = classify_store(name)
+        cats.append(cat)
+        franchise.append("프랜차이즈" if fr else "개인점포")
+    return pd.DataFrame({
+        "업종": np.asarray(cats, dtype=object)[codes],
+        "프랜차이즈여부": np.asarray(franchise, dtype=object)[codes],
+    }, index=names.index)
+
+
+# ─────────────────────────────
+# 기존 구현 (검증/벤치마크 기준)
+# ─────────────────────────────
+def classify_hpsn_mct_scan(name: str) -> str:
+    nm = name.strip().lower()
+    for cat, words in CATEGORY_KEYWORDS:
+        if any(k in nm for k in words):
+            return cat
+    return OTHER
+
+
+def is_franchise_scan(name: str) -> bool:
+    n = _normalize_name(name)
+    if not n:
+        return False
+    has_branch_marker = "점" in name
+    hit = any(k in n for k in BRAND_KEYWORDS)
+    if hit:
+        if any(bad in n for bad in AMBIGUOUS_NEGATIVES):
+            short_hits = [k for k in BRAND_KEYWORDS if k in n and len(k) <= 2]
+            if short_hits and not has_branch_marker:
+                return False
+        return True
+    return False
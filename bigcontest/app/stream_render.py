@@ -0,0 +1,66 @@
+"""
+스트리밍 응답 렌더링 스로틀 (streamlit placeholder.markdown 호출 횟수 줄이기)
+
+조각마다 placeholder.markdown(전체 텍스트) 를 부르면 매번 지금까지의 전체 Markdown 이
+웹소켓으로 다시 나가서 (총 전송량 ∝ 길이²) 긴 응답에서 브라우저/서버가 버벅인다.
+- 조각은 리스트 버퍼에 모으고, 간격이 지났을 때만 그린다 (쌓인 글자가 max_pending 을 넘으면 기본 interval 만 지나도 그림)
+- 본문이 길어질수록 간격을 늘린다 (grow_chars 마다 interval 만큼, 최대 max_interval)
+- finish() 에서 남은 조각을 커서 없이 한 번 더 그린다
+
+  render = RenderThrottle(placeholder)
+  for piece in stream:
+      render.add(piece)
+  full_text = render.finish()
+"""
+import time
+
+CURSOR = "▌"
+
+
+class RenderThrottle:
+    def __init__(self, placeholder, interval=0.1, max_interval=2.0, grow_chars=10000, max_pending=4000,
+                 cursor=CURSOR, clock=time.monotonic):
+        self.placeholder = placeholder
+        self.interval, self.max_interval, self.grow_chars = interval, max_interval, grow_chars
+        self.max_pending, self.cursor, self.clock = max_pending, cursor, clock
+        self._text = ""        # 마지막으로 그린 시점까지 합친 본문
+        self._pending = []     # 아직 합치지 않은 조각
+        self._pending_chars = 0
+        self._last = None
+        self.renders = 0
+        self.rendered_chars = 0
+
+    @property
+    def text(self):
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending, self._pending_chars = [], 0
+        return self._text
+
+    def current_interval(self):
+        return min(self.max_interval, self.interval * max(1.0, len(self._text) / self.grow_chars))
+
+    def add(self, piece):
+        if not piece:
+            return
+        self._pending.append(piece)
+        self._pending_chars += len(piece)
+        now = self.clock()
+        if self._last is None:
+            self._last = now  # 첫 조각은 바로 그려서 응답이 시작된 걸 보여준다
+            self._render(self.text + self.cursor)
+        elif (now - self._last >= self.current_interval()
+              or (self._pending_chars >= self.max_pending and now - self._last >= self.interval)):
+            self._last = now
+            self._render(self.text + self.cursor)
+
+    def finish(self, empty_text=None):
+        """남은 조각까지 커서 없이 그리고 전체 본문을 돌려준다."""
+        text = self.text
+        self._render(text or empty_text or "")
+        return text
+
+    def _render(self, body):
+        self.placeholder.markdown(body)
+        self.renders += 1
+        self.rendered_chars += len(body)
@@ -1,10 +1,25 @@
 import os
 import re
 import json
+import uuid
 import logging
+import sqlite3
 import time
 import streamlit as st
-import google.generativeai as genai
+
+from generation_jobs import CANCELLED, ERROR, JobManager
+from llm_backend import DEFAULT_BACKEND, DEFAULT_MAX_TOKENS, DEFAULT_MODEL, DEFAULT_TEMPERATURE
+from persona_generator import build_fallback_prompt, ensure_data_evidence
+from persona_index import PersonaIndex
+from plan_parser import extract_executive_summary
+from plan_store import PlanStore
+from plan_library import PERSONA_KEYS, key_from_info, open_library, persona_key
+from plan_variants import build_variants, rank_plans
+from response_cache import ResponseCache
+from semantic_cache import DEFAULT_THRESHOLD, SemanticCache, semantic_corpus
+from telemetry import get_telemetry
+from store_classifier import classify_hpsn_mct, is_franchise
+from stream_render import RenderThrottle
 
 # ─────────────────────────────
 # 0. 로그 및 경고 억제
@@ -16,81 +31,11 @@ os.environ["GLOG_minloglevel"] = "3"
 # ─────────────────────────────
 # 1. Gemini API 설정
 # ─────────────────────────────
+# LLM_BACKEND=fake 이면 API 키 없이 fake_llm_server.py 로 보낸다 (llm_backend.py)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
-else:
+if DEFAULT_BACKEND == "gemini" and not GOOGLE_API_KEY:
     st.warning("⚠️ GOOGLE_API_KEY가 설정되어 있지 않습니다. Streamlit secrets에 추가하세요.")
 
-DEFAULT_MODEL = "gemini-2.5-flash"
-DATA_EVIDENCE_GUIDE = (
-    "\n\n추가 지침:\n"
-    "- 각 제안에는 데이터 근거(표/지표/규칙 등)를 함께 표기하세요.\n"
-    "- 가능한 경우 간단한 표나 지표 수치를 활용해 근거를 명확히 보여주세요."
-)
-
-
-def ensure_data_evidence(prompt: str) -> str:
-    """프롬프트에 데이터 근거 지침이 없으면 추가."""
-    if "데이터 근거" in prompt:
-        return prompt
-    return prompt.rstrip() + DATA_EVIDENCE_GUIDE
-
-
-def extract_executive_summary(markdown_text: str, max_points: int = 4):
-    """생성된 전략 본문에서 요약 섹션의 핵심 불릿을 추출."""
-    lines = markdown_text.splitlines()
-    summary_lines = []
-
-    def clean_bullet(line):
-        stripped = line.strip()
-        if not stripped:
-            return None
-        bullet_match = re.match(r"^[-\*\u2022]\s*(.+)", stripped)
-        if bullet_match:
-            return bullet_match.group(1).strip()
-        numbered_match = re.match(r"^\d+[.)]\s*(.+)", stripped)
-        if numbered_match:
-            return numbered_match.group(1).strip()
-        return None
-
-    heading_pattern = re.compile(r"#{1,6}\s*요약")
-    start_idx = next(
-        (idx for idx, line in enumerate(lines) if heading_pattern.match(line.strip())),
-        None,
-    )
-
-    if start_idx is not None:
-        for line in lines[start_idx + 1 :]:
-            stripped = line.strip()
-            if stripped.startswith("#"):
-                break
-            cleaned = clean_bullet(stripped)
-            if cleaned:
-                summary_lines.append(cleaned)
-            if len(summary_lines) >= max_points:
-                break
-
-    if not summary_lines:
-        for line in lines:
-            cleaned = clean_bullet(line)
-            if cleaned:
-                summary_lines.append(cleaned)
-            if len(summary_lines) >= max_points:
-                break
-
-    if not summary_lines:
-        collapsed = re.sub(r"\s+", " ", markdown_text)
-        sentences = re.split(r"(?<=[.!?])\s", collapsed)
-        for sentence in sentences:
-            cleaned = sentence.strip()
-            if cleaned:
-                summary_lines.append(cleaned)
-            if len(summary_lines) >= max_points:
-                break
-
-    return summary_lines
-
 # ─────────────────────────────
 # 2. Persona 데이터 로드
 # ─────────────────────────────
@@ -105,74 +50,114 @@ def load_personas(path="personas.json"):
 
 personas = load_personas()
 
-# ─────────────────────────────
-# 3. 업종 분류
-# ─────────────────────────────
-def classify_hpsn_mct(name: str) -> str:
-    nm = name.strip().lower()
-    if any(k in nm for k in ["카페", "커피", "디저트", "도너츠", "빙수", "와플", "마카롱"]):
-        return "카페/디저트"
-    if any(k in nm for k in ["한식", "국밥", "백반", "찌개", "감자탕", "분식", "치킨", "한정식", "죽"]):
-        return "한식"
-    if any(k in nm for k in ["일식", "초밥", "돈가스", "라멘", "덮밥", "소바", "이자카야"]):
-        return "일식"
-    if any(k in nm for k in ["중식", "짬뽕", "짜장", "마라", "훠궈", "딤섬"]):
-        return "중식"
-    if any(k in nm for k in ["양식", "스테이크", "피자", "파스타", "햄버거", "샌드위치", "토스트", "버거"]):
-        return "양식/세계요리"
-    if any(k in nm for k in ["주점", "호프", "맥주", "와인바", "소주", "요리주점", "이자카야"]):
-        return "주점/주류"
-    return "기타"
+
+@st.cache_resource
+def get_persona_index(path="personas.json"):
+    # 다섯 항목 해시 인덱스는 프로세스당 한 번만 만든다 (persona_index.py)
+    return PersonaIndex(load_personas(path))
 
 # ─────────────────────────────
-# 4. 프랜차이즈 판별
+# 3. 업종 분류 / 4. 프랜차이즈 판별
 # ─────────────────────────────
-BRAND_KEYWORDS = {
-    "파리","뚜레","배스","던킨","투썸","이디","빽다","메가","컴포","할리",
-    "스타벅","탐앤","공차","요거","와플","교촌","네네","호식","둘둘","처갓",
-    "굽네","bbq","bhc","맘스","죠스","신전","명랑","두끼","땅스",
-    "도미","파파","롯데","버거킹","써브","이삭","명륜","하남","한신",
-    "등촌","봉추","원할","본죽","한촌","백채","프랭","바르","한솥","베스"
-}
-AMBIGUOUS_NEGATIVES = {
-    "카페","커피","왕십","성수","행당","종로","전주","춘천","와인","치킨","피자",
-    "분식","국수","초밥","곱창","돼지","한우"
-}
-
-def _normalize_name(name: str) -> str:
-    n = name.lower()
-    n = re.sub(r"[\s\*\-\(\)\[\]{}_/\\.|,!?&^%$#@~`+=:;\"']", "", n)
-    return n
-
-def is_franchise(name: str) -> bool:
-    n = _normalize_name(name)
-    if not n:
-        return False
-    has_branch_marker = "점" in name
-    hit = any(k in n for k in BRAND_KEYWORDS)
-    if hit:
-        if any(bad in n for bad in AMBIGUOUS_NEGATIVES):
-            short_hits = [k for k in BRAND_KEYWORDS if k in n and len(k) <= 2]
-            if short_hits and not has_branch_marker:
-                return False
-        return True
-    return False
-
+# 업종 키워드 / BRAND_KEYWORDS 를 Aho-Corasick 오토마타 하나로 매칭 (store_classifier.py)
+# classify_hpsn_mct(name) → 업종, is_franchise(name) → 프랜차이즈 여부
 
 # ─────────────────────────────
 # 5. Gemini Streaming 호출
 # ─────────────────────────────
-DEFAULT_MODEL = "gemini-2.5-flash"
+# 모델/temperature/max_tokens 기본값은 llm_backend 에서 (ai_caller.py 배치와 같은 캐시 키)
+
+
+@st.cache_resource
+def get_plan_library():
+    # plan_library.py --build 로 만든 사전 생성 전략 (없으면 None → 항상 실시간 생성)
+    return open_library()
+
+
+@st.cache_resource
+def get_response_cache():
+    # ai_caller.py --resume 배치와 같은 SQLite 파일 (app/.cache/gemini_responses.sqlite)
+    return ResponseCache()
+
+
+@st.cache_resource
+def get_semantic_cache():
+    # 비슷한 프롬프트 (고객행동 순서/공백만 다른 경우 등) 의 응답 재사용 (app/.cache/semantic_cache.sqlite)
+    # SEMANTIC_CACHE=0 이면 끔, SEMANTIC_CACHE_THRESHOLD 로 코사인 유사도 기준 조정
+    if os.getenv("SEMANTIC_CACHE", "1") == "0":
+        return None
+    # IDF 는 실제로 보내는 두 템플릿 (페르소나 프롬프트 + 업종 기타 등의 fallback 프롬프트) 으로 학습
+    corpus = semantic_corpus(load_personas())
+    return SemanticCache(corpus=corpus,
+                         threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", str(DEFAULT_THRESHOLD))))
+
+
+@st.cache_resource
+def get_plan_store():
+    # 생성된 전략을 파싱해서 쌓아 두는 검색/집계용 저장소 (app/.cache/plan_store.sqlite, plan_store.py)
+    # PLAN_STORE=0 이면 끔
+    if os.getenv("PLAN_STORE", "1") == "0":
+        return None
+    return PlanStore()
+
+
+def archive_plan(text, persona=None, model=None):
+    """끝난 전략을 저장소에 남긴다. 저장 실패가 상담을 막으면 안 되므로 에러는 로그만."""
+    store = get_plan_store()
+    if store is None or not text:
+        return
+    try:
+        store.add(text, persona=persona, model=model, source="streamlit")
+    except (sqlite3.Error, OSError) as e:
+        logging.getLogger(__name__).warning("plan store: %s", e)
+
+
+@st.cache_resource
+def get_job_manager():
+    # 프로세스에 하나: 모든 세션이 같은 생성 스레드 풀을 쓰고, rerun 돼도 생성은 계속된다 (generation_jobs.py)
+    # MAX_TOKENS 로 잘리면 GEN_AUTO_CONTINUE 번까지 자동으로 이어쓰고, 그 뒤는 이어쓰기 버튼
+    # 끝난 작업마다 TTFT/속도/finish_reason 을 telemetry 에 기록 (pages/admin_metrics.py 에서 확인)
+    return JobManager(max_workers=int(os.getenv("GEN_WORKERS", "8")), cache=get_response_cache(),
+                      auto_continue=int(os.getenv("GEN_AUTO_CONTINUE", "2")), semantic=get_semantic_cache(),
+                      telemetry=get_telemetry())
+
+
+def session_id():
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
 
 # https://cloud.google.com/vertex-ai/generative-ai/docs/models/gemini/2-5-flash
-def stream_gemini(
+def start_generation(
     prompt,
     model=DEFAULT_MODEL,
-    temperature=0.6,
-    max_tokens=65535,
-    output_placeholder=None,
+    temperature=DEFAULT_TEMPERATURE,
+    max_tokens=DEFAULT_MAX_TOKENS,
+    use_cache=True,
+    persona=None,
 ):
-    """안정적인 스트리밍 + 완료사유 점검 + 친절한 에러"""
+    """백그라운드 작업으로 생성을 시작하고 job id 를 세션에 기록 (화면은 follow_job 이 그린다).
+
+    같은 (prompt, model, temperature, max_tokens) 로 끝까지 생성된 응답이 캐시에 있으면 API 를 부르지 않는다.
+    비슷한 프롬프트의 응답이 semantic cache 에 있어도 API 없이 그 응답을 스트리밍처럼 보여준다.
+    """
+    job = get_job_manager().submit(
+        session_id(), prompt, model, use_cache=use_cache, persona=persona,
+        temperature=temperature, max_tokens=max_tokens, top_p=0.9, top_k=40,
+    )
+    st.session_state.active_job = job.id
+    return job
+
+
+def follow_job(job, output_placeholder=None):
+    """작업 버퍼를 읽어 그린다 (rerun 되면 다음 실행에서 처음부터 다시 따라감) + 완료사유 점검 + 친절한 에러"""
+    placeholder = output_placeholder or st.empty()
+    if job.from_cache:
+        placeholder.markdown(job.text)
+        st.success("✅ 이전에 생성한 전략을 불러왔습니다.")
+        return job.text
+
     status_placeholder = st.empty()
     status_placeholder.info("전략을 생성중입니다... ⏳")
 
@@ -183,79 +168,31 @@ def stream_gemini(
         "4/4 전달할 내용을 정돈하고 있어요...",
     ]
     step_interval = 2.0
-    step_state = {"idx": 0, "next_time": time.time() + step_interval}
-
-    try:
-        gmodel = genai.GenerativeModel(model)
-        cfg = {
-            "temperature": temperature,
-            "max_output_tokens": max_tokens,
-            "top_p": 0.9,
-            "top_k": 40,
-        }
-
-        stream = gmodel.generate_content(prompt, generation_config=cfg, stream=True)
-
-        placeholder = output_placeholder or st.empty()
-        full_text = ""
-
-        # 1) 스트리밍 수집 (chunk.text가 없을 수도 있으니 candidates도 확인)
-        for event in stream:
-            now = time.time()
-            if step_state["idx"] < len(status_messages) and now >= step_state["next_time"]:
-                status_placeholder.info(
-                    "전략을 생성중입니다... ⏳\n\n"
-                    f"{status_messages[step_state['idx']]}"
-                )
-                step_state["idx"] += 1
-                step_state["next_time"] = now + step_interval
-
-            piece = ""
-            if getattr(event, "text", None):
-                piece = event.text
-            elif getattr(event, "candidates", None):
-                # 일부 이벤트는 delta 형태로 들어와서 text가 비어 있음
-                for c in event.candidates:
-                    # 각 candidate의 content에서 추가 텍스트를 안전하게 추출
-                    try:
-                        piece += "".join([p.text or "" for p in c.content.parts])
-                    except Exception:
-                        pass
-
-            if piece:
-                full_text += piece
-                # 타이핑 커서 표시
-                placeholder.markdown(full_text + "▌")
-
-        # 2) 최종 해석 (finish_reason/blocked 여부 확인)
-        try:
-            stream.resolve()  # 최종 상태/메타 확보
-        except Exception:
-            # resolve에서 오류가 나도 본문이 있으면 계속 진행
-            pass
-
-        placeholder.markdown(full_text or "_응답이 비어 있습니다._")
-
-        # finish_reason/blocked 안내
-        try:
-            cand0 = stream.candidates[0]
-            fr = getattr(cand0, "finish_reason", None)
-            block = getattr(cand0, "safety_ratings", None)
-        except Exception:
-            fr, block = None, None
-
-        # 3) 잘림/차단 안내 + 이어쓰기 버튼
-        if fr == "MAX_TOKENS":
-            st.info("ℹ️ 응답이 길어 중간에 잘렸어요. 아래 버튼으로 이어서 생성할 수 있어요.")
-            if st.button("➕ 이어서 더 생성"):
-                continue_from(full_text, prompt, gmodel, cfg)
-        elif fr == "SAFETY":
-            st.warning("⚠️ 안전 필터로 일부 내용이 숨겨졌을 수 있어요. 표현을 다듬어 다시 시도해보세요.")
-
-        status_placeholder.success("✅ 전략 생성이 완료되었습니다.")
-        return full_text
-
-    except Exception as e:
+    started = job.started_at or time.time()
+
+    # 조각마다 전체 본문을 다시 보내지 않고 ~100ms 간격으로 묶어서 그림 (타이핑 커서 포함)
+    render = RenderThrottle(placeholder)
+    pos, shown = 0, None
+    while True:
+        pieces, pos = job.read(pos)
+        render.add("".join(pieces))
+        if job.done and not job.read(pos)[0]:
+            break
+        idx = min(int((time.time() - started) / step_interval), len(status_messages)) - 1
+        if job.similarity is not None:
+            message = "비슷한 상점의 전략을 불러오고 있어요..."
+        elif job.rounds:
+            # MAX_TOKENS 로 잘려서 같은 작업 안에서 자동 이어쓰기 중
+            message = f"응답이 길어 이어서 작성하고 있어요... ({job.rounds}/{job.max_rounds})"
+        else:
+            message = status_messages[idx] if idx >= 0 else None
+        if message != shown:
+            status_placeholder.info(f"전략을 생성중입니다... ⏳\n\n{message}" if message else "전략을 생성중입니다... ⏳")
+            shown = message
+        job.wait(0.1, pos)
+
+    if job.status == ERROR:
+        e = job.error
         status_placeholder.error("🚨 전략 생성 중 오류가 발생했습니다.")
         st.error(
             "🚨 Gemini 응답 생성 중 오류가 발생했습니다.\n\n"
@@ -265,46 +202,102 @@ def stream_gemini(
             "• 일시적인 네트워크/서비스 이슈일 수 있습니다. 잠시 후 다시 시도해 주세요."
         )
         return None
+    if job.status == CANCELLED:
+        status_placeholder.warning("생성이 취소되었습니다.")
+        return render.finish() or None
 
+    full_text = render.finish(empty_text="_응답이 비어 있습니다._")
 
-def continue_from(previous_text: str, original_prompt: str, gmodel, cfg):
-    """
-    MAX_TOKENS로 잘렸을 때 이어쓰기. 원본 문맥을 간단히 요약·복원해 연속성 유지.
-    """
-    followup_prompt = (
-        "아래 초안의 이어지는 내용을 같은 톤/서식으로 계속 작성하세요. "
-        "불필요한 반복 없이 Phase 나머지와 KPI, 실행 체크리스트를 마저 채워주세요.\n\n"
-        "=== 지금까지 생성된 초안 ===\n"
-        f"{previous_text}\n"
-        "=== 원래의 요구사항 ===\n"
-        f"{original_prompt}\n"
+    # finish_reason 안내 ("STOP" / "MAX_TOKENS" / "SAFETY" ...). 이어쓰기 버튼은 9. 에서 매 실행마다 그린다
+    if job.finish_reason == "SAFETY":
+        st.warning("⚠️ 안전 필터로 일부 내용이 숨겨졌을 수 있어요. 표현을 다듬어 다시 시도해보세요.")
+
+    if job.similarity is not None:
+        status_placeholder.success(f"✅ 비슷한 상점의 전략을 불러왔습니다 (유사도 {job.similarity:.2f}).")
+    else:
+        status_placeholder.success("✅ 전략 생성이 완료되었습니다.")
+    return full_text
+
+
+def start_variants(variants, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, max_tokens=DEFAULT_MAX_TOKENS):
+    """비교 모드: 변형 프롬프트를 한 그룹으로 동시에 생성 (GEN_VARIANT_CONCURRENCY 개까지 동시에)."""
+    jobs = get_job_manager().submit_group(
+        session_id(), [v["prompt"] for v in variants], model, personas=[v["persona"] for v in variants],
+        concurrency=int(os.getenv("GEN_VARIANT_CONCURRENCY", "4")),
+        temperature=temperature, max_tokens=max_tokens, top_p=0.9, top_k=40,
     )
+    st.session_state.active_group = {"jobs": [j.id for j in jobs], "labels": [v["label"] for v in variants]}
+    return jobs
 
-    try:
-        stream2 = gmodel.generate_content(followup_prompt, generation_config=cfg, stream=True)
-        placeholder = st.empty()
-        full2 = ""
-        for ev in stream2:
-            if getattr(ev, "text", None):
-                full2 += ev.text
-                placeholder.markdown(full2 + "▌")
-        placeholder.markdown(full2)
-        st.session_state.chat_history.append({"role": "assistant", "content": full2})
-    except Exception as e:
-        st.error(
-            "🚨 이어쓰기 중 오류가 발생했습니다.\n\n"
-            f"**에러 유형**: {type(e).__name__}\n"
-            f"**메시지**: {e}"
+
+def follow_jobs(jobs, placeholders):
+    """여러 작업을 각자의 placeholder(탭) 에 동시에 그린다. 작업별 본문 (실패/취소면 None)."""
+    status_placeholder = st.empty()
+    renders = [RenderThrottle(p) for p in placeholders]
+    positions = [0] * len(jobs)
+    shown = None
+    while True:
+        for i, job in enumerate(jobs):
+            pieces, positions[i] = job.read(positions[i])
+            renders[i].add("".join(pieces))
+        pending = [(job, pos) for job, pos in zip(jobs, positions) if not job.done or job.read(pos)[0]]
+        if not pending:
+            break
+        message = f"전략 {len(jobs)}개를 동시에 생성중입니다... ⏳ ({len(jobs) - len(pending)}/{len(jobs)} 완료)"
+        if message != shown:
+            status_placeholder.info(message)
+            shown = message
+        pending[0][0].wait(0.1, pending[0][1])
+
+    results = []
+    for job, render in zip(jobs, renders):
+        if job.status == ERROR:
+            render.finish(empty_text=f"🚨 생성 중 오류가 발생했습니다 ({type(job.error).__name__}: {job.error})")
+            results.append(None)
+        elif job.status == CANCELLED:
+            render.finish(empty_text="생성이 취소되었습니다.")
+            results.append(None)
+        else:
+            results.append(render.finish(empty_text="_응답이 비어 있습니다._") or None)
+    failed = sum(r is None for r in results)
+    if failed:
+        status_placeholder.warning(f"⚠️ {len(jobs)}개 중 {failed}개는 생성하지 못했습니다.")
+    else:
+        status_placeholder.success(f"✅ 전략 {len(jobs)}개 생성이 완료되었습니다.")
+    return results
+
+
+def ranking_markdown(ranked):
+    """rank_plans 결과 → 비교 표 (로컬 채점: 필수 섹션, Phase/KPI, 수치 목표)."""
+    rows = ["| 순위 | 전략 | 점수 | 필수 섹션 | Phase | KPI 포괄도 | 빠진 섹션 |", "|---|---|---|---|---|---|---|"]
+    for rank, (label, s) in enumerate(ranked, 1):
+        rows.append(f"| {rank} | {label} | {s['score']:.0f} | {s['sections']:.0%} | {s['phases']} | "
+                    f"{s['kpi_terms']:.0%} | {', '.join(s['missing']) or '-'} |")
+    return "#### 🏆 전략 비교 (자동 채점)\n\n" + "\n".join(rows)
+
+
+def show_result(result, content_placeholder, summarize=True):
+    """결과 + 핵심 요약을 그리고 대화 기록에 남긴다."""
+    summary_points = extract_executive_summary(result) if summarize else None
+    if summary_points:
+        summary_markdown = "#### ⚡ 핵심 요약\n\n" + "\n".join(
+            f"- {point}" for point in summary_points
         )
+        combined_result = f"{summary_markdown}\n\n---\n\n{result}"
+        content_placeholder.markdown(combined_result)
+        st.session_state.chat_history.append(
+            {"role": "assistant", "content": combined_result}
+        )
+    else:
+        content_placeholder.markdown(result)
+        st.session_state.chat_history.append({"role": "assistant", "content": result})
 
 # ─────────────────────────────
 # 6. 페르소나 매칭
 # ─────────────────────────────
 def find_persona(업종, 프랜차이즈, 점포연령="미상", 고객연령대="미상", 고객행동="미상"):
-    for p in personas:
-        if p["업종"] == 업종 and p["프랜차이즈여부"] == 프랜차이즈:
-            return p
-    return None  # None 그대로 반환
+    # 다섯 항목 정확 매칭 → 모르는 항목은 버리며 fallback, 복수 고객행동은 병합. 업종이 없으면 None
+    return get_persona_index().find(업종, 프랜차이즈, 점포연령, 고객연령대, 고객행동)
 
 # ─────────────────────────────
 # 7. Streamlit UI 설정
@@ -313,8 +306,11 @@ st.set_page_config(page_title="AI 마케팅 컨설턴트", layout="wide")
 st.title("💬 AI 마케팅 컨설턴트")
 
 if st.button("🔄 새 상담 시작"):
+    if "session_id" in st.session_state:
+        get_job_manager().cancel_session(st.session_state.session_id)
     st.session_state.clear()
     st.rerun()
+st.toggle("🔀 여러 전략 비교 (고객행동·채널 초점별로 동시에 생성)", key="compare_mode")
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
@@ -423,36 +419,92 @@ if user_input:
         if persona and "prompt" in persona:
             prompt = ensure_data_evidence(persona["prompt"])
         else:
-            prompt = ensure_data_evidence(
-                "다음 상점 정보를 기반으로 3~5단계 Phase별 맞춤형 마케팅 전략을 제안하세요.\n"
-                "각 Phase는 목표, 핵심 액션(채널·컨텐츠·오퍼), 예산범위, 예상 KPI, 다음 Phase로 넘어가는 기준을 포함하세요.\n\n"
-                f"- 업종: {info['업종']}\n"
-                f"- 형태: {info['프랜차이즈여부']}\n"
-                f"- 점포연령: {info['점포연령']}\n"
-                f"- 주요 고객연령대: {info['고객연령대']}\n"
-                f"- 고객행동 특성: {info['고객행동']}\n"
-                "응답은 불릿과 표를 적절히 섞어 간결하게 작성하세요."
-            )
+            prompt = ensure_data_evidence(build_fallback_prompt(
+                info['업종'], info['프랜차이즈여부'], info['점포연령'], info['고객연령대'], info['고객행동']))
 
         #with st.expander("📜 프롬프트 보기"):
         #    st.code(prompt, language="markdown")
 
         add_message("assistant", "이제 AI 상담사가 맞춤형 마케팅 전략을 생성합니다... ⏳")
 
+        # 비교 모드: 고객행동별/채널 초점별 변형을 동시에 생성해서 탭으로 보여주고 채점 순위를 매긴다
+        variants = (build_variants(get_persona_index(), info, max_variants=int(os.getenv("GEN_VARIANTS", "4")))
+                    if st.session_state.get("compare_mode") else [])
+
+        # 다섯 항목이 페르소나 키로 바뀌고 라이브러리에 있으면 바로 보여주고, 아니면 백그라운드 생성
+        library = get_plan_library()
+        key = key_from_info(info)
+        result = library.get(key) if library is not None and key and len(variants) < 2 else None
+        if len(variants) >= 2:
+            start_variants(variants)  # ⬅️ 아래 9. 에서 탭별 스트리밍 출력
+        elif result is not None:
+            with st.chat_message("assistant"):
+                st.markdown("### 📈 생성된 마케팅 전략 결과")
+                show_result(result, st.empty())
+        else:
+            # 텔레메트리 라벨: 매칭된 (병합) 페르소나 키, 못 찾았으면 fallback
+            label = persona_key(*(persona[f] for f in PERSONA_KEYS)) if persona and "prompt" in persona else "fallback"
+            start_generation(prompt, persona=label)  # ⬅️ 아래 9. 에서 스트리밍 출력
+
+# ─────────────────────────────
+# 9. 백그라운드 생성 표시 / 이어쓰기
+# ─────────────────────────────
+# 생성은 JobManager 스레드가 하고, 여기서는 매 실행마다 버퍼를 따라 그린다.
+# 버튼/입력으로 rerun 돼도 작업은 계속되고, 다음 실행이 같은 job id 로 다시 이어 그린다.
+if st.session_state.get("active_job"):
+    job = get_job_manager().get(st.session_state.active_job)
+    if job is None:
+        st.session_state.active_job = None
+        st.warning("⚠️ 생성 작업을 찾을 수 없습니다 (서버 재시작 등). 새 상담을 시작해 주세요.")
+    else:
         with st.chat_message("assistant"):
-            st.markdown("### 📈 생성된 마케팅 전략 결과")
+            st.markdown("### ➕ 이어서 생성한 내용" if job.parent else "### 📈 생성된 마케팅 전략 결과")
             content_placeholder = st.empty()
-            result = stream_gemini(prompt, output_placeholder=content_placeholder)  # ⬅️ 스트리밍 출력
+            result = follow_job(job, output_placeholder=content_placeholder)
+            st.session_state.active_job = None
             if result:
-                summary_points = extract_executive_summary(result)
-                if summary_points:
-                    summary_markdown = "#### ⚡ 핵심 요약\n\n" + "\n".join(
-                        f"- {point}" for point in summary_points
-                    )
-                    combined_result = f"{summary_markdown}\n\n---\n\n{result}"
-                    content_placeholder.markdown(combined_result)
-                    st.session_state.chat_history.append(
-                        {"role": "assistant", "content": combined_result}
-                    )
-                else:
-                    st.session_state.chat_history.append({"role": "assistant", "content": result})
+                show_result(result, content_placeholder, summarize=not job.parent)
+                if not job.parent:
+                    archive_plan(result, persona=job.persona, model=job.model)
+            if job.finish_reason == "MAX_TOKENS":
+                st.session_state.continuable_job = job.id
+
+if st.session_state.get("active_group"):
+    group = st.session_state.active_group
+    jobs = [get_job_manager().get(jid) for jid in group["jobs"]]
+    if any(job is None for job in jobs):
+        st.session_state.active_group = None
+        st.warning("⚠️ 생성 작업을 찾을 수 없습니다 (서버 재시작 등). 새 상담을 시작해 주세요.")
+    else:
+        with st.chat_message("assistant"):
+            st.markdown("### 🔀 생성된 마케팅 전략 비교")
+            ranking_placeholder = st.empty()
+            placeholders = []
+            for tab in st.tabs(group["labels"]):
+                with tab:
+                    placeholders.append(st.empty())
+            results = follow_jobs(jobs, placeholders)
+            st.session_state.active_group = None
+            plans = [(label, text) for label, text in zip(group["labels"], results) if text]
+            for job, text in zip(jobs, results):
+                archive_plan(text, persona=job.persona, model=job.model)
+            if plans:
+                ranked = rank_plans(plans)
+                table = ranking_markdown(ranked)
+                ranking_placeholder.markdown(table)
+                best_label = ranked[0][0]
+                st.session_state.chat_history.append({
+                    "role": "assistant",
+                    "content": f"{table}\n\n---\n\n### 🥇 {best_label}\n\n{dict(plans)[best_label]}",
+                })
+
+if st.session_state.get("continuable_job"):
+    st.info("ℹ️ 자동 이어쓰기 후에도 응답이 길어 중간에 잘렸어요. 아래 버튼으로 이어서 생성할 수 있어요.")
+    if st.button("➕ 이어서 더 생성"):
+        job = get_job_manager().continue_job(st.session_state.continuable_job)
+        st.session_state.continuable_job = None
+        if job is None:
+            st.warning("⚠️ 이어쓸 작업을 찾을 수 없습니다. 새 상담을 시작해 주세요.")
+        else:
+            st.session_state.active_job = job.id
+            st.rerun()
@@ -0,0 +1,278 @@
+"""
+생성 텔레메트리 (프로세스 안 히스토그램 레지스트리 + Prometheus 텍스트 / 롤링 JSONL)
+
+JobManager 가 작업이 끝날 때마다 이벤트 하나를 남긴다.
+- 히스토그램 (model, persona 라벨): 첫 토큰까지 시간(TTFT), 전체 생성 시간, 대기열 시간, 초당 출력 토큰
+- 카운터: 요청 수 (model, status, finish_reason, cache), 에러 유형
+- 이벤트는 JSONL 파일에 한 줄씩 (max_bytes 넘으면 .1, .2 ... 로 밀어냄) → 프로세스가 여럿이어도 관리자 화면이 합쳐서 봄
+- METRICS_PORT 를 주면 http://host:port/metrics 로 Prometheus 텍스트를 내보낸다
+
+  telemetry = get_telemetry()
+  telemetry.record({"model": ..., "persona": ..., "status": "done", "ttft_s": 0.8, ...})
+  telemetry.registry.quantiles("gen_ttft_seconds", by="model")   # {model: {"p50": .., "p90": .., "p99": .., "count": n}}
+  print(telemetry.registry.prometheus_text())
+"""
+import os
+import json
+import time
+import bisect
+import threading
+from pathlib import Path
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_JSONL_PATH = os.environ.get(
+    "METRICS_JSONL", str(Path(__file__).resolve().parent / ".cache" / "generation_metrics.jsonl")
+)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60, 120, 300, 600)
+RATE_BUCKETS = (1, 5, 10, 20, 50, 100, 150, 200, 300, 500, 1000, 2000, 5000)
+
+# 이벤트 필드 → 히스토그램 (이름, 버킷, 설명). 캐시 히트는 생성 속도가 아니므로 cache="none" 일 때만 관측
+HISTOGRAMS = {
+    "ttft_s": ("gen_ttft_seconds", LATENCY_BUCKETS, "첫 조각까지 시간 (작업 시작 기준)"),
+    "duration_s": ("gen_duration_seconds", LATENCY_BUCKETS, "작업 시작부터 끝까지 시간"),
+    "queue_s": ("gen_queue_seconds", LATENCY_BUCKETS, "스레드 풀 대기 시간"),
+    "tokens_per_s": ("gen_tokens_per_second", RATE_BUCKETS, "첫 조각 이후 초당 출력 토큰"),
+}
+COUNT_LABELS = ("model", "status", "finish_reason", "cache")
+
+# 백엔드가 토큰 수를 안 주면 글자 수로 어림 (Gemini 한국어 응답 기준 대략치)
+CHARS_PER_TOKEN = 3.0
+
+
+def estimate_tokens(text):
+    return max(1, round(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+# ─────────────────────────────
+# 레지스트리
+# ─────────────────────────────
+class Histogram:
+    """고정 버킷 히스토그램 (Prometheus 와 같은 le 버킷, +Inf 포함)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """버킷 안 선형 보간 (Prometheus histogram_quantile 과 같은 방식). 마지막 버킷이면 상한값."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lo = self.buckets[i - 1] if i else 0.0
+                return lo + (self.buckets[i] - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+class Registry:
+    """(이름, 라벨) → Histogram / 카운터. 스레드 안전."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist = {}       # (name, labels tuple) → Histogram
+        self._counters = {}   # (name, labels tuple) → float
+        self._help = {}
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, help="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._hist.get(key)
+            if hist is None:
+                hist = self._hist[key] = Histogram(buckets)
+                self._help.setdefault(name, ("histogram", help))
+            hist.observe(value)
+
+    def inc(self, name, value=1, help="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._help.setdefault(name, ("counter", help))
+
+    def histogram(self, name, **match):
+        """라벨이 match 와 맞는 히스토그램을 합친 것 (없으면 None)."""
+        merged = None
+        with self._lock:
+            for (n, labels), hist in self._hist.items():
+                d = dict(labels)
+                if n == name and all(d.get(k) == v for k, v in match.items()):
+                    merged = merged or Histogram(hist.buckets)
+                    merged.merge(hist)
+        return merged
+
+    def quantiles(self, name, qs=(0.5, 0.9, 0.99), by="model"):
+        """by 라벨 값별 {"p50": .., "p90": .., "p99": .., "count": n}."""
+        with self._lock:
+            values = sorted({dict(labels).get(by) for n, labels in self._hist if n == name} - {None})
+        out = {}
+        for v in values:
+            hist = self.histogram(name, **{by: v})
+            out[v] = {**{f"p{round(q * 100)}": hist.quantile(q) for q in qs}, "count": hist.count}
+        return out
+
+    def counters(self, name):
+        with self._lock:
+            return {labels: v for (n, labels), v in self._counters.items() if n == name}
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (0.0.4)."""
+        lines = []
+        with self._lock:
+            names = sorted(self._help)
+            for name in names:
+                kind, help = self._help[name]
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                if kind == "counter":
+                    for (n, labels), v in sorted(self._counters.items()):
+                        if n == name:
+                            lines.append(f"{name}{_labels(labels)} {v:g}")
+                    continue
+                for (n, labels), hist in sorted(self._hist.items(), key=lambda kv: kv[0]):
+                    if n != name:
+                        continue
+                    cum = 0
+                    for le, c in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                        cum += c
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', f'{le:g}' if le != '+Inf' else le),))} {cum}")
+                    lines.append(f"{name}_sum{_labels(labels)} {hist.sum:g}")
+                    lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+
+# ─────────────────────────────
+# 롤링 JSONL
+# ─────────────────────────────
+class JsonlSink:
+    """이벤트를 한 줄씩 추가. 파일이 max_bytes 를 넘으면 path.1 → path.2 ... 로 밀고 backups 개만 남긴다."""
+
+    def __init__(self, path=DEFAULT_JSONL_PATH, max_bytes=5 * 2**20, backups=3):
+        self.path = Path(path)
+        self.max_bytes, self.backups = max_bytes, backups
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, event):
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _rotate(self):
+        for i in range(self.backups, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i - 1}") if i > 1 else self.path
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i}"))
+
+
+def read_events(path=DEFAULT_JSONL_PATH, since=None, backups=3):
+    """백업 파일부터 오래된 순으로 이벤트 dict 리스트 (since 는 epoch 초)."""
+    path = Path(path)
+    files = [path.with_name(f"{path.name}.{i}") for i in range(backups, 0, -1)] + [path]
+    events = []
+    for p in files:
+        if not p.exists():
+            continue
+        with open(p, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # 쓰는 중에 잘린 마지막 줄
+                if since is None or event.get("ts", 0) >= since:
+                    events.append(event)
+    return events
+
+
+# ─────────────────────────────
+# 생성 텔레메트리
+# ─────────────────────────────
+class GenerationTelemetry:
+    def __init__(self, registry=None, sink=None):
+        self.registry = registry or Registry()
+        self.sink = sink
+
+    def record(self, event):
+        """작업 하나의 이벤트 (ts, model, persona, status, finish_reason, cache, ttft_s, duration_s, ...)."""
+        event = {"ts": round(time.time(), 3), **event}
+        model, persona = event.get("model") or "-", event.get("persona") or "-"
+        self.registry.inc("gen_requests_total", help="끝난 생성 작업 수",
+                          **{k: event.get(k) or "-" for k in COUNT_LABELS})
+        if event.get("error"):
+            self.registry.inc("gen_errors_total", help="생성 에러 (예외 유형별)", model=model, error=event["error"])
+        if (event.get("cache") or "none") == "none":
+            for field, (name, buckets, help) in HISTOGRAMS.items():
+                if event.get(field) is not None:
+                    self.registry.observe(name, event[field], buckets, help, model=model, persona=persona)
+        if event.get("output_tokens"):
+            self.registry.inc("gen_output_tokens_total", event["output_tokens"], help="출력 토큰 수", model=model)
+        if self.sink is not None:
+            try:
+                self.sink.write(event)
+            except OSError:
+                pass  # 디스크 문제로 생성이 실패하면 안 된다
+        return event
+
+    def serve(self, port, host="0.0.0.0"):
+        return serve_metrics(self.registry, port, host)
+
+
+def serve_metrics(registry, port, host="0.0.0.0"):
+    """GET /metrics → Prometheus 텍스트. 백그라운드 스레드, server.shutdown() 으로 종료."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = registry.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
+
+
+@lru_cache(maxsize=None)
+def get_telemetry():
+    """프로세스에 하나 (streamlit_app 과 관리자 페이지가 공유). METRICS_JSONL=off 면 파일 기록 안 함."""
+    sink = None if DEFAULT_JSONL_PATH == "off" else JsonlSink(DEFAULT_JSONL_PATH)
+    telemetry = GenerationTelemetry(sink=sink)
+    if os.environ.get("METRICS_PORT"):
+        telemetry.serve(int(os.environ["METRICS_PORT"]))
+    return telemetry
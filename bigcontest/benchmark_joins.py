@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Join benchmark for early_warning_methods.data_transform: string/Period pd.merge vs encoded merge-joins
+
+For each merchant count, builds a synthetic panel in memory (synthetic_data.generate_chunk), runs
+prepare_frames in both key modes and times join_frames on the prepared frames:
+  - legacy:  ENCODED_MCT strings, TA_YM Period[M]; outer pd.merge KPI x customer, left pd.merge info
+  - encoded: int32 merchant codes, int16 month ordinals; merge_outer_sorted + merge_left_by_code
+             + decode_keys back to strings / Period[M]
+recording wall time, the peak traced allocation (tracemalloc) of the join and the deep size of the
+prepared / joined frames, and checks that both modes give the same frame. --full also times data_transform end to end in both modes.
+
+Usage:
+  python benchmark_joins.py --sizes 10000 100000 --months 24
+  python benchmark_joins.py --sizes 2000 --full
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+import early_warning_methods as ew
+from synthetic_data import generate_chunk
+
+
+def _measure(fn: Callable[[], any], trace: bool = True) -> Tuple[any, float, float]:
+    """(result, seconds, peak traced MB). tracemalloc slows pandas down a lot, so long stages skip it."""
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    peak = float("nan")
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def _panel(n_merchants: int, months: int, seed: int) -> Dict[str, pd.DataFrame]:
+    chunk = generate_chunk(0, n_merchants, pd.period_range("2023-01", periods=months, freq="M"), seed=seed)
+    # same dtypes as data_extract (every column read as str), rows shuffled so no side arrives pre-sorted
+    return {k: v.astype(str).where(v.notna()).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+            for k, v in chunk.items()}
+
+
+def _frames_mb(frames: List[pd.DataFrame]) -> float:
+    return sum(f.memory_usage(deep=True).sum() for f in frames) / 2**20
+
+
+def bench_size(n_merchants: int, months: int, full: bool = False, seed: int = 0) -> List[Dict[str, any]]:
+    d = _panel(n_merchants, months, seed)
+
+    rows, outputs = [], {}
+
+    def record(stage: str, mode: str, n_rows: int, secs: float, peak: float, frames_mb: float = float("nan")):
+        rows.append({"merchants": n_merchants, "rows": n_rows, "stage": stage, "mode": mode,
+                     "seconds": round(secs, 3), "peak_mb": round(peak, 1), "frames_mb": round(frames_mb, 1)})
+        print(f"[BENCH] {n_merchants:>9,} merchants  {stage:<14} {mode:<8} {secs:8.2f}s  "
+              f"peak {peak:8.1f} MB  frames {frames_mb:8.1f} MB")
+
+    for mode, enc in [("legacy", False), ("encoded", True)]:
+        frames, secs, _ = _measure(lambda: ew.prepare_frames(d, key_encoding=enc), trace=False)
+        record("prepare", mode, len(frames[0]), secs, float("nan"), _frames_mb(frames[:3]))
+        outputs[mode], secs, peak = _measure(lambda frames=frames: ew.join_frames(*frames))
+        record("join", mode, len(outputs[mode]), secs, peak, _frames_mb([outputs[mode]]))
+        del frames
+    pd.testing.assert_frame_equal(outputs["legacy"], outputs["encoded"])
+
+    if full:
+        for mode, enc in [("legacy", False), ("encoded", True)]:
+            outputs[mode], secs, _ = _measure(lambda: ew.data_transform(d, key_encoding=enc), trace=False)
+            record("data_transform", mode, len(outputs[mode]), secs, float("nan"))
+        pd.testing.assert_frame_equal(outputs["legacy"], outputs["encoded"])
+
+    print("[PARITY] OK")
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Early Warning — join benchmark (pd.merge vs encoded merge-joins)")
+    ap.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000])
+    ap.add_argument("--months", type=int, default=24)
+    ap.add_argument("--full", action="store_true", help="also time data_transform end to end in both modes")
+    ap.add_argument("--out", default=None, help="optional CSV for the results")
+    args = ap.parse_args()
+
+    rows = []
+    for n in args.sizes:
+        rows += bench_size(n, args.months, full=args.full)
+    table = pd.DataFrame(rows).pivot_table(index=["merchants", "stage"], columns="mode",
+                                           values=["seconds", "peak_mb", "frames_mb"], sort=False, dropna=False)
+    print(table.to_string())
+    if args.out:
+        pd.DataFrame(rows).to_csv(args.out, index=False, encoding="utf-8")
+        print(f"\n[SAVED] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline load test for the Gemini callers against app/fake_llm_server.py (no API key, no network)
+
+  batch:  ai_caller.run_batch (asyncio, semaphore, token bucket, jittered retry) over N personas;
+          throughput, per-call latency percentiles, 429s absorbed by the retry loop
+  stream: the streamlit_app path: S sessions submit to one generation_jobs.JobManager with C workers
+          and poll their job buffers; time to first chunk (queueing included) and total time percentiles,
+          finish reasons
+
+The fake server is started in-process on a free port unless --url points at a running one.
+
+Usage:
+  python benchmark_llm.py --personas 1000 --concurrency 32 --rpm 6000 --latency_ms 800 --p429 0.05
+  python benchmark_llm.py --mode stream --sessions 200 --concurrency 50 --max_tokens 800
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+import ai_caller
+from fake_llm_server import add_server_args, server_config, start_server
+from generation_jobs import ERROR, JobManager
+from llm_backend import FakeServerBackend, RateLimitError
+from persona_generator import generate_personas
+
+
+def _pct(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"n": 0}
+    a = np.asarray(values) * 1000
+    return {"n": len(a), "p50_ms": round(float(np.percentile(a, 50)), 1),
+            "p95_ms": round(float(np.percentile(a, 95)), 1), "p99_ms": round(float(np.percentile(a, 99)), 1),
+            "max_ms": round(float(a.max()), 1)}
+
+
+def _personas(n: int) -> List[Dict[str, str]]:
+    # 540 combinations at most; beyond that repeat them with a numbered prompt so nothing is shared
+    base = generate_personas(limit=None)
+    return [{**p, "prompt": p["prompt"] + (f"\n\n(#{i})" if i >= len(base) else "")}
+            for i, p in ((i, base[i % len(base)]) for i in range(n))]
+
+
+class _TimedBackend:
+    """Records the latency and outcome of every agenerate call the batch runner makes."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.latencies, self.rate_limited, self.errors = [], 0, 0
+
+    async def agenerate(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            resp = await self.inner.agenerate(*args, **kwargs)
+        except RateLimitError:
+            self.rate_limited += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        self.latencies.append(time.perf_counter() - t0)
+        return resp
+
+
+def bench_batch(url: str, n: int, concurrency: int, rpm: float, max_tokens: int, retries: int) -> Dict[str, any]:
+    backend = _TimedBackend(FakeServerBackend(url))
+    personas = _personas(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        _stdout, sys.stdout = sys.stdout, open(os.devnull, "w")  # run_batch prints one line per persona
+        t0 = time.perf_counter()
+        try:
+            ok, failed, _ = asyncio.run(ai_caller.run_batch(
+                personas, os.path.join(tmp, "out.csv"), concurrency=concurrency, rpm=rpm, retries=retries,
+                backend=backend, max_tokens=max_tokens))
+        finally:
+            sys.stdout.close()
+            sys.stdout = _stdout
+        wall = time.perf_counter() - t0
+    return {"mode": "batch", "personas": n, "concurrency": concurrency, "rpm": rpm, "ok": ok, "failed": failed,
+            "wall_s": round(wall, 2), "personas_per_s": round(n / wall, 2),
+            "calls": len(backend.latencies) + backend.rate_limited + backend.errors,
+            "http_429": backend.rate_limited, "call_latency": _pct(backend.latencies)}
+
+
+def bench_stream(url: str, sessions: int, concurrency: int, max_tokens: int) -> Dict[str, any]:
+    # the Streamlit path: each session submits a job to one shared JobManager pool and follows its buffer
+    manager = JobManager(max_workers=concurrency, backend=FakeServerBackend(url))
+    prompts = [p["prompt"] for p in _personas(sessions)]
+
+    def follow(job) -> Tuple[Optional[float], Optional[float], int, str]:
+        first, chunks, pos = None, 0, 0
+        while True:
+            pieces, pos = job.read(pos)
+            if pieces and first is None:
+                first = time.time() - job.created_at
+            chunks += len(pieces)
+            if job.done and not job.read(pos)[0]:
+                break
+            job.wait(0.05, pos)
+        if job.status == ERROR:
+            return None, None, 0, "429" if isinstance(job.error, RateLimitError) else type(job.error).__name__
+        return first, job.finished_at - job.created_at, chunks, job.finish_reason
+
+    t0 = time.perf_counter()
+    jobs = []
+    for i, prompt in enumerate(prompts):
+        jobs.append(manager.submit(f"session-{i}", prompt, ai_caller.DEFAULT_MODEL, use_cache=False,
+                                   max_tokens=max_tokens))
+    with ThreadPoolExecutor(max_workers=min(sessions, 64)) as ex:  # one UI poller per session
+        results = list(ex.map(follow, jobs))
+    wall = time.perf_counter() - t0
+    manager.shutdown()
+    reasons: Dict[str, int] = {}
+    for r in results:
+        reasons[r[3]] = reasons.get(r[3], 0) + 1
+    return {"mode": "stream", "sessions": sessions, "workers": concurrency, "wall_s": round(wall, 2),
+            "sessions_per_s": round(sessions / wall, 2), "finish_reasons": reasons,
+            "chunks_per_session": round(float(np.mean([r[2] for r in results])), 1),
+            "time_to_first_chunk": _pct([r[0] for r in results if r[0] is not None]),
+            "stream_total": _pct([r[1] for r in results if r[1] is not None])}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline load test for the Gemini batch runner and streaming path")
+    ap.add_argument("--mode", choices=["batch", "stream", "both"], default="both")
+    ap.add_argument("--url", default=None, help="use a running fake_llm_server.py instead of starting one")
+    ap.add_argument("--personas", type=int, default=1000, help="batch size")
+    ap.add_argument("--sessions", type=int, default=100, help="streaming sessions")
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--rpm", type=float, default=6000, help="token bucket limit for the batch runner")
+    ap.add_argument("--retries", type=int, default=5)
+    ap.add_argument("--max_tokens", type=int, default=2048)
+    ap.add_argument("--out", default=None, help="optional JSON for the results")
+    add_server_args(ap)
+    args = ap.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = start_server("127.0.0.1", 0, **server_config(args))
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"[FAKE LLM] {url}  {server_config(args)}")
+
+    results = []
+    try:
+        if args.mode in ["batch", "both"]:
+            results.append(bench_batch(url, args.personas, args.concurrency, args.rpm, args.max_tokens, args.retries))
+            print(f"[BENCH] {json.dumps(results[-1], ensure_ascii=False)}")
+        if args.mode in ["stream", "both"]:
+            results.append(bench_stream(url, args.sessions, args.concurrency, args.max_tokens))
+            print(f"[BENCH] {json.dumps(results[-1], ensure_ascii=False)}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n[SAVED] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
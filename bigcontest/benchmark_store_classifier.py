@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Store-name classification benchmark: keyword substring scans vs the Aho-Corasick automaton (app/store_classifier.py)
+
+Builds N synthetic merchant names (brand / food keyword / region stems, branch suffixes, punctuation)
+and times, over the same names:
+  - scan:      classify_hpsn_mct_scan + is_franchise_scan per name (the original any(k in nm ...) loops)
+  - automaton: classify_store per name (one pass for business type and franchise flag)
+  - batch:     classify_names over a pandas Series (factorize, classify each distinct name once)
+for a registry with mostly distinct names and one where --distinct names repeat (chain stores),
+and checks that all three give the same labels.
+
+Usage:
+  python benchmark_store_classifier.py --names 1000000
+  python benchmark_store_classifier.py --names 200000 --distinct 20000 --out output/store_classifier_bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from store_classifier import (AMBIGUOUS_NEGATIVES, BRAND_KEYWORDS, CATEGORY_KEYWORDS, classify_hpsn_mct_scan,
+                              classify_names, classify_store, is_franchise_scan)
+
+REGIONS = ["성수", "왕십리", "행당", "종로", "강남", "홍대", "신촌", "잠실", "마포", "전주"]
+FILLERS = ["행복", "할매", "원조", "명가", "하루", "Kitchen", "bistro", "집", "식당", "상회", "푸드"]
+SUFFIXES = ["점", " 본점", "역점", "(직영)", " 2호점", "", "", ""]
+
+
+def make_names(n: int, distinct: int, seed: int = 0) -> List[str]:
+    """n names; distinct=0 means (almost) all distinct, otherwise drawn from `distinct` base names."""
+    rng = np.random.default_rng(seed)
+    stems = np.array(sorted(BRAND_KEYWORDS) + [w for _, ws in CATEGORY_KEYWORDS for w in ws]
+                     + sorted(AMBIGUOUS_NEGATIVES) + FILLERS)
+    m = distinct or n
+    names = pd.Series(rng.choice(REGIONS, m)).str.cat(
+        [pd.Series(rng.choice(stems, m)), pd.Series(rng.choice(FILLERS + [""] * 5, m)),
+         pd.Series(rng.choice(stems, m)), pd.Series(rng.choice(SUFFIXES, m))], sep="")
+    if not distinct:
+        names = names + pd.Series(rng.integers(0, 10000, m).astype(str))
+    names = names.tolist()
+    if distinct:
+        names = [names[i] for i in rng.integers(0, distinct, n)]
+    return names
+
+
+def _time(fn: Callable[[], any]):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def bench(n: int, distinct: int) -> Dict[str, any]:
+    names = make_names(n, distinct)
+    scan, t_scan = _time(lambda: [(classify_hpsn_mct_scan(x), is_franchise_scan(x)) for x in names])
+    auto, t_auto = _time(lambda: [classify_store(x) for x in names])
+    series = pd.Series(names)
+    batch, t_batch = _time(lambda: classify_names(series))
+
+    expected = pd.DataFrame(scan, columns=["업종", "프랜차이즈"])
+    same = (auto == scan
+            and (batch["업종"].to_numpy() == expected["업종"].to_numpy()).all()
+            and (batch["프랜차이즈여부"].eq("프랜차이즈").to_numpy() == expected["프랜차이즈"].to_numpy()).all())
+    return {"names": n, "distinct": int(series.nunique()), "same_labels": bool(same),
+            "scan_s": round(t_scan, 2), "automaton_s": round(t_auto, 2), "batch_s": round(t_batch, 2),
+            "scan_us_per_name": round(t_scan / n * 1e6, 2), "automaton_us_per_name": round(t_auto / n * 1e6, 2),
+            "batch_us_per_name": round(t_batch / n * 1e6, 2),
+            "franchise_share": round(float(expected["프랜차이즈"].mean()), 3),
+            "business_types": expected["업종"].value_counts().to_dict()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Store-name classification benchmark (scan vs Aho-Corasick)")
+    ap.add_argument("--names", type=int, default=1_000_000)
+    ap.add_argument("--distinct", type=int, default=50_000, help="distinct names for the repeated-registry run")
+    ap.add_argument("--out", default=None, help="optional JSON for the results")
+    args = ap.parse_args()
+
+    results = []
+    for distinct in [0, args.distinct]:
+        results.append(bench(args.names, distinct))
+        print(f"[BENCH] {json.dumps(results[-1], ensure_ascii=False)}")
+        if not results[-1]["same_labels"]:
+            raise SystemExit("[FAIL] automaton labels differ from the keyword scan")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n[SAVED] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rendering benchmark for the streamlit_app Markdown placeholder: per-chunk re-render vs RenderThrottle
+
+Replays a synthetic Gemini stream (fake_llm_server.fake_text, --tokens long, --chunk_tokens per piece,
+arriving at --tokens_per_s on a simulated clock, so nothing sleeps) into a placeholder that does the
+server-side work of st.empty().markdown: build a ForwardMsg delta with the whole body and serialize it
+for the websocket. Reports, per strategy, websocket messages, bytes sent and server CPU time:
+  - per_chunk: placeholder.markdown(full_text + cursor) on every piece (string +=), the old loop
+  - throttle:  app/stream_render.RenderThrottle at --interval (fixed, no growth)
+  - adaptive:  RenderThrottle defaults (interval grows with the body, capped at --max_interval)
+
+Requires streamlit (app/requirements.txt) for the ForwardMsg protobuf.
+
+Usage:
+  python benchmark_stream_render.py --tokens 65000
+  python benchmark_stream_render.py --tokens 8000 --tokens_per_s 60 --out output/stream_render_bench.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from fake_llm_server import fake_text
+from stream_render import CURSOR, RenderThrottle
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _WebsocketPlaceholder:
+    """What one placeholder.markdown call costs the Streamlit server: a full-body delta, serialized."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.last_body = None
+
+    def markdown(self, body: str):
+        msg = ForwardMsg()
+        msg.delta.new_element.markdown.body = body
+        self.bytes += len(msg.SerializeToString())
+        self.messages += 1
+        self.last_body = body
+
+
+def make_chunks(tokens: int, chunk_tokens: int) -> List[str]:
+    words = fake_text("benchmark_stream_render", tokens).split(" ")
+    return [(" " if i else "") + " ".join(words[i:i + chunk_tokens]) for i in range(0, len(words), chunk_tokens)]
+
+
+def per_chunk(chunks: List[str], placeholder: _WebsocketPlaceholder, clock: _Clock, step: float) -> str:
+    full_text = ""
+    for piece in chunks:
+        clock.now += step
+        full_text += piece
+        placeholder.markdown(full_text + CURSOR)
+    placeholder.markdown(full_text)
+    return full_text
+
+
+def throttled(make: Callable[[_WebsocketPlaceholder, _Clock], RenderThrottle]):
+    def run(chunks: List[str], placeholder: _WebsocketPlaceholder, clock: _Clock, step: float) -> str:
+        render = make(placeholder, clock)
+        for piece in chunks:
+            clock.now += step
+            render.add(piece)
+        return render.finish()
+    return run
+
+
+def bench(name: str, run, chunks: List[str], step: float) -> Dict[str, any]:
+    placeholder, clock = _WebsocketPlaceholder(), _Clock()
+    c0, t0 = time.process_time(), time.perf_counter()
+    text = run(chunks, placeholder, clock, step)
+    cpu, wall = time.process_time() - c0, time.perf_counter() - t0
+    assert placeholder.last_body == text, f"{name}: final render differs from the streamed text"
+    return {"strategy": name, "chunks": len(chunks), "chars": len(text), "stream_s": round(clock.now, 1),
+            "ws_messages": placeholder.messages, "ws_mb": round(placeholder.bytes / 2**20, 2),
+            "server_cpu_s": round(cpu, 3), "wall_s": round(wall, 3)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="streamlit_app rendering benchmark (per-chunk vs throttled)")
+    ap.add_argument("--tokens", type=int, default=65000, help="response length in tokens (words)")
+    ap.add_argument("--chunk_tokens", type=int, default=12)
+    ap.add_argument("--tokens_per_s", type=float, default=150.0, help="simulated stream speed")
+    ap.add_argument("--interval", type=float, default=0.1, help="fixed throttle interval")
+    ap.add_argument("--max_interval", type=float, default=2.0, help="cap for the adaptive interval")
+    ap.add_argument("--out", default=None, help="optional JSON for the results")
+    args = ap.parse_args()
+
+    chunks = make_chunks(args.tokens, args.chunk_tokens)
+    step = args.chunk_tokens / args.tokens_per_s
+    strategies = [
+        ("per_chunk", per_chunk),
+        ("throttle", throttled(lambda p, c: RenderThrottle(p, interval=args.interval, max_interval=args.interval,
+                                                           clock=c))),
+        ("adaptive", throttled(lambda p, c: RenderThrottle(p, interval=args.interval,
+                                                           max_interval=args.max_interval, clock=c))),
+    ]
+    results = []
+    for name, run in strategies:
+        results.append(bench(name, run, chunks, step))
+        print(f"[BENCH] {json.dumps(results[-1], ensure_ascii=False)}")
+
+    base = results[0]
+    for r in results[1:]:
+        print(f"[{r['strategy'].upper()}] messages x{base['ws_messages'] / r['ws_messages']:.0f} fewer, "
+              f"bytes x{base['ws_mb'] / max(r['ws_mb'], 1e-9):.1f} fewer, "
+              f"server CPU x{base['server_cpu_s'] / max(r['server_cpu_s'], 1e-9):.1f} less")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n[SAVED] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
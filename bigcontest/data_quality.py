@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-flight data-quality and drift check for the monthly KPI / customer CSVs
+
+Streams each file once in fixed-size Arrow record batches (bounded memory, multi-threaded parse) and checks
+  - schema: header against BUCKET_COLS / RATE_COLS_0_100 (checked before any data is read)
+  - keys: null ENCODED_MCT, unparsable TA_YM
+  - per column: null rate, SPECIAL_MISSING sentinel rate, non-numeric rate, values outside 0-100
+  - bucket columns: labels unseen in the reference (or unparsable by parse_bucket without one)
+  - drift: PSI of every rate / bucket column against the stored reference histograms
+Hard failures exit with status 1, so the multi-hour ETL never starts on a bad file. With
+--fail_fast the scan stops at the first batch where a hard check already fails.
+
+Usage:
+  # profile known-good files once
+  python data_quality.py --build_reference --kpi ref/big_data_set2.csv --cust ref/big_data_set3.csv --reference ./out/reference_profile.json
+  # check a new delivery
+  python data_quality.py --kpi new/big_data_set2.csv --cust new/big_data_set3.csv --reference ./out/reference_profile.json --report ./out/data_quality.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from early_warning_methods import BUCKET_COLS, RATE_COLS_0_100, SPECIAL_MISSING, parse_bucket
+
+
+ID, TIME = "ENCODED_MCT", "TA_YM"
+
+EXPECTED_COLUMNS = {
+    "kpi": [ID, TIME] + BUCKET_COLS + RATE_COLS_0_100[:7],
+    "cust": [ID, TIME] + RATE_COLS_0_100[7:],
+}
+
+# fine grid for the reference pass; coarsened to ~equal-mass bins when the profile is saved
+FINE_EDGES = np.concatenate([[-np.inf], np.arange(0.0, 100.5, 0.5), [150.0, 200.0, 300.0, 500.0, 1000.0, np.inf]])
+PSI_BINS = 10
+PSI_EPS = 1e-4
+
+THRESHOLDS = {
+    "psi_warn": 0.10,
+    "psi_fail": 0.25,
+    "missing_jump": 0.10,     # null + sentinel rate above the reference rate by more than this -> FAIL
+    "missing_max": 0.50,      # absolute cap when there is no reference
+    "non_numeric_max": 0.001,
+    "unknown_label_max": 0.001,
+    "bad_key_max": 0.001,
+}
+
+
+# ------------------------
+# Streaming accumulator
+# ------------------------
+
+def _to_float(arr: pa.ChunkedArray) -> np.ndarray:
+    """String column -> float64 (NaN for null / non-numeric), commas stripped like to_numeric_smart."""
+    arr = pc.replace_substring(arr, ",", "")
+    try:
+        return pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pd.to_numeric(arr.to_pandas(), errors="coerce").to_numpy(dtype=np.float64)
+
+
+class FileProfile:
+    """Running counts for one file kind; every update is O(batch) and the state is O(columns x bins)."""
+
+    def __init__(self, kind: str, columns: List[str], edges: Optional[Dict[str, List[float]]] = None):
+        self.kind = kind
+        self.rate_cols = [c for c in RATE_COLS_0_100 if c in columns]
+        self.bucket_cols = [c for c in BUCKET_COLS if c in columns]
+        self.edges = {c: np.asarray(edges[c] if edges and c in edges else FINE_EDGES, dtype=float)
+                      for c in self.rate_cols}
+        self.n_rows = 0
+        self.bad_id = 0
+        self.bad_month = 0
+        self.months: Dict[str, int] = {}
+        self.null = {c: 0 for c in self.rate_cols + self.bucket_cols}
+        self.sentinel = {c: 0 for c in self.rate_cols}
+        self.non_numeric = {c: 0 for c in self.rate_cols}
+        self.out_of_range = {c: 0 for c in self.rate_cols}
+        self.hist = {c: np.zeros(len(self.edges[c]) - 1, dtype=np.int64) for c in self.rate_cols}
+        self.labels: Dict[str, Dict[str, int]] = {c: {} for c in self.bucket_cols}
+
+    def update(self, batch: pa.RecordBatch) -> None:
+        n = batch.num_rows
+        self.n_rows += n
+        names = batch.schema.names
+
+        if ID in names:
+            self.bad_id += batch.column(names.index(ID)).null_count
+        if TIME in names:
+            ym = pc.utf8_trim_whitespace(batch.column(names.index(TIME)))
+            self.bad_month += n - (pc.sum(pc.match_substring_regex(ym, r"^\d{4}(0[1-9]|1[0-2])$")).as_py() or 0)
+            for v in pc.value_counts(ym).to_pylist():
+                self.months[str(v["values"])] = self.months.get(str(v["values"]), 0) + v["counts"]
+
+        for c in self.rate_cols:
+            raw = batch.column(names.index(c))
+            vals = _to_float(raw)
+            is_null = np.asarray(raw.is_null(), dtype=bool)
+            nan = np.isnan(vals)
+            sent = np.isin(vals, list(SPECIAL_MISSING))
+            self.null[c] += int(is_null.sum())
+            self.non_numeric[c] += int((nan & ~is_null).sum())
+            self.sentinel[c] += int(sent.sum())
+            valid = vals[~nan & ~sent]
+            self.out_of_range[c] += int(((valid < 0) | (valid > 100)).sum())
+            self.hist[c] += np.histogram(valid, bins=self.edges[c])[0]
+
+        for c in self.bucket_cols:
+            raw = batch.column(names.index(c))
+            self.null[c] += raw.null_count
+            counts = self.labels[c]
+            for v in pc.value_counts(raw.drop_null()).to_pylist():
+                counts[v["values"]] = counts.get(v["values"], 0) + v["counts"]
+
+    def missing_rate(self, c: str) -> float:
+        return (self.null[c] + self.sentinel.get(c, 0)) / max(self.n_rows, 1)
+
+
+def scan_file(path: str, kind: str, edges: Optional[Dict[str, List[float]]] = None,
+              block_size: int = 32 << 20, check=None, sep: str = ",") -> Tuple[FileProfile, List[str], List[str]]:
+    """Stream one CSV. Returns (profile, missing expected columns, unexpected columns).
+
+    `check(profile) -> bool` is called after every batch; returning False stops the scan (fail fast).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        header = [h.strip() for h in f.readline().rstrip("\n\r").split(sep)]
+    expected = EXPECTED_COLUMNS[kind]
+    missing = [c for c in expected if c not in header]
+    extra = [c for c in header if c not in expected]
+    profile = FileProfile(kind, header, edges)
+    if missing:
+        return profile, missing, extra
+
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=block_size, encoding="utf8"),
+        parse_options=pacsv.ParseOptions(delimiter=sep),
+        convert_options=pacsv.ConvertOptions(column_types={c: pa.string() for c in header},
+                                             include_columns=[c for c in header if c in expected],
+                                             strings_can_be_null=True),
+    )
+    for batch in reader:
+        profile.update(batch)
+        if check is not None and not check(profile):
+            break
+    return profile, missing, extra
+
+
+# ------------------------
+# Reference profile / PSI
+# ------------------------
+
+def _coarsen(edges: np.ndarray, hist: np.ndarray, n_bins: int = PSI_BINS) -> List[float]:
+    """Merge fine bins into about n_bins bins of roughly equal reference mass."""
+    total = hist.sum()
+    if total == 0:
+        return [-math.inf, math.inf]
+    cuts = [-math.inf]
+    acc = 0
+    for i, h in enumerate(hist[:-1]):
+        acc += h
+        if acc >= total / n_bins:
+            cuts.append(float(edges[i + 1]))
+            acc = 0
+    cuts.append(math.inf)
+    return cuts
+
+
+def _rebin(edges: np.ndarray, hist: np.ndarray, new_edges: List[float]) -> np.ndarray:
+    """Sum fine-grid counts into coarse bins whose edges are a subset of the fine edges."""
+    idx = np.searchsorted(edges, new_edges)
+    return np.add.reduceat(hist, idx[:-1]) if len(idx) > 1 else hist.sum(keepdims=True)
+
+
+def profile_to_reference(profile: FileProfile) -> Dict[str, any]:
+    n = max(profile.n_rows, 1)
+    rates = {}
+    for c in profile.rate_cols:
+        cuts = _coarsen(profile.edges[c], profile.hist[c])
+        coarse = _rebin(profile.edges[c], profile.hist[c], cuts)
+        rates[c] = {"missing_rate": profile.missing_rate(c),
+                    "edges": cuts,
+                    "freq": (coarse / max(coarse.sum(), 1)).tolist()}
+    buckets = {}
+    for c in profile.bucket_cols:
+        total = max(sum(profile.labels[c].values()), 1)
+        buckets[c] = {"missing_rate": profile.null[c] / n,
+                      "freq": {k: v / total for k, v in sorted(profile.labels[c].items())}}
+    return {"n_rows": profile.n_rows, "rates": rates, "buckets": buckets}
+
+
+def psi(expected: np.ndarray, actual: np.ndarray, eps: float = PSI_EPS) -> float:
+    """Population stability index between two frequency vectors over the same bins."""
+    e = np.clip(np.asarray(expected, dtype=float), eps, None)
+    a = np.clip(np.asarray(actual, dtype=float), eps, None)
+    e, a = e / e.sum(), a / a.sum()
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+# ------------------------
+# Checks
+# ------------------------
+
+def evaluate(profile: FileProfile, ref: Optional[Dict[str, any]],
+             missing_cols: List[str], extra_cols: List[str],
+             thresholds: Dict[str, float] = THRESHOLDS) -> List[Dict[str, any]]:
+    """One row per finding: {kind, column, check, value, level} with level OK / WARN / FAIL."""
+    rows = []
+    def add(column: str, check: str, value, level: str):
+        rows.append({"file": profile.kind, "column": column, "check": check, "value": value, "level": level})
+
+    for c in missing_cols:
+        add(c, "schema_missing", None, "FAIL")
+    for c in extra_cols:
+        add(c, "schema_unexpected", None, "WARN")
+    if missing_cols:
+        return rows
+
+    n = max(profile.n_rows, 1)
+    add(ID, "null_rate", profile.bad_id / n, "FAIL" if profile.bad_id / n > thresholds["bad_key_max"] else "OK")
+    add(TIME, "unparsable_rate", profile.bad_month / n,
+        "FAIL" if profile.bad_month / n > thresholds["bad_key_max"] else "OK")
+
+    ref_rates = (ref or {}).get("rates", {})
+    ref_buckets = (ref or {}).get("buckets", {})
+    for c in profile.rate_cols:
+        miss = profile.missing_rate(c)
+        r = ref_rates.get(c)
+        limit = r["missing_rate"] + thresholds["missing_jump"] if r else thresholds["missing_max"]
+        add(c, "null_sentinel_rate", miss, "FAIL" if miss > limit else "OK")
+        nn = profile.non_numeric[c] / n
+        add(c, "non_numeric_rate", nn, "FAIL" if nn > thresholds["non_numeric_max"] else "OK")
+        oor = profile.out_of_range[c] / n
+        add(c, "out_of_0_100_rate", oor, "WARN" if oor > 0 else "OK")
+        if r:
+            actual = _rebin(profile.edges[c], profile.hist[c], r["edges"]) \
+                if not np.array_equal(profile.edges[c], r["edges"]) else profile.hist[c]
+            value = psi(r["freq"], actual)
+            add(c, "psi", value, _psi_level(value, thresholds))
+
+    for c in profile.bucket_cols:
+        counts = profile.labels[c]
+        total = max(sum(counts.values()), 1)
+        r = ref_buckets.get(c)
+        if r:
+            unknown = sum(v for k, v in counts.items() if k not in r["freq"])
+            labels = sorted(set(r["freq"]) | set(counts))
+            value = psi([r["freq"].get(k, 0.0) for k in labels], [counts.get(k, 0) / total for k in labels])
+            add(c, "psi", value, _psi_level(value, thresholds))
+            miss = profile.null[c] / n
+            add(c, "null_rate", miss, "FAIL" if miss > r["missing_rate"] + thresholds["missing_jump"] else "OK")
+        else:
+            unknown = sum(v for k, v in counts.items() if parse_bucket(k)[0] is None)
+        add(c, "unknown_label_rate", unknown / total,
+            "FAIL" if unknown / total > thresholds["unknown_label_max"] else "OK")
+    return rows
+
+
+def _psi_level(value: float, thresholds: Dict[str, float]) -> str:
+    if value >= thresholds["psi_fail"]:
+        return "FAIL"
+    return "WARN" if value >= thresholds["psi_warn"] else "OK"
+
+
+def run_checks(files: Dict[str, str], reference: Optional[Dict[str, any]] = None,
+               fail_fast: bool = False, min_rows: int = 100_000, sep: str = ",") -> pd.DataFrame:
+    """Scan every {kind: path} and return the findings table (see evaluate)."""
+    findings = []
+    for kind, path in files.items():
+        ref = (reference or {}).get(kind)
+        edges = {c: r["edges"] for c, r in ref["rates"].items()} if ref else None
+
+        def check(profile: FileProfile) -> bool:
+            if profile.n_rows < min_rows:
+                return True
+            return not any(r["level"] == "FAIL" and r["check"] != "psi"
+                           for r in evaluate(profile, ref, [], []))
+
+        t0 = time.perf_counter()
+        profile, missing, extra = scan_file(path, kind, edges=edges, check=check if fail_fast else None,
+                                           sep=sep)
+        print(f"[SCAN] {kind}: {path}  {profile.n_rows:,} rows in {time.perf_counter() - t0:.1f}s"
+              f"  months={','.join(sorted(profile.months)[:6])}{'...' if len(profile.months) > 6 else ''}")
+        findings += evaluate(profile, ref, missing, extra)
+    return pd.DataFrame(findings, columns=["file", "column", "check", "value", "level"])
+
+
+def build_reference(files: Dict[str, str], sep: str = ",") -> Dict[str, any]:
+    ref = {"version": 1, "created": time.strftime("%Y-%m-%d %H:%M:%S")}
+    for kind, path in files.items():
+        profile, missing, _ = scan_file(path, kind, sep=sep)
+        if missing:
+            raise ValueError(f"{path}: missing expected columns {missing}")
+        ref[kind] = profile_to_reference(profile)
+        print(f"[REFERENCE] {kind}: {profile.n_rows:,} rows, {len(profile.rate_cols)} rate / "
+              f"{len(profile.bucket_cols)} bucket columns")
+    return ref
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Early Warning — pre-flight data-quality / drift check for monthly CSVs")
+    ap.add_argument("--kpi", default=None, help="dataset2 CSV path")
+    ap.add_argument("--cust", default=None, help="dataset3 CSV path")
+    ap.add_argument("--reference", default=None, help="reference profile JSON (written with --build_reference)")
+    ap.add_argument("--build_reference", action="store_true", help="profile the given files as the new reference")
+    ap.add_argument("--report", default=None, help="write the findings table here (.json or .csv)")
+    ap.add_argument("--sep", default=",", help="CSV separator")
+    ap.add_argument("--fail_fast", action="store_true", help="stop scanning a file once a hard check fails")
+    args = ap.parse_args()
+
+    files = {k: v for k, v in [("kpi", args.kpi), ("cust", args.cust)] if v}
+    if not files:
+        ap.error("give --kpi and/or --cust")
+
+    if args.build_reference:
+        if not args.reference:
+            ap.error("--build_reference needs --reference")
+        ref = build_reference(files, sep=args.sep)
+        Path(args.reference).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.reference).write_text(json.dumps(ref, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[SAVED] {args.reference}")
+        return
+
+    reference = None
+    if args.reference:
+        reference = json.loads(Path(args.reference).read_text(encoding="utf-8"))
+    report = run_checks(files, reference, fail_fast=args.fail_fast, sep=args.sep)
+
+    flagged = report[report["level"] != "OK"]
+    print(flagged.to_string(index=False) if len(flagged) else "(no findings)")
+    if args.report:
+        if args.report.endswith(".csv"):
+            report.to_csv(args.report, index=False, encoding="utf-8")
+        else:
+            Path(args.report).write_text(report.to_json(orient="records", force_ascii=False, indent=2), encoding="utf-8")
+        print(f"[SAVED] {args.report}")
+
+    n_fail = int((report["level"] == "FAIL").sum())
+    print(f"\n[PREFLIGHT] {'FAILED' if n_fail else 'OK'}  ({n_fail} fail, {int((report['level'] == 'WARN').sum())} warn)")
+    sys.exit(1 if n_fail else 0)
+
+
+if __name__ == "__main__":
+    main()
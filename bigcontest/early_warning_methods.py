@@ -2,36 +2,52 @@
 # -*- coding: utf-8 -*-
 """
 Early Warning System — selectable methods
-LightGBM (classification) + Cox Time-Varying (lifelines) + XGBoost AFT (survival)
+LightGBM (classification, single or multi-label) + Cox Time-Varying (lifelines) + XGBoost AFT (survival)
 
 Usage examples:
   python early_warning_methods.py --method lgbm --info big_data_set1.csv --kpi big_data_set2.csv --cust big_data_set3.csv --outdir ./out
+  python early_warning_methods.py --method lgbm_multi --info ... --kpi ... --cust ... --outdir ./out --lgbm_jobs 4
   python early_warning_methods.py --method cox  --info ... --kpi ... --cust ... --outdir ./out
   python early_warning_methods.py --method aft  --info ... --kpi ... --cust ... --outdir ./out
   python early_warning_methods.py --method all  --info ... --kpi ... --cust ... --outdir ./out
+  python early_warning_methods.py --method all  --info ... --kpi ... --cust ... --outdir ./out --engine polars
+  python early_warning_methods.py --method aft  --info ... --kpi ... --cust ... --outdir ./out --aft_tune --nthread 8
+  python early_warning_methods.py --method lgbm --info ... --kpi ... --cust ... --outdir ./out --feature_store
+  python early_warning_methods.py --method all  --info ... --kpi ... --cust ... --outdir ./out --preflight ./out/reference_profile.json
+
+Survival tracks report Harrell/Uno C-index, time-dependent AUC at 1/3/6 months and the
+integrated Brier score (see survival_metrics.py).
 
 Install:
   pip install numpy pandas scikit-learn lightgbm lifelines xgboost
 """
 
 import argparse
+import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
-from sklearn.metrics import average_precision_score, classification_report, roc_auc_score, mean_squared_error
+from scipy.special import expit, ndtr
+from sklearn.metrics import average_precision_score, classification_report, roc_auc_score
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
+import joblib
+import lightgbm as lgb
 from lightgbm import LGBMClassifier
 from lifelines import CoxTimeVaryingFitter
 import xgboost as xgb
 
+from survival_metrics import evaluate_survival, landmark_subjects
+
 
 # ------------------------
 # Utility parsing/cleaning
@@ -128,7 +144,9 @@ def standardize_rates(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
 def replace_special_missing(df: pd.DataFrame) -> pd.DataFrame:
     for col in df.columns:
         if pd.api.types.is_numeric_dtype(df[col]):
-            df.loc[df[col].isin(SPECIAL_MISSING), col] = np.nan
+            mask = df[col].isin(SPECIAL_MISSING)
+            if mask.any():  # an all-False .loc write still upcasts int columns on a duplicated index
+                df.loc[mask, col] = np.nan
     return df
 
 
@@ -162,6 +180,7 @@ def add_rolling_features(df: pd.DataFrame,
         if w == windows[0]:
             pctchg = df.groupby(id_col)[num_cols].pct_change(periods=1)
             pctchg.columns = [f"{c}__PCT1" for c in pctchg.columns]
+            pctchg = pctchg.replace([np.inf, -np.inf], np.nan)
             df = pd.concat([df, pctchg], axis=1)
 
         vol = df.groupby(id_col)[num_cols].rolling(window=w, min_periods=2).std().reset_index(level=0, drop=True)
@@ -199,7 +218,7 @@ def make_labels(df: pd.DataFrame,
     if "MCT_ME_D" in df.columns:
         close_month = pd.to_datetime(df["MCT_ME_D"], errors="coerce").dt.to_period("M")
         df["__CLOSE_MONTH"] = close_month
-        y_close = pd.Series(np.zeros(len(df), dtype="Int8"), index=df.index)
+        y_close = pd.Series(0, index=df.index, dtype="Int8")
         mask = df["__CLOSE_MONTH"].notna()
         dist = (df.loc[mask, "__CLOSE_MONTH"].astype("int") - df.loc[mask, time_col].astype("int"))
         y_close_mask = (dist >= 1) & (dist <= close_horizon)
@@ -208,7 +227,7 @@ def make_labels(df: pd.DataFrame,
         y_close.loc[df.loc[mask].index[after_close_mask]] = pd.NA
         df[f"y_close_h{close_horizon}"] = y_close.astype("Int8")
     else:
-        df[f"y_close_h{close_horizon}"] = pd.Series(np.zeros(len(df), dtype="Int8"), index=df.index)
+        df[f"y_close_h{close_horizon}"] = pd.Series(0, index=df.index, dtype="Int8")
 
     drop_cols = [f"y_drop_h{H}" for H in drop_horizons]
     comp = df[drop_cols + [f"y_close_h{close_horizon}"]].max(axis=1, skipna=True)
@@ -216,6 +235,127 @@ def make_labels(df: pd.DataFrame,
     return df
 
 
+# --------------------------
+# Key encoding / merge-joins
+# --------------------------
+
+# missing keys encode past every real value, so they sort last like NaN keys in pd.merge
+MISSING_MONTH = np.iinfo(np.int16).max
+_MONTH_OFFSET = np.iinfo(np.int16).min
+_MONTH_SPAN = 1 << 16
+
+
+def month_ordinals(s: pd.Series) -> np.ndarray:
+    """'YYYYMM' -> int16 months since 1970-01 (the Period[M] ordinal), MISSING_MONTH if unparsable.
+
+    Only the distinct month strings are parsed; rows are mapped through their factorized codes.
+    """
+    codes, uniq = pd.factorize(s.astype(str))
+    ords = to_period_month(pd.Series(uniq, dtype=object)).array.asi8
+    ords = np.where(ords == pd.NaT.value, MISSING_MONTH, ords).astype(np.int16)
+    return np.append(ords, np.int16(MISSING_MONTH))[codes]
+
+
+def encode_keys(frames: List[pd.DataFrame], id_col: str = "ENCODED_MCT", time_col: str = "TA_YM") -> pd.Index:
+    """In place: id_col -> dense int32 codes in sorted id order, time_col -> int16 month ordinals.
+
+    All frames are factorized in one pass so the codes agree across them; a missing id gets
+    code len(ids). Returns the code -> id index.
+    """
+    ids = [f[id_col] for f in frames]
+    codes, uniq = pd.factorize(pd.concat(ids, ignore_index=True), sort=True)
+    codes[codes < 0] = len(uniq)
+    bounds = np.cumsum([0] + [len(s) for s in ids])
+    for f, lo, hi in zip(frames, bounds[:-1], bounds[1:]):
+        f[id_col] = codes[lo:hi].astype(np.int32)
+        if time_col in f.columns:
+            f[time_col] = month_ordinals(f[time_col])
+    return pd.Index(uniq)
+
+
+def decode_keys(df: pd.DataFrame, ids: pd.Index, id_col: str = "ENCODED_MCT", time_col: str = "TA_YM") -> pd.DataFrame:
+    """Inverse of encode_keys: int32 codes -> ENCODED_MCT strings, int16 ordinals -> Period[M]."""
+    codes = df[id_col].to_numpy()
+    df[id_col] = ids.take(np.where(codes == len(ids), -1, codes), allow_fill=True, fill_value=np.nan).to_numpy()
+    ords = df[time_col].to_numpy().astype(np.int64)
+    ords[ords == MISSING_MONTH] = pd.NaT.value
+    df[time_col] = pd.PeriodIndex.from_ordinals(ords, freq="M")
+    return df
+
+
+def _composite_key(df: pd.DataFrame, id_col: str, time_col: str) -> np.ndarray:
+    # (code, month) -> one int64 that sorts code-major, month-minor
+    return df[id_col].to_numpy().astype(np.int64) * _MONTH_SPAN + (df[time_col].to_numpy().astype(np.int64) - _MONTH_OFFSET)
+
+
+def _positions(sorted_keys: np.ndarray, order: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Row of each target key in the original frame (-1 if absent), from the frame's sorted keys."""
+    if len(sorted_keys) == 0:
+        return np.full(len(targets), -1, dtype=np.int64)
+    i = np.minimum(np.searchsorted(sorted_keys, targets), len(sorted_keys) - 1)
+    return np.where(sorted_keys[i] == targets, order[i], -1)
+
+
+def _suffixed(df: pd.DataFrame, overlap: set, suffix: str) -> pd.DataFrame:
+    return df.rename(columns={c: c + suffix for c in overlap}) if overlap else df
+
+
+def merge_outer_sorted(left: pd.DataFrame, right: pd.DataFrame,
+                       id_col: str = "ENCODED_MCT", time_col: str = "TA_YM",
+                       suffixes: Tuple[str, str] = ("_KPI", "_CUST")) -> pd.DataFrame:
+    """Outer merge-join on encoded (id, month) keys; same result as pd.merge(how="outer").
+
+    Both sides are sorted on a single int64 key and aligned on the sorted key union with
+    searchsorted, so no string hashing happens. Duplicate keys fall back to pd.merge.
+    """
+    keys = [id_col, time_col]
+    lk, rk = _composite_key(left, *keys), _composite_key(right, *keys)
+    lo, ro = np.argsort(lk, kind="stable"), np.argsort(rk, kind="stable")
+    lk, rk = lk[lo], rk[ro]
+    if (np.diff(lk) == 0).any() or (np.diff(rk) == 0).any():
+        return pd.merge(left, right, on=keys, how="outer", suffixes=suffixes)
+
+    # both sides are sorted runs, so a stable sort of the concatenation is a linear merge
+    union = np.concatenate([lk, rk])
+    union.sort(kind="stable")
+    union = union[np.r_[True, union[1:] != union[:-1]]]
+    lpos, rpos = _positions(lk, lo, union), _positions(rk, ro, union)
+    key_values = {id_col: (union // _MONTH_SPAN).astype(np.int32),
+                  time_col: (union % _MONTH_SPAN + _MONTH_OFFSET).astype(np.int16)}
+    del lk, rk, lo, ro, union  # release the sort buffers before the gathers allocate the output
+
+    overlap = (set(left.columns) & set(right.columns)) - set(keys)
+    out_left = left.drop(columns=keys).reset_index(drop=True).reindex(lpos)
+    out_right = right.drop(columns=keys).reset_index(drop=True).reindex(rpos)
+    out_left = _suffixed(out_left, overlap, suffixes[0]).reset_index(drop=True)
+    out_right = _suffixed(out_right, overlap, suffixes[1]).reset_index(drop=True)
+
+    # keys go back where the left frame had them, as pd.merge does
+    for pos, col in sorted((left.columns.get_loc(c), c) for c in keys):
+        out_left.insert(pos, col, key_values[col])
+    return pd.concat([out_left, out_right], axis=1)
+
+
+def merge_left_by_code(left: pd.DataFrame, right: pd.DataFrame, n_ids: int,
+                       id_col: str = "ENCODED_MCT",
+                       suffixes: Tuple[str, str] = ("_x", "_y")) -> pd.DataFrame:
+    """Left merge on encoded id against a frame with one row per id; same result as pd.merge(how="left").
+
+    Codes are dense, so the join is a gather through a code -> row table (the last slot holds
+    the missing-id row, which pandas also matches). Duplicate ids fall back to pd.merge.
+    """
+    codes = right[id_col].to_numpy()
+    if len(np.unique(codes)) != len(codes):
+        return pd.merge(left, right, on=[id_col], how="left", suffixes=suffixes)
+
+    row_of = np.full(n_ids + 1, -1, dtype=np.int64)
+    row_of[codes] = np.arange(len(codes))
+    overlap = (set(left.columns) & set(right.columns)) - {id_col}
+    out_right = right.drop(columns=[id_col]).reset_index(drop=True).reindex(row_of[left[id_col].to_numpy()])
+    out_left = _suffixed(left, overlap, suffixes[0]).reset_index(drop=True)
+    return pd.concat([out_left, _suffixed(out_right, overlap, suffixes[1]).reset_index(drop=True)], axis=1)
+
+
 # ----------------
 # Core ETL stages
 # ----------------
@@ -227,16 +367,24 @@ def data_extract(info_path: str, kpi_path: str, cust_path: str, sep: str = ",")
     return {"info": df_info, "kpi": df_kpi, "cust": df_cust}
 
 
-def data_transform(d: Dict[str, pd.DataFrame],
-                   drop_horizons: List[int] = [1,2,3],
-                   drop_thresh: float = -0.30,
-                   close_horizon: int = 3) -> pd.DataFrame:
+def prepare_frames(d: Dict[str, pd.DataFrame],
+                   key_encoding: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Optional[pd.Index]]:
+    """Per-source cleaning before the joins: dates, bucket features, numeric coercion, rate scaling.
+
+    Returns (kpi, cust, info, mct_ids); mct_ids is None unless the keys were encoded.
+    """
     df_info, df_kpi, df_cust = d["info"].copy(), d["kpi"].copy(), d["cust"].copy()
 
-    if "TA_YM" in df_kpi.columns:
-        df_kpi["TA_YM"] = to_period_month(df_kpi["TA_YM"])
-    if "TA_YM" in df_cust.columns:
-        df_cust["TA_YM"] = to_period_month(df_cust["TA_YM"])
+    # key_encoding: ENCODED_MCT -> int32 codes and TA_YM -> int16 ordinals once, merge-joins on
+    # those, decoded back to strings / Period[M] after the joins. False = string/Period pd.merge.
+    mct_ids = None
+    if key_encoding:
+        mct_ids = encode_keys([df_kpi, df_cust, df_info])
+    else:
+        if "TA_YM" in df_kpi.columns:
+            df_kpi["TA_YM"] = to_period_month(df_kpi["TA_YM"])
+        if "TA_YM" in df_cust.columns:
+            df_cust["TA_YM"] = to_period_month(df_cust["TA_YM"])
     for col in ["ARE_D","MCT_ME_D"]:
         if col in df_info.columns:
             df_info[col] = pd.to_datetime(df_info[col], errors="coerce")
@@ -257,8 +405,33 @@ def data_transform(d: Dict[str, pd.DataFrame],
     df_kpi  = standardize_rates(df_kpi, RATE_COLS_0_100)
     df_cust = standardize_rates(df_cust, RATE_COLS_0_100)
 
-    merged = pd.merge(df_kpi, df_cust, on=["ENCODED_MCT","TA_YM"], how="outer", suffixes=("_KPI","_CUST"))
-    merged = pd.merge(merged, df_info, on=["ENCODED_MCT"], how="left")
+    return df_kpi, df_cust, df_info, mct_ids
+
+
+def join_frames(df_kpi: pd.DataFrame, df_cust: pd.DataFrame, df_info: pd.DataFrame,
+                mct_ids: Optional[pd.Index] = None) -> pd.DataFrame:
+    """KPI x customer outer join on (ENCODED_MCT, TA_YM), then info left join on ENCODED_MCT.
+
+    The intermediate frames never escape, so copy-on-write lets drop / reset_index / suffix renames
+    share buffers instead of materializing copies.
+    """
+    with pd.option_context("mode.copy_on_write", True):
+        if mct_ids is not None:
+            merged = merge_outer_sorted(df_kpi, df_cust, suffixes=("_KPI","_CUST"))
+            merged = merge_left_by_code(merged, df_info, n_ids=len(mct_ids))
+            merged = decode_keys(merged, mct_ids)
+        else:
+            merged = pd.merge(df_kpi, df_cust, on=["ENCODED_MCT","TA_YM"], how="outer", suffixes=("_KPI","_CUST"))
+            merged = pd.merge(merged, df_info, on=["ENCODED_MCT"], how="left")
+    return merged
+
+
+def data_transform(d: Dict[str, pd.DataFrame],
+                   drop_horizons: List[int] = [1,2,3],
+                   drop_thresh: float = -0.30,
+                   close_horizon: int = 3,
+                   key_encoding: bool = True) -> pd.DataFrame:
+    merged = join_frames(*prepare_frames(d, key_encoding=key_encoding))
 
     for col in ["MCT_SIGUNGU_NM","HPSN_MCT_BZN_CD_NM"]:
         if col not in merged.columns:
@@ -283,8 +456,7 @@ def data_load(df: pd.DataFrame, outdir: str) -> Dict[str, str]:
     df.to_parquet(p_parquet, index=False)
     df.to_csv(p_csv, index=False, encoding="utf-8")
 
-    label_cols = [c for c in df.columns if c.startswith("y_drop_h")] + \
-                 [c for c in df.columns if c.startswith("y_close_h")] + ["y_risk_any"]
+    label_cols = label_columns(df)
     summary = df[label_cols].astype("float").describe().T
     p_sum = out / "label_summary.csv"
     summary.to_csv(p_sum, encoding="utf-8")
@@ -295,7 +467,21 @@ def data_load(df: pd.DataFrame, outdir: str) -> Dict[str, str]:
 # LightGBM track
 # ----------------
 
-def build_lgbm_model(cat_cols: List[str], num_cols: List[str]) -> Pipeline:
+LGBM_MODEL_FILE = "lgbm_model.joblib"
+
+LGBM_PARAMS = {
+    "objective": "binary",
+    "n_estimators": 800,
+    "learning_rate": 0.05,
+    "num_leaves": 127,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "reg_lambda": 1.0,
+    "random_state": 42,
+}
+
+
+def build_lgbm_preprocess(cat_cols: List[str], num_cols: List[str]) -> ColumnTransformer:
     numeric_transformer = Pipeline(steps=[
         ("imputer", SimpleImputer(strategy="median")),
         ("scaler", StandardScaler(with_mean=False)),
@@ -304,21 +490,16 @@ def build_lgbm_model(cat_cols: List[str], num_cols: List[str]) -> Pipeline:
         ("imputer", SimpleImputer(strategy="most_frequent")),
         ("onehot", OneHotEncoder(handle_unknown="ignore")),
     ])
-    pre = ColumnTransformer(transformers=[
+    return ColumnTransformer(transformers=[
         ("num", numeric_transformer, num_cols),
         ("cat", categorical_transformer, cat_cols),
     ])
 
-    clf = LGBMClassifier(
-        objective="binary",
-        n_estimators=800,
-        learning_rate=0.05,
-        num_leaves=127,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        reg_lambda=1.0,
-        random_state=42
-    )
+
+def build_lgbm_model(cat_cols: List[str], num_cols: List[str],
+                     params: Optional[Dict[str, any]] = None) -> Pipeline:
+    pre = build_lgbm_preprocess(cat_cols, num_cols)
+    clf = LGBMClassifier(**{**LGBM_PARAMS, **(params or {})})
     pipe = Pipeline(steps=[("preprocess", pre), ("clf", clf)])
     return pipe
 
@@ -334,18 +515,30 @@ def _time_split(df: pd.DataFrame, time_col: str, test_months: int = 2) -> Tuple[
     return train, test
 
 
-def run_lgbm(merged: pd.DataFrame, out: Path, test_months: int = 2) -> None:
-    print("\n[LightGBM] Train/Test on y_risk_any")
-    train_df, test_df = _time_split(merged.dropna(subset=["y_risk_any"]), time_col="TA_YM", test_months=test_months)
+def label_columns(df: pd.DataFrame) -> List[str]:
+    return [c for c in df.columns if c.startswith("y_drop_h")] + \
+           [c for c in df.columns if c.startswith("y_close_h")] + \
+           [c for c in ["y_risk_any"] if c in df.columns]
 
+
+def lgbm_feature_columns(df: pd.DataFrame) -> Tuple[List[str], List[str], List[str]]:
     drop_cols = { "ENCODED_MCT", "TA_YM", "ARE_D","MCT_ME_D","__CLOSE_MONTH", "y_risk_any" }
-    drop_cols |= {c for c in merged.columns if c.startswith("y_drop_h") or c.startswith("y_close_h")}
-    feature_cols = [c for c in merged.columns if c not in drop_cols]
+    drop_cols |= {c for c in df.columns if c.startswith("y_drop_h") or c.startswith("y_close_h")}
+    feature_cols = [c for c in df.columns if c not in drop_cols]
+
+    cat_cols = [c for c in feature_cols if df[c].dtype == "object" or pd.api.types.is_string_dtype(df[c])]
+    num_cols = [c for c in feature_cols if pd.api.types.is_numeric_dtype(df[c])]
+    return feature_cols, cat_cols, num_cols
+
+
+def run_lgbm(merged: pd.DataFrame, out: Path, test_months: int = 2,
+             params: Optional[Dict[str, any]] = None) -> None:
+    print("\n[LightGBM] Train/Test on y_risk_any")
+    train_df, test_df = _time_split(merged.dropna(subset=["y_risk_any"]), time_col="TA_YM", test_months=test_months)
 
-    cat_cols = [c for c in feature_cols if merged[c].dtype == "object" or pd.api.types.is_string_dtype(merged[c])]
-    num_cols = [c for c in feature_cols if pd.api.types.is_numeric_dtype(merged[c])]
+    feature_cols, cat_cols, num_cols = lgbm_feature_columns(merged)
 
-    model = build_lgbm_model(cat_cols, num_cols)
+    model = build_lgbm_model(cat_cols, num_cols, params=params)
     model.fit(train_df[feature_cols], train_df["y_risk_any"].astype(int))
 
     p_test = model.predict_proba(test_df[feature_cols])[:,1]
@@ -353,6 +546,80 @@ def run_lgbm(merged: pd.DataFrame, out: Path, test_months: int = 2) -> None:
     pr  = average_precision_score(test_df["y_risk_any"].astype(int), p_test)
     print(f"[LightGBM] ROC-AUC={roc:.4f}  PR-AUC={pr:.4f}  (n_test={len(test_df)})")
     (out / "lgbm_info.txt").write_text(f"ROC-AUC={roc:.4f}\nPR-AUC={pr:.4f}\n", encoding="utf-8")
+    # fitted pipeline (preprocess + classifier) for explain_lgbm.py
+    joblib.dump(model, out / LGBM_MODEL_FILE)
+
+
+def run_lgbm_multi(merged: pd.DataFrame, out: Path,
+                   test_months: int = 2,
+                   labels: Optional[List[str]] = None,
+                   n_jobs: int = 4,
+                   num_threads: int = -1,
+                   params: Optional[Dict[str, any]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Train one booster per label column against a single preprocessed, binned Dataset.
+
+    The feature pipeline is fitted and the LightGBM bins are built once on the training window;
+    each label then trains on a `Dataset.subset` of its labelled rows (binned data is shared, not
+    re-binned), with boosters running in parallel threads.
+
+    Writes lgbm_multi_metrics.csv (one row per label) and lgbm_multi_predictions.parquet
+    (ENCODED_MCT, TA_YM, one p_<label> column per label for every test row).
+    """
+    labels = labels or label_columns(merged)
+    print(f"\n[LightGBM-multi] Train/Test on {', '.join(labels)}")
+    train_df, test_df = _time_split(merged, time_col="TA_YM", test_months=test_months)
+
+    feature_cols, cat_cols, num_cols = lgbm_feature_columns(merged)
+    pre = build_lgbm_preprocess(cat_cols, num_cols)
+    X_train = pre.fit_transform(train_df[feature_cols])
+    X_test = pre.transform(test_df[feature_cols])
+
+    n_jobs = max(1, min(n_jobs, len(labels)))
+    total_threads = num_threads if num_threads > 0 else (os.cpu_count() or 1)
+    params = {**LGBM_PARAMS, **(params or {}),
+              "num_threads": max(1, total_threads // n_jobs), "verbosity": -1}
+    n_rounds = params.pop("n_estimators")
+
+    base = lgb.Dataset(X_train, label=np.zeros(X_train.shape[0]), params=params, free_raw_data=True)
+    base.construct()
+
+    subsets = {}
+    for lab in labels:
+        y = train_df[lab].to_numpy(dtype=float, na_value=np.nan)
+        idx = np.flatnonzero(~np.isnan(y))
+        ds = base.subset(idx.tolist()).construct()
+        ds.set_label(y[idx])
+        subsets[lab] = ds
+
+    def _fit(lab: str) -> Tuple[str, lgb.Booster]:
+        return lab, lgb.train(params, subsets[lab], num_boost_round=n_rounds)
+
+    preds = pd.DataFrame({"ENCODED_MCT": test_df["ENCODED_MCT"].to_numpy(),
+                          "TA_YM": test_df["TA_YM"].astype(str).to_numpy()})
+    rows = []
+    with ThreadPoolExecutor(max_workers=n_jobs) as ex:
+        for lab, booster in ex.map(_fit, labels):
+            p_test = booster.predict(X_test)
+            preds[f"p_{lab}"] = p_test
+
+            y_test = test_df[lab].to_numpy(dtype=float, na_value=np.nan)
+            mask = ~np.isnan(y_test)
+            y_eval = y_test[mask].astype(int)
+            both = len(np.unique(y_eval)) == 2
+            rows.append({
+                "label": lab,
+                "n_train": subsets[lab].num_data(),
+                "n_test": int(mask.sum()),
+                "pos_rate_test": float(y_eval.mean()) if mask.any() else float("nan"),
+                "roc_auc": roc_auc_score(y_eval, p_test[mask]) if both else float("nan"),
+                "pr_auc": average_precision_score(y_eval, p_test[mask]) if both else float("nan"),
+            })
+
+    metrics = pd.DataFrame(rows)
+    print(metrics.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    metrics.to_csv(out / "lgbm_multi_metrics.csv", index=False, encoding="utf-8")
+    preds.to_parquet(out / "lgbm_multi_predictions.parquet", index=False)
+    return metrics, preds
 
 
 # -----------------------------
@@ -387,7 +654,9 @@ def train_cox_timevarying(tv_df: pd.DataFrame,
                           id_col: str = "ENCODED_MCT",
                           time_cols: Tuple[str, str] = ("start","stop"),
                           event_col: str = "event",
-                          exclude_cols: Optional[List[str]] = None) -> Tuple[CoxTimeVaryingFitter, List[str]]:
+                          exclude_cols: Optional[List[str]] = None,
+                          penalizer: float = 0.1,
+                          l1_ratio: float = 0.0) -> Tuple[CoxTimeVaryingFitter, List[str]]:
     exclude = set(exclude_cols or []) | {id_col, event_col, time_cols[0], time_cols[1]}
     exclude |= {c for c in tv_df.columns if c.startswith("y_drop_h") or c.startswith("y_close_h") or c=="y_risk_any"}
     exclude |= {"ARE_D","MCT_ME_D","__CLOSE_MONTH"}
@@ -398,25 +667,41 @@ def train_cox_timevarying(tv_df: pd.DataFrame,
         tv_fit[c] = tv_fit[c].astype(float)
         tv_fit[c] = tv_fit[c].fillna(tv_fit[c].median())
 
-    ctv = CoxTimeVaryingFitter(penalizer=0.1)
+    ctv = CoxTimeVaryingFitter(penalizer=penalizer, l1_ratio=l1_ratio)
     ctv.fit(tv_fit, id_col=id_col, start_col=time_cols[0], stop_col=time_cols[1], event_col=event_col, show_progress=False)
     return ctv, covariates
 
 
+def _step_at(knots: np.ndarray, values: np.ndarray, t: np.ndarray) -> np.ndarray:
+    idx = np.searchsorted(knots, t, side="right") - 1
+    return np.where(idx >= 0, values[np.clip(idx, 0, None)], 0.0)
+
+
 def test_cox_timevarying(ctv: CoxTimeVaryingFitter, tv_df: pd.DataFrame,
                          id_col: str = "ENCODED_MCT",
                          time_cols: Tuple[str, str] = ("start","stop"),
                          event_col: str = "event",
-                         covariates: Optional[List[str]] = None) -> Dict[str, any]:
+                         covariates: Optional[List[str]] = None,
+                         horizons: Tuple[int, ...] = (1, 3, 6)) -> Dict[str, any]:
     if covariates is None:
         covariates = [c for c in tv_df.columns if c not in {id_col, event_col, *time_cols} and pd.api.types.is_numeric_dtype(tv_df[c])]
-    tv_eval = tv_df[[id_col, *time_cols, event_col, *covariates]].copy()
-    for c in covariates:
-        tv_eval[c] = tv_eval[c].astype(float).fillna(tv_eval[c].median())
+    subj = landmark_subjects(tv_df, id_col=id_col, time_cols=time_cols, event_col=event_col)
+    X = tv_df[covariates].iloc[subj["row"].to_numpy()].astype(float)
+    X = X.fillna(tv_df[covariates].astype(float).median())
+    log_hz = np.asarray(ctv.predict_log_partial_hazard(X), dtype=float)
+
+    H0 = ctv.baseline_cumulative_hazard_
+    knots, cumhaz = H0.index.to_numpy(dtype=float), H0.iloc[:, 0].to_numpy(dtype=float)
+    t0 = subj["t0"].to_numpy()
+
+    def surv_fn(grid: np.ndarray) -> np.ndarray:
+        # S(t0 + h | x, alive at t0) = exp(-(H0(t0 + h) - H0(t0)) * exp(lp))
+        dH = _step_at(knots, cumhaz, t0[:, None] + grid[None, :]) - _step_at(knots, cumhaz, t0)[:, None]
+        return np.exp(-dH * np.exp(log_hz)[:, None])
 
-    c_index = ctv.score_(tv_eval, scoring_method="concordance_index")
-    pll = ctv._log_likelihood
-    return {"concordance_index": float(c_index), "partial_log_likelihood": float(pll)}
+    metrics = evaluate_survival(subj["duration"], subj["event"], log_hz, surv_fn=surv_fn, horizons=horizons)
+    metrics["partial_log_likelihood"] = float(ctv.log_likelihood_)
+    return metrics
 
 
 # -----------------------------
@@ -427,7 +712,8 @@ def build_aft_dmatrix(tv_df: pd.DataFrame,
                       id_col: str = "ENCODED_MCT",
                       time_cols: Tuple[str, str] = ("start", "stop"),
                       event_col: str = "event",
-                      exclude_cols: Optional[List[str]] = None) -> Tuple[xgb.DMatrix, List[str]]:
+                      exclude_cols: Optional[List[str]] = None,
+                      nthread: int = -1) -> Tuple[xgb.DMatrix, List[str]]:
     exclude = set(exclude_cols or []) | {id_col, event_col, time_cols[0], time_cols[1]}
     exclude |= {c for c in tv_df.columns if c.startswith("y_drop_h") or c.startswith("y_close_h") or c=="y_risk_any"}
     exclude |= {"ARE_D","MCT_ME_D","__CLOSE_MONTH"}
@@ -435,38 +721,164 @@ def build_aft_dmatrix(tv_df: pd.DataFrame,
     covariates = [c for c in tv_df.columns if c not in exclude and pd.api.types.is_numeric_dtype(tv_df[c])]
     X = tv_df[covariates].astype(float).fillna(tv_df[covariates].median())
 
-    y_lower = tv_df[time_cols[0]].astype(float).values
-    y_upper = tv_df[time_cols[1]].astype(float).values
-    mask_cens = tv_df[event_col] == 0
+    y_lower = tv_df[time_cols[0]].to_numpy(dtype=float, copy=True)
+    y_upper = tv_df[time_cols[1]].to_numpy(dtype=float, copy=True)
+    mask_cens = (tv_df[event_col] == 0).to_numpy()
     y_upper[mask_cens] = np.inf
 
-    dmat = xgb.DMatrix(X, label_lower=y_lower, label_upper=y_upper, feature_names=covariates)
+    dmat = xgb.DMatrix(X, feature_names=covariates, nthread=nthread)
+    dmat.set_float_info("label_lower_bound", y_lower)
+    dmat.set_float_info("label_upper_bound", y_upper)
     return dmat, covariates
 
 
-def train_aft(dtrain: xgb.DMatrix, num_round: int = 300) -> xgb.Booster:
-    params = {
-        "objective": "survival:aft",
-        "eval_metric": "aft-nloglik",
-        "aft_loss_distribution": "normal",
-        "aft_loss_distribution_scale": 1.0,
-        "tree_method": "hist",
-        "learning_rate": 0.05,
-        "max_depth": 6,
-        "subsample": 0.8,
-        "colsample_bytree": 0.8,
-        "lambda": 1.0,
-        "seed": 42,
-    }
-    model = xgb.train(params, dtrain, num_boost_round=num_round)
+AFT_PARAMS = {
+    "objective": "survival:aft",
+    "eval_metric": "aft-nloglik",
+    "aft_loss_distribution": "normal",
+    "aft_loss_distribution_scale": 1.0,
+    "tree_method": "hist",
+    "learning_rate": 0.05,
+    "max_depth": 6,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "lambda": 1.0,
+    "seed": 42,
+}
+
+AFT_DISTRIBUTIONS = ("normal", "logistic", "extreme")
+AFT_SCALES = (0.5, 1.0, 1.5, 2.0)
+
+
+def train_aft(dtrain: xgb.DMatrix,
+              num_round: int = 1000,
+              dvalid: Optional[xgb.DMatrix] = None,
+              early_stopping_rounds: Optional[int] = 50,
+              nthread: int = -1,
+              params: Optional[Dict[str, any]] = None,
+              verbose_eval: Union[bool, int] = False) -> xgb.Booster:
+    """Train an AFT booster, early-stopping on the validation aft-nloglik when `dvalid` is given.
+
+    The returned booster is truncated to its best iteration so later predictions use it directly.
+    """
+    params = {**AFT_PARAMS, **(params or {}), "nthread": nthread}
+    evals = [(dtrain, "train")]
+    if dvalid is not None:
+        evals.append((dvalid, "valid"))
+    else:
+        early_stopping_rounds = None
+
+    model = xgb.train(params, dtrain, num_boost_round=num_round, evals=evals,
+                      early_stopping_rounds=early_stopping_rounds, verbose_eval=verbose_eval)
+    if early_stopping_rounds:
+        best_iteration, best_score = model.best_iteration, model.best_score
+        model = model[: best_iteration + 1]
+        model.set_attr(best_iteration=str(best_iteration), best_score=str(best_score))
     return model
 
 
-def test_aft(model: xgb.Booster, dtest: xgb.DMatrix) -> Dict[str, any]:
-    pred = model.predict(dtest, output_margin=True)
-    y_lower = dtest.get_float_info("label_lower_bound")
-    mse = mean_squared_error(y_lower, pred)
-    return {"aft_mse": float(mse)}
+def tune_aft(dtrain: xgb.DMatrix,
+             dvalid: xgb.DMatrix,
+             distributions: Tuple[str, ...] = AFT_DISTRIBUTIONS,
+             scales: Tuple[float, ...] = AFT_SCALES,
+             num_round: int = 1000,
+             early_stopping_rounds: int = 50,
+             nthread: int = -1,
+             n_jobs: int = 4,
+             params: Optional[Dict[str, any]] = None) -> Tuple[xgb.Booster, Dict[str, any], pd.DataFrame]:
+    """Grid-search aft_loss_distribution x scale in parallel and keep the best validation nloglik.
+
+    Trials run in threads (XGBoost releases the GIL while boosting); `nthread` is the total core
+    budget and is split evenly across the concurrent trials.
+    """
+    grid = [{"aft_loss_distribution": d, "aft_loss_distribution_scale": float(s)}
+            for d in distributions for s in scales]
+    n_jobs = max(1, min(n_jobs, len(grid)))
+    total_threads = nthread if nthread > 0 else (os.cpu_count() or 1)
+    per_trial = max(1, total_threads // n_jobs)
+
+    def _trial(cfg: Dict[str, any]) -> Tuple[Dict[str, any], xgb.Booster]:
+        booster = train_aft(dtrain, num_round=num_round, dvalid=dvalid,
+                            early_stopping_rounds=early_stopping_rounds,
+                            nthread=per_trial, params={**(params or {}), **cfg})
+        return cfg, booster
+
+    rows, models = [], []
+    with ThreadPoolExecutor(max_workers=n_jobs) as ex:
+        for cfg, booster in ex.map(_trial, grid):
+            rows.append({**cfg,
+                         "best_iteration": int(booster.attr("best_iteration")),
+                         "valid_aft_nloglik": float(booster.attr("best_score"))})
+            models.append(booster)
+
+    results = pd.DataFrame(rows).sort_values("valid_aft_nloglik").reset_index(drop=True)
+    best_idx = int(np.argmin([r["valid_aft_nloglik"] for r in rows]))
+    best_params = {**AFT_PARAMS, **(params or {}), **grid[best_idx]}
+    return models[best_idx], best_params, results
+
+
+_AFT_CDF = {
+    "normal": ndtr,
+    "logistic": expit,
+    "extreme": lambda z: -np.expm1(-np.exp(z)),
+}
+
+
+def test_aft(model: xgb.Booster, dtest: xgb.DMatrix, tv_df: pd.DataFrame,
+             id_col: str = "ENCODED_MCT",
+             time_cols: Tuple[str, str] = ("start", "stop"),
+             event_col: str = "event",
+             horizons: Tuple[int, ...] = (1, 3, 6)) -> Dict[str, any]:
+    """Survival metrics for the AFT margin (predicted log-time); `tv_df` holds the rows of `dtest`."""
+    loss = json.loads(model.save_config())["learner"]["objective"]["aft_loss_param"]
+    cdf = _AFT_CDF[loss["aft_loss_distribution"]]
+    sigma = float(loss["aft_loss_distribution_scale"])
+
+    subj = landmark_subjects(tv_df, id_col=id_col, time_cols=time_cols, event_col=event_col)
+    rows = subj["row"].to_numpy()
+    eta = model.predict(dtest, output_margin=True)[rows]
+    t0 = subj["t0"].to_numpy()
+
+    def surv_fn(grid: np.ndarray) -> np.ndarray:
+        # S(t0 + h | x, alive at t0) with S(t) = 1 - F((log t - eta) / sigma)
+        with np.errstate(divide="ignore"):
+            s_t = 1.0 - cdf((np.log(t0[:, None] + grid[None, :]) - eta[:, None]) / sigma)
+            s_0 = 1.0 - cdf((np.log(t0) - eta) / sigma)
+        return np.clip(s_t / np.clip(s_0, 1e-12, None)[:, None], 0.0, 1.0)
+
+    metrics = evaluate_survival(subj["duration"], subj["event"], -eta, surv_fn=surv_fn, horizons=horizons)
+    metrics["aft_nloglik"] = float(model.eval(dtest, name="test").split(":")[-1])
+    return metrics
+
+
+def format_survival_metrics(metrics: Dict[str, any]) -> str:
+    return "  ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in metrics.items())
+
+
+def write_metrics_json(path: Path, metrics: Dict[str, any]) -> None:
+    """Strict JSON: NaN metrics (no cases/controls, single-class folds) are written as null."""
+    clean = {k: None if isinstance(v, float) and np.isnan(v) else v for k, v in metrics.items()}
+    Path(path).write_text(json.dumps(clean, indent=2, allow_nan=False), encoding="utf-8")
+
+
+# ------------------
+# Tuned parameters
+# ------------------
+
+BEST_PARAMS_FILE = "best_params.json"
+
+
+def load_best_params(path: Optional[str]) -> Dict[str, Dict[str, any]]:
+    """Per-model overrides written by hparam_search.py: {"lgbm": {...}, "cox": {...}, "aft": {...}}."""
+    if not path or not Path(path).exists():
+        return {}
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def save_best_params(path: str, model: str, params: Dict[str, any]) -> None:
+    current = load_best_params(path)
+    current[model] = params
+    Path(path).write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
 
 
 # -------------
@@ -475,32 +887,88 @@ def test_aft(model: xgb.Booster, dtest: xgb.DMatrix) -> Dict[str, any]:
 
 def main():
     ap = argparse.ArgumentParser(description="Early Warning — choose method: lgbm / cox / aft / all")
-    ap.add_argument("--method", choices=["lgbm", "cox", "aft", "all"], default="all",
-                    help="모델 선택 (기본 all): lgbm / cox / aft / all")
+    ap.add_argument("--method", choices=["lgbm", "lgbm_multi", "cox", "aft", "all"], default="all",
+                    help="모델 선택 (기본 all): lgbm / lgbm_multi / cox / aft / all")
     ap.add_argument("--info", required=True, help="dataset1 CSV path")
     ap.add_argument("--kpi",  required=True, help="dataset2 CSV path")
     ap.add_argument("--cust", required=True, help="dataset3 CSV path")
     ap.add_argument("--outdir", required=True, help="output folder")
     ap.add_argument("--sep", default=",", help="CSV separator")
+    ap.add_argument("--engine", choices=["pandas", "polars"], default="pandas",
+                    help="ETL backend: pandas (default) or polars (lazy, streaming, all cores; see etl_polars.py)")
     ap.add_argument("--drop_horizons", nargs="+", type=int, default=[1,2,3])
     ap.add_argument("--drop_thresh", type=float, default=-0.30)
     ap.add_argument("--close_horizon", type=int, default=3)
     ap.add_argument("--test_months", type=int, default=2)
+    ap.add_argument("--horizons", nargs="+", type=int, default=[1, 3, 6],
+                    help="time-dependent AUC horizons (months) for the Cox / AFT tracks; needs --test_months > max")
+    ap.add_argument("--nthread", type=int, default=-1, help="XGBoost / LightGBM threads (-1 = all cores)")
+    ap.add_argument("--aft_rounds", type=int, default=1000, help="AFT max boosting rounds")
+    ap.add_argument("--aft_early_stopping", type=int, default=50,
+                    help="stop when valid aft-nloglik has not improved for N rounds")
+    ap.add_argument("--aft_valid_months", type=int, default=1,
+                    help="last N training months held out as the AFT watchlist")
+    ap.add_argument("--aft_tune", action="store_true",
+                    help="grid-search aft_loss_distribution x scale in parallel")
+    ap.add_argument("--aft_tune_jobs", type=int, default=4, help="parallel AFT tuning trials")
+    ap.add_argument("--lgbm_jobs", type=int, default=4, help="parallel boosters in lgbm_multi")
+    ap.add_argument("--params", default=None,
+                    help=f"tuned params JSON (default: <outdir>/{BEST_PARAMS_FILE} if present)")
+    ap.add_argument("--feature_store", action="store_true",
+                    help="also write <outdir>/feature_store, the per-merchant memory-mapped store (feature_store.py)")
+    ap.add_argument("--preflight", default=None, metavar="REFERENCE_JSON",
+                    help="check --kpi/--cust against this data_quality.py reference profile before the ETL; abort on FAIL")
     args = ap.parse_args()
 
+    if args.method in ["cox", "aft", "all"] and args.test_months <= max(args.horizons):
+        # landmark follow-up is at most test_months, so horizons >= test_months have no controls
+        print(f"[WARN] --test_months {args.test_months} <= max(--horizons) {max(args.horizons)}: "
+              f"AUC at {[h for h in args.horizons if h >= args.test_months]} month(s) will be reported as null "
+              "(horizons_past_follow_up); use --test_months > max(--horizons) for those horizons.")
+
+    if args.preflight:
+        from data_quality import run_checks
+        report = run_checks({"kpi": args.kpi, "cust": args.cust},
+                            json.loads(Path(args.preflight).read_text(encoding="utf-8")), fail_fast=True,
+                            sep=args.sep)
+        failed = report[report["level"] == "FAIL"]
+        if len(failed):
+            print(failed.to_string(index=False))
+            raise SystemExit(f"[PREFLIGHT] {len(failed)} hard check(s) failed; not running the ETL.")
+        print(f"[PREFLIGHT] OK ({int((report['level'] == 'WARN').sum())} warn)")
+
     # ETL
-    data = data_extract(args.info, args.kpi, args.cust, sep=args.sep)
-    merged = data_transform(data,
-                            drop_horizons=args.drop_horizons,
-                            drop_thresh=args.drop_thresh,
-                            close_horizon=args.close_horizon)
+    if args.engine == "polars":
+        from etl_polars import run_polars_etl
+        merged = run_polars_etl(args.info, args.kpi, args.cust, sep=args.sep,
+                                drop_horizons=args.drop_horizons,
+                                drop_thresh=args.drop_thresh,
+                                close_horizon=args.close_horizon)
+    else:
+        data = data_extract(args.info, args.kpi, args.cust, sep=args.sep)
+        merged = data_transform(data,
+                                drop_horizons=args.drop_horizons,
+                                drop_thresh=args.drop_thresh,
+                                close_horizon=args.close_horizon)
     paths = data_load(merged, args.outdir)
+    if args.feature_store:
+        from feature_store import write_feature_store
+        meta = write_feature_store(merged, str(Path(args.outdir) / "feature_store"), source=paths["parquet"])
+        print(f"[FEATURE STORE] {meta['n_merchants']} merchants, {meta['n_rows']} rows x {len(meta['columns'])} cols")
 
     out = Path(args.outdir); out.mkdir(parents=True, exist_ok=True)
+    best = load_best_params(args.params or str(out / BEST_PARAMS_FILE))
+    if best:
+        print(f"[PARAMS] tuned params for: {', '.join(sorted(best))}")
 
     # --- LightGBM classification (y_risk_any)
     if args.method in ["lgbm", "all"]:
-        run_lgbm(merged, out, test_months=args.test_months)
+        run_lgbm(merged, out, test_months=args.test_months, params=best.get("lgbm"))
+
+    # --- LightGBM multi-label (y_drop_h*, y_close_h*, y_risk_any on one binned dataset)
+    if args.method == "lgbm_multi":
+        run_lgbm_multi(merged, out, test_months=args.test_months,
+                       n_jobs=args.lgbm_jobs, num_threads=args.nthread, params=best.get("lgbm"))
 
     # --- Survival: Cox Time-Varying
     if args.method in ["cox", "all"]:
@@ -514,11 +982,13 @@ def main():
         tv_test  = tv[tv["TA_YM"] >= cutoff].copy()
 
         ctv, covs = train_cox_timevarying(tv_train, id_col="ENCODED_MCT",
-                                          time_cols=("start","stop"), event_col="event")
+                                          time_cols=("start","stop"), event_col="event",
+                                          **best.get("cox", {}))
         surv_metrics = test_cox_timevarying(ctv, tv_test, id_col="ENCODED_MCT",
-                                            time_cols=("start","stop"), event_col="event", covariates=covs)
-        print(f"[CoxTV] concordance_index={surv_metrics['concordance_index']:.4f}, "
-              f"partial_log_likelihood={surv_metrics['partial_log_likelihood']:.2f}")
+                                            time_cols=("start","stop"), event_col="event", covariates=covs,
+                                            horizons=tuple(args.horizons))
+        print(f"[CoxTV] {format_survival_metrics(surv_metrics)}")
+        write_metrics_json(out / "cox_metrics.json", surv_metrics)
         (out / "cox_summary.txt").write_text(str(ctv.summary), encoding="utf-8")
 
     # --- Survival: XGBoost AFT
@@ -531,12 +1001,33 @@ def main():
             tv_train = tv[tv["TA_YM"] < cutoff].copy()
             tv_test  = tv[tv["TA_YM"] >= cutoff].copy()
 
-        dtrain, _ = build_aft_dmatrix(tv_train, id_col="ENCODED_MCT")
-        dtest, _  = build_aft_dmatrix(tv_test, id_col="ENCODED_MCT")
-        aft_model = train_aft(dtrain, num_round=300)
-        aft_metrics = test_aft(aft_model, dtest)
-        print(f"[AFT] MSE (start vs pred log-time) = {aft_metrics['aft_mse']:.4f}")
-        (out / "aft_metrics.txt").write_text(str(aft_metrics), encoding="utf-8")
+        # hold out the last training month(s) as the early-stopping watchlist
+        train_months = np.sort(tv_train["TA_YM"].dropna().unique())
+        valid_cutoff = train_months[-args.aft_valid_months]
+        tv_fit   = tv_train[tv_train["TA_YM"] < valid_cutoff]
+        tv_valid = tv_train[tv_train["TA_YM"] >= valid_cutoff]
+
+        dtrain, _ = build_aft_dmatrix(tv_fit, id_col="ENCODED_MCT", nthread=args.nthread)
+        dvalid, _ = build_aft_dmatrix(tv_valid, id_col="ENCODED_MCT", nthread=args.nthread)
+        dtest, _  = build_aft_dmatrix(tv_test, id_col="ENCODED_MCT", nthread=args.nthread)
+        if args.aft_tune:
+            aft_model, aft_params, grid = tune_aft(dtrain, dvalid,
+                                                   num_round=args.aft_rounds,
+                                                   early_stopping_rounds=args.aft_early_stopping,
+                                                   nthread=args.nthread,
+                                                   n_jobs=args.aft_tune_jobs,
+                                                   params=best.get("aft"))
+            grid.to_csv(out / "aft_tuning.csv", index=False, encoding="utf-8")
+            print(f"[AFT] best distribution={aft_params['aft_loss_distribution']} "
+                  f"scale={aft_params['aft_loss_distribution_scale']}")
+        else:
+            aft_model = train_aft(dtrain, num_round=args.aft_rounds, dvalid=dvalid,
+                                  early_stopping_rounds=args.aft_early_stopping, nthread=args.nthread,
+                                  params=best.get("aft"))
+        aft_metrics = test_aft(aft_model, dtest, tv_test, id_col="ENCODED_MCT", horizons=tuple(args.horizons))
+        aft_metrics["best_iteration"] = int(aft_model.attr("best_iteration") or aft_model.num_boosted_rounds() - 1)
+        print(f"[AFT] {format_survival_metrics(aft_metrics)}")
+        write_metrics_json(out / "aft_metrics.json", aft_metrics)
 
     print("\n[SAVED] Data:", paths)
     print("[DONE] Method(s):", args.method)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Polars execution backend for early_warning_methods.data_transform
+
+Expresses the same pipeline as one lazy Polars query over the raw CSVs:
+  bucket parsing -> numeric coercion / sentinel removal -> rate standardization
+  -> outer join KPI x customer -> left join info -> peer z-scores
+  -> rolling MA / VOL / PCT features -> drop / close / risk labels
+and collects it with the streaming engine on all cores. The result is returned as a pandas
+DataFrame with the pandas engine's column names and dtypes, so the model tracks are unchanged.
+
+Usage:
+  python early_warning_methods.py --engine polars --method lgbm --info ... --kpi ... --cust ... --outdir ./out
+  python etl_polars.py --info ... --kpi ... --cust ...          # parity check against the pandas engine
+
+Install:
+  pip install polars
+"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+import early_warning_methods as ew
+
+
+ID, TIME = "ENCODED_MCT", "TA_YM"
+
+# read_csv(dtype=str) treats these as missing; scan_csv must do the same for parity
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+# ------------------------
+# Expression helpers
+# ------------------------
+
+def _month_ordinal(col: str) -> pl.Expr:
+    """'YYYYMM' string -> pandas Period('M') ordinal (months since 1970-01), null if unparsable."""
+    s = pl.col(col).str.strip_chars()
+    ok = s.str.contains(r"^\d{6}$")
+    year = s.str.slice(0, 4).cast(pl.Int32, strict=False)
+    month = s.str.slice(4, 2).cast(pl.Int32, strict=False)
+    ordinal = (year - 1970) * 12 + month - 1
+    return pl.when(ok & month.is_between(1, 12)).then(ordinal).otherwise(None).alias(col)
+
+
+def _parse_date(col: str) -> pl.Expr:
+    s = pl.col(col).str.strip_chars()
+    return pl.coalesce(
+        s.str.to_datetime("%Y%m%d", strict=False, time_unit="ns"),
+        s.str.to_datetime("%Y-%m-%d", strict=False, time_unit="ns"),
+    ).alias(col)
+
+
+def _clean_float(expr: pl.Expr) -> pl.Expr:
+    """NaN / inf / SPECIAL_MISSING -> null, so every later aggregation skips them like pandas does."""
+    return pl.when(expr.is_finite() & ~expr.is_in(list(ew.SPECIAL_MISSING))).then(expr).otherwise(None)
+
+
+def _bucket_maps(lf: pl.LazyFrame, cols: List[str]) -> Dict[str, Tuple[List[str], List[Optional[int]], List[Optional[float]]]]:
+    """Parse each distinct bucket label once with ew.parse_bucket (labels are low-cardinality)."""
+    if not cols:
+        return {}
+    uniq = lf.select([pl.col(c).unique().implode() for c in cols]).collect(engine="streaming")
+    maps = {}
+    for c in cols:
+        labels = [v for v in uniq[c][0].to_list() if v is not None]
+        parsed = [ew.parse_bucket(v) for v in labels]
+        maps[c] = (labels, [p[0] for p in parsed], [p[1] for p in parsed])
+    return maps
+
+
+def _numeric_columns(lf: pl.LazyFrame, cols: List[str]) -> List[str]:
+    """Columns that pandas.to_numeric(errors="ignore") would convert: every non-null value parses."""
+    if not cols:
+        return []
+    fails = lf.select([
+        (pl.col(c).is_not_null() &
+         pl.col(c).str.replace_all(",", "", literal=True).cast(pl.Float64, strict=False).is_null()).sum().alias(c)
+        for c in cols
+    ]).collect(engine="streaming")
+    return [c for c in cols if fails[c][0] == 0]
+
+
+# ------------------------
+# Pipeline stages
+# ------------------------
+
+def extract_lazy(info_path: str, kpi_path: str, cust_path: str, sep: str = ",") -> Dict[str, pl.LazyFrame]:
+    def scan(p: str) -> pl.LazyFrame:
+        return pl.scan_csv(p, separator=sep, infer_schema=False, null_values=PANDAS_NA_VALUES, encoding="utf8")
+    return {"info": scan(info_path), "kpi": scan(kpi_path), "cust": scan(cust_path)}
+
+
+def _prepare_monthly(lf: pl.LazyFrame, bucket_cols: List[str]) -> pl.LazyFrame:
+    schema = lf.collect_schema().names()
+    bucket_cols = [c for c in bucket_cols if c in schema]
+    if TIME in schema:
+        lf = lf.with_columns(_month_ordinal(TIME))
+
+    # add_bucket_features: <col>_ORD, <col>_MID appended after the raw columns
+    maps = _bucket_maps(lf, bucket_cols)
+    bucket_exprs = []
+    for c in bucket_cols:
+        labels, ords, mids = maps[c]
+        bucket_exprs.append(pl.col(c).replace_strict(labels, ords, default=None, return_dtype=pl.Float64).alias(f"{c}_ORD"))
+        bucket_exprs.append(pl.col(c).replace_strict(labels, mids, default=None, return_dtype=pl.Float64).alias(f"{c}_MID"))
+    if bucket_exprs:
+        lf = lf.with_columns(bucket_exprs)
+
+    # to_numeric_smart + replace_special_missing + standardize_rates
+    str_cols = [c for c in schema if c not in (ID, TIME)]
+    numeric = set(_numeric_columns(lf, str_cols))
+    exprs = []
+    for c in str_cols:
+        stripped = pl.col(c).str.replace_all(",", "", literal=True)
+        if c in numeric:
+            v = _clean_float(stripped.cast(pl.Float64, strict=False))
+            if c in ew.RATE_COLS_0_100:
+                v = v / 100.0
+            exprs.append(v.alias(c))
+        elif c in ew.RATE_COLS_0_100:
+            # standardize_rates coerces rate columns even when to_numeric_smart left them as text
+            exprs.append((_clean_float(stripped.cast(pl.Float64, strict=False)) / 100.0).alias(c))
+        else:
+            exprs.append(stripped.alias(c))
+    exprs += [_clean_float(pl.col(f"{c}_{s}")).alias(f"{c}_{s}") for c in bucket_cols for s in ("ORD", "MID")]
+    return lf.with_columns(exprs)
+
+
+def _suffix_overlap(left: pl.LazyFrame, right: pl.LazyFrame, keys: List[str],
+                    suffixes: Tuple[str, str]) -> Tuple[pl.LazyFrame, pl.LazyFrame]:
+    lcols, rcols = left.collect_schema().names(), right.collect_schema().names()
+    overlap = (set(lcols) & set(rcols)) - set(keys)
+    if overlap:
+        left = left.rename({c: c + suffixes[0] for c in overlap})
+        right = right.rename({c: c + suffixes[1] for c in overlap})
+    return left, right
+
+
+def transform_lazy(d: Dict[str, pl.LazyFrame],
+                   drop_horizons: List[int] = [1, 2, 3],
+                   drop_thresh: float = -0.30,
+                   close_horizon: int = 3,
+                   windows: Tuple[int, ...] = (3, 6, 12)) -> Tuple[pl.LazyFrame, Dict[str, List[str]]]:
+    info = d["info"]
+    info_cols = info.collect_schema().names()
+    info = info.with_columns([_parse_date(c) for c in ("ARE_D", "MCT_ME_D") if c in info_cols])
+
+    kpi = _prepare_monthly(d["kpi"], ew.BUCKET_COLS)
+    cust = _prepare_monthly(d["cust"], [])
+
+    kpi, cust = _suffix_overlap(kpi, cust, [ID, TIME], ("_KPI", "_CUST"))
+    merged = kpi.join(cust, on=[ID, TIME], how="full", coalesce=True)
+    merged, info = _suffix_overlap(merged, info, [ID], ("_x", "_y"))
+    merged = merged.join(info, on=ID, how="left", coalesce=True)
+
+    schema = merged.collect_schema()
+    for c in ("MCT_SIGUNGU_NM", "HPSN_MCT_BZN_CD_NM"):
+        if c not in schema:
+            merged = merged.with_columns(pl.lit(None, dtype=pl.Float64).alias(c))
+            schema = merged.collect_schema()
+    num_cols = [c for c, t in schema.items() if t.is_float() and c != TIME]
+
+    # build_peer_zscores: rows with a missing peer key get no z (pandas groupby drops null keys)
+    peer = ["MCT_SIGUNGU_NM", "HPSN_MCT_BZN_CD_NM", TIME]
+    has_peer = pl.all_horizontal([pl.col(k).is_not_null() for k in peer])
+    merged = merged.with_columns([
+        pl.when(has_peer).then(
+            (pl.col(c) - pl.col(c).mean().over(peer)) /
+            pl.when(pl.col(c).std().over(peer) != 0).then(pl.col(c).std().over(peer))
+        ).alias(f"{c}__PEER_Z")
+        for c in num_cols
+    ])
+    z_cols = [f"{c}__PEER_Z" for c in num_cols]
+
+    # add_rolling_features: per-merchant row windows in time order
+    merged = merged.sort([ID, TIME], nulls_last=True)
+    roll_cols = num_cols + z_cols
+    feats = []
+    for w in windows:
+        feats += [pl.col(c).rolling_mean(w, min_samples=1).over(ID).alias(f"{c}__MA{w}") for c in roll_cols]
+        if w == windows[0]:
+            # pandas pct_change forward-fills within the group before dividing
+            for c in roll_cols:
+                filled = pl.col(c).forward_fill().over(ID)
+                feats.append(_clean_float(filled / filled.shift(1).over(ID) - 1).alias(f"{c}__PCT1"))
+        feats += [pl.col(c).rolling_std(w, min_samples=2).over(ID).alias(f"{c}__VOL{w}") for c in roll_cols]
+    merged = merged.with_columns(feats)
+
+    # make_labels
+    kpi_candidates = [c for c in ["RC_M1_SAA_MID", "RC_M1_TO_UE_CT_MID", "RC_M1_UE_CUS_CN_MID", "RC_M1_AV_NP_AT_MID"]
+                      if c in merged.collect_schema()]
+    if not kpi_candidates:
+        raise ValueError("No KPI *_MID columns found for drop labeling.")
+    merged = merged.with_columns(pl.coalesce(kpi_candidates).alias("KPI_PROXY"))
+    merged = merged.with_columns(pl.col("KPI_PROXY").rolling_mean(3, min_samples=2).over(ID).alias("KPI_PROXY_MA3"))
+
+    label_exprs = []
+    for H in drop_horizons:
+        future = pl.col("KPI_PROXY").shift(-H).over(ID)
+        ratio = ((future - pl.col("KPI_PROXY_MA3")) / pl.col("KPI_PROXY_MA3")).fill_nan(None)
+        lab = (ratio <= drop_thresh).fill_null(False).cast(pl.Int8)
+        label_exprs.append(pl.when(future.is_null() | pl.col("KPI_PROXY_MA3").is_null())
+                           .then(None).otherwise(lab).alias(f"y_drop_h{H}"))
+    merged = merged.with_columns(label_exprs)
+
+    close_col = f"y_close_h{close_horizon}"
+    has_close_date = "MCT_ME_D" in merged.collect_schema()
+    if has_close_date:
+        me = pl.col("MCT_ME_D")
+        merged = merged.with_columns(((me.dt.year() - 1970) * 12 + me.dt.month() - 1).alias("__CLOSE_MONTH"))
+        dist = pl.col("__CLOSE_MONTH") - pl.col(TIME)
+        merged = merged.with_columns(
+            pl.when(pl.col("__CLOSE_MONTH").is_null()).then(pl.lit(0, dtype=pl.Int8))
+            .when(dist <= 0).then(None)
+            .when(dist <= close_horizon).then(pl.lit(1, dtype=pl.Int8))
+            .otherwise(pl.lit(0, dtype=pl.Int8)).alias(close_col))
+    else:
+        merged = merged.with_columns(pl.lit(0, dtype=pl.Int8).alias(close_col))
+
+    drop_cols = [f"y_drop_h{H}" for H in drop_horizons]
+    merged = merged.with_columns(pl.max_horizontal(drop_cols + [close_col]).cast(pl.Int8).alias("y_risk_any"))
+
+    period_cols = [TIME] + (["__CLOSE_MONTH"] if has_close_date else [])
+    int8_cols = drop_cols + [close_col, "y_risk_any"]
+    return merged, {"period": period_cols, "int8": int8_cols}
+
+
+def to_pandas_frame(df: pl.DataFrame, kinds: Dict[str, List[str]]) -> pd.DataFrame:
+    """Restore pandas-engine dtypes: Period[M] months, nullable Int8 labels."""
+    out = df.drop(kinds["period"] + kinds["int8"]).to_pandas()
+    for c in kinds["period"]:
+        ords = df[c].fill_null(pd.NaT.value).to_numpy().astype(np.int64)
+        out[c] = pd.PeriodIndex.from_ordinals(ords, freq="M")
+    for c in kinds["int8"]:
+        out[c] = pd.Series(df[c].to_numpy()).astype("Int8")
+    return out[df.columns]
+
+
+def run_polars_etl(info_path: str, kpi_path: str, cust_path: str, sep: str = ",",
+                   drop_horizons: List[int] = [1, 2, 3],
+                   drop_thresh: float = -0.30,
+                   close_horizon: int = 3) -> pd.DataFrame:
+    lazy = extract_lazy(info_path, kpi_path, cust_path, sep=sep)
+    plan, kinds = transform_lazy(lazy, drop_horizons=drop_horizons, drop_thresh=drop_thresh,
+                                 close_horizon=close_horizon)
+    return to_pandas_frame(plan.collect(engine="streaming"), kinds)
+
+
+# ------------------------
+# Parity check
+# ------------------------
+
+def compare_frames(expected: pd.DataFrame, actual: pd.DataFrame,
+                   rtol: float = 1e-6, atol: float = 1e-9, vol_atol: float = 1e-7,
+                   pct_mismatch_frac: float = 1e-3, pct_degenerate: float = 1e12) -> List[str]:
+    """Column-by-column diff of two ETL outputs (rows aligned on ENCODED_MCT, TA_YM). Empty list = parity.
+
+    __VOL columns use `vol_atol`: pandas' online rolling std leaves ~1e-8 on constant windows
+    (peer z-scores of a flat series) where Polars gives ~1e-16.
+    __PCT1 columns divide by the previous value, so a base that is exactly 0 in one engine and
+    ~1e-16 in the other (different float summation order) turns into NaN vs a huge ratio. Rows
+    where either side is NaN or above `pct_degenerate` in magnitude while the other is above it are
+    treated as equal, and up to max(3, `pct_mismatch_frac` of the rows) may still differ.
+    """
+    problems = []
+    missing, extra = set(expected.columns) - set(actual.columns), set(actual.columns) - set(expected.columns)
+    if missing:
+        problems.append(f"missing columns: {sorted(missing)[:10]}")
+    if extra:
+        problems.append(f"extra columns: {sorted(extra)[:10]}")
+    if len(expected) != len(actual):
+        return problems + [f"row count {len(expected)} != {len(actual)}"]
+
+    # align on the key order one column at a time (two sorted copies of a full panel do not fit in memory)
+    e_order = expected[[ID, TIME]].reset_index(drop=True).sort_values([ID, TIME]).index.to_numpy()
+    a_order = actual[[ID, TIME]].reset_index(drop=True).sort_values([ID, TIME]).index.to_numpy()
+    for c in [c for c in expected.columns if c in actual.columns]:
+        ec = expected[c].iloc[e_order].reset_index(drop=True)
+        ac = actual[c].iloc[a_order].reset_index(drop=True)
+        if pd.api.types.is_numeric_dtype(ec) and pd.api.types.is_numeric_dtype(ac):
+            ev, av = ec.astype("float64").to_numpy(), ac.astype("float64").to_numpy()
+            same_na = np.isnan(ev) == np.isnan(av)
+            close = np.isclose(ev, av, rtol=rtol, atol=vol_atol if "__VOL" in c else atol, equal_nan=True)
+            ok = same_na & close
+            if c.endswith("__PCT1"):
+                with np.errstate(invalid="ignore"):
+                    huge_e, huge_a = np.abs(ev) > pct_degenerate, np.abs(av) > pct_degenerate
+                ok |= (huge_e | np.isnan(ev)) & (huge_a | np.isnan(av)) & (huge_e | huge_a)
+            bad = int((~ok).sum())
+        else:
+            bad = int((~((ec.astype("string") == ac.astype("string")).fillna(False) | (ec.isna() & ac.isna()))).sum())
+        if c.endswith("__PCT1") and bad <= max(3, pct_mismatch_frac * len(expected)):
+            continue
+        if bad:
+            problems.append(f"{c}: {bad} mismatching rows")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Polars ETL backend — parity check against the pandas engine")
+    ap.add_argument("--info", required=True)
+    ap.add_argument("--kpi", required=True)
+    ap.add_argument("--cust", required=True)
+    ap.add_argument("--sep", default=",")
+    args = ap.parse_args()
+
+    import time
+    t0 = time.perf_counter()
+    expected = ew.data_transform(ew.data_extract(args.info, args.kpi, args.cust, sep=args.sep))
+    t1 = time.perf_counter()
+    actual = run_polars_etl(args.info, args.kpi, args.cust, sep=args.sep)
+    t2 = time.perf_counter()
+    print(f"[ETL] pandas {t1 - t0:.2f}s  polars {t2 - t1:.2f}s  ({expected.shape[0]} rows x {expected.shape[1]} cols)")
+
+    problems = compare_frames(expected, actual)
+    if problems:
+        print("[PARITY] FAILED")
+        for p in problems[:50]:
+            print("  -", p)
+        raise SystemExit(1)
+    print("[PARITY] OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch explanations for the LightGBM risk model (run_lgbm -> lgbm_model.joblib)
+
+Streams dataset_features_labels.parquet in row chunks and, in worker processes, computes exact TreeSHAP
+contributions with LightGBM's native `pred_contrib`. The per-column contributions (log-odds) are folded
+back onto the source columns before ranking:
+  RC_M1_SAA__MA3, RC_M1_SAA__PEER_Z__VOL6, RC_M1_SAA_ORD, RC_M1_SAA_MID, one-hot RC_M1_SAA_<label>  -> RC_M1_SAA
+and the top-k sources by |contribution| per merchant-month are written as a long, dictionary-encoded table
+partitioned by month (<out>/TA_YM=<YYYY-MM>/part-0.parquet):
+  ENCODED_MCT, score (P(y_risk_any)), rank (1..k), feature, contribution
+Chunks are written as they finish, so memory stays bounded by jobs x chunk_rows. <out>/_manifest.json records
+the model file digest; months already explained by the same model are skipped on the next run.
+
+Usage:
+  python explain_lgbm.py --features ./out/dataset_features_labels.parquet --model ./out/lgbm_model.joblib --out ./out/lgbm_reasons
+  python explain_lgbm.py --features ... --model ... --out ... --months 2 --top_k 5 --jobs 4 --chunk_rows 20000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import scipy.sparse as sp
+from scipy.special import expit
+
+from early_warning_methods import BUCKET_COLS, LGBM_MODEL_FILE
+
+
+ID, TIME = "ENCODED_MCT", "TA_YM"
+DERIVED_SEP = "__"
+BUCKET_SUFFIXES = ("_ORD", "_MID")
+MANIFEST_FILE = "_manifest.json"
+
+
+# ------------------------
+# Feature -> source column
+# ------------------------
+
+def source_column(name: str) -> str:
+    """Input column of the pipeline -> the raw column it was derived from."""
+    base = name.split(DERIVED_SEP, 1)[0] if not name.startswith(DERIVED_SEP) else name
+    for suf in BUCKET_SUFFIXES:
+        if base.endswith(suf) and base[:-len(suf)] in BUCKET_COLS:
+            return base[:-len(suf)]
+    return base
+
+
+def transformed_sources(pre) -> List[str]:
+    """Source column of every output column of the fitted build_lgbm_preprocess ColumnTransformer."""
+    out = []
+    for name, trans, cols in pre.transformers_:
+        if trans == "drop" or len(cols) == 0:
+            continue
+        names = list(trans.get_feature_names_out(cols))
+        if name == "cat":
+            # one-hot names are <col>_<category>; match the longest input column prefix
+            by_len = sorted(cols, key=len, reverse=True)
+            names = [next(c for c in by_len if n.startswith(f"{c}_")) for n in names]
+        out += [source_column(n) for n in names]
+    return out
+
+
+def fold_matrix(sources: List[str]):
+    """(n_features x n_sources) 0/1 CSR matrix summing feature contributions per source, and the source names."""
+    uniq, inverse = np.unique(np.asarray(sources, dtype=object).astype(str), return_inverse=True)
+    mat = sp.csr_matrix((np.ones(len(sources)), (np.arange(len(sources)), inverse)),
+                        shape=(len(sources), len(uniq)))
+    return mat, list(uniq)
+
+
+# ------------------------
+# Workers
+# ------------------------
+
+_WORKER: Dict[str, any] = {}
+
+
+def _init_worker(model_path: str, num_threads: int) -> None:
+    pipe = joblib.load(model_path)
+    pre = pipe.named_steps["preprocess"]
+    fold, names = fold_matrix(transformed_sources(pre))
+    _WORKER.update(pre=pre, booster=pipe.named_steps["clf"].booster_, fold=fold, names=names,
+                   feature_cols=list(pre.feature_names_in_), num_threads=num_threads)
+
+
+def _explain_chunk(chunk: pd.DataFrame, top_k: int) -> Dict[str, np.ndarray]:
+    w = _WORKER
+    X = w["pre"].transform(chunk[w["feature_cols"]])
+    contrib = w["booster"].predict(X, pred_contrib=True, num_threads=w["num_threads"])
+    if sp.issparse(contrib):
+        contrib = contrib.tocsr()
+        raw = np.asarray(contrib.sum(axis=1)).ravel()
+        folded = (contrib[:, :-1] @ w["fold"]).toarray()
+    else:
+        raw = contrib.sum(axis=1)
+        folded = np.asarray(contrib[:, :-1] @ w["fold"])
+
+    k = min(top_k, folded.shape[1])
+    mag = np.abs(folded)
+    top = np.argpartition(-mag, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(mag, top, axis=1), axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    n = len(chunk)
+    return {
+        ID: np.repeat(chunk[ID].astype(str).to_numpy(), k),
+        TIME: np.repeat(chunk[TIME].astype(str).to_numpy(), k),
+        "score": np.repeat(expit(raw).astype(np.float32), k),
+        "rank": np.tile(np.arange(1, k + 1, dtype=np.int8), n),
+        "feature": top.ravel().astype(np.int32),
+        "contribution": np.take_along_axis(folded, top, axis=1).ravel().astype(np.float32),
+    }
+
+
+# ------------------------
+# Driver
+# ------------------------
+
+def _to_table(res: Dict[str, np.ndarray], names: List[str]) -> pa.Table:
+    return pa.table({
+        ID: pa.array(res[ID]).dictionary_encode(),
+        TIME: pa.array(res[TIME]).dictionary_encode(),
+        "score": res["score"],
+        "rank": res["rank"],
+        "feature": pa.DictionaryArray.from_arrays(pa.array(res["feature"]), pa.array(names)),
+        "contribution": res["contribution"],
+    })
+
+
+def _iter_chunks(features: str, columns: List[str], chunk_rows: int, months: List[str]):
+    pf = pq.ParquetFile(features)
+    for batch in pf.iter_batches(batch_size=chunk_rows, columns=columns):
+        chunk = batch.to_pandas()
+        chunk = chunk[chunk[TIME].astype(str).isin(months)]
+        if len(chunk):
+            yield chunk
+
+
+def _all_months(features: str) -> List[str]:
+    months = pd.read_parquet(features, columns=[TIME])[TIME].dropna().unique()
+    return [str(m) for m in np.sort(months)]
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_manifest(out: Path, digest: str, top_k: int) -> List[str]:
+    """Months already explained by this exact model / top_k; anything else in `out` is stale and removed."""
+    path = out / MANIFEST_FILE
+    if path.exists():
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("model_sha1") == digest and manifest.get("top_k") == top_k:
+            return manifest["months"]
+    for part in out.glob(f"{TIME}=*"):
+        shutil.rmtree(part)
+    path.unlink(missing_ok=True)
+    return []
+
+
+def explain(features: str, model: str, out: str, top_k: int = 5, jobs: int = 4,
+            chunk_rows: int = 20_000, months: Optional[int] = None) -> Dict[str, any]:
+    """Write the top-k reasons for every row of `features` (or its last `months` months) under `out`.
+
+    `out` is a directory partitioned by month (TA_YM=<YYYY-MM>/part-0.parquet) plus a manifest with
+    the model digest: months already explained by the same model file are skipped, so a monthly run
+    only pays for the new month and a retrained model starts from scratch.
+    """
+    jobs = max(1, jobs)
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    _init_worker(model, threads)  # driver copy: column list, source names; also used when jobs == 1
+    names, columns = _WORKER["names"], [ID, TIME] + _WORKER["feature_cols"]
+
+    out_dir = Path(out); out_dir.mkdir(parents=True, exist_ok=True)
+    digest = _file_digest(model)
+    done = _load_manifest(out_dir, digest, top_k)
+    wanted = _all_months(features)
+    if months:
+        wanted = wanted[-months:]
+    todo = [m for m in wanted if m not in done]
+    print(f"[EXPLAIN] {len(todo)} month(s) to explain, {len(wanted) - len(todo)} cached")
+
+    writers: Dict[str, pq.ParquetWriter] = {}
+    n_rows = 0
+
+    def write(res: Dict[str, np.ndarray]) -> None:
+        nonlocal n_rows
+        table = _to_table(res, names)
+        n_rows += len(table) // max(min(top_k, len(names)), 1)
+        month_col = table.column(TIME).combine_chunks()
+        for i, m in enumerate(month_col.dictionary.to_pylist()):
+            part = table.filter(pc.equal(month_col.indices, i)).drop_columns([TIME])
+            if m not in writers:
+                (out_dir / f"{TIME}={m}").mkdir(exist_ok=True)
+                writers[m] = pq.ParquetWriter(out_dir / f"{TIME}={m}" / "part-0.parquet.tmp",
+                                              part.schema, compression="zstd")
+            writers[m].write_table(part)
+
+    if todo:
+        chunks = _iter_chunks(features, columns, chunk_rows, todo)
+        try:
+            if jobs == 1:
+                for chunk in chunks:
+                    write(_explain_chunk(chunk, top_k))
+            else:
+                # bounded in-flight window keeps memory at ~2 x jobs chunks
+                with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                         initargs=(model, threads)) as ex:
+                    pending = deque()
+                    for chunk in chunks:
+                        pending.append(ex.submit(_explain_chunk, chunk, top_k))
+                        if len(pending) >= 2 * jobs:
+                            write(pending.popleft().result())
+                    while pending:
+                        write(pending.popleft().result())
+        finally:
+            for w in writers.values():
+                w.close()
+        for m in writers:
+            tmp = out_dir / f"{TIME}={m}" / "part-0.parquet.tmp"
+            tmp.replace(tmp.with_suffix(""))
+
+    # manifest last: a month is only cached once its partition is complete
+    manifest = {"model": str(model), "model_sha1": digest, "top_k": top_k,
+                "months": sorted(set(done) | set(writers)), "sources": names}
+    (out_dir / MANIFEST_FILE).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return {"rows": n_rows, "months": len(writers), "cached": len(wanted) - len(todo),
+            "sources": len(names), "top_k": min(top_k, len(names)), "out": out}
+
+
+def read_reasons(path: str, mct: str, month: Optional[str] = None) -> pd.DataFrame:
+    """Reasons for one merchant (optionally one 'YYYY-MM' month, read from that partition only), for the UI."""
+    if month:
+        df = pd.read_parquet(Path(path) / f"{TIME}={month}", filters=[(ID, "==", mct)])
+        df[TIME] = month
+    else:
+        df = pd.read_parquet(path, filters=[(ID, "==", mct)])
+    for c in (ID, TIME, "feature"):
+        df[c] = df[c].astype(str)
+    return df.sort_values([TIME, "rank"]).reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Early Warning — batch TreeSHAP reasons for the LightGBM risk model")
+    ap.add_argument("--features", required=True, help="dataset_features_labels.parquet (data_load output)")
+    ap.add_argument("--model", default=None, help=f"fitted pipeline (default: <features dir>/{LGBM_MODEL_FILE})")
+    ap.add_argument("--out", default=None, help="output directory (default: <features dir>/lgbm_reasons/)")
+    ap.add_argument("--top_k", type=int, default=5)
+    ap.add_argument("--months", type=int, default=None, help="only explain the last N months")
+    ap.add_argument("--jobs", type=int, default=4, help="worker processes")
+    ap.add_argument("--chunk_rows", type=int, default=20_000)
+    ap.add_argument("--mct", default=None, help="print one merchant's reasons from --out and exit")
+    args = ap.parse_args()
+
+    base = Path(args.features).parent
+    out = args.out or str(base / "lgbm_reasons")
+    if args.mct:
+        print(read_reasons(out, args.mct).to_string(index=False))
+        return
+
+    t0 = time.perf_counter()
+    info = explain(args.features, args.model or str(base / LGBM_MODEL_FILE), out,
+                   top_k=args.top_k, jobs=args.jobs, chunk_rows=args.chunk_rows, months=args.months)
+    secs = time.perf_counter() - t0
+    print(f"[EXPLAIN] {info['rows']:,} merchant-months ({info['months']} new months, {info['cached']} cached) "
+          f"x top {info['top_k']} of {info['sources']} source columns in {secs:.1f}s "
+          f"({info['rows'] / max(secs, 1e-9):,.0f} rows/s)")
+    print(f"[SAVED] {out}")
+
+
+if __name__ == "__main__":
+    main()
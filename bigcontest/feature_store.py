@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Merchant-level feature store for the early-warning feature matrix
+
+Lays out the numeric columns of dataset_features_labels as one row-major float32 matrix sorted by
+(ENCODED_MCT, TA_YM), so every merchant's history is a contiguous block of rows:
+  features.npy       float32 [n_rows, n_cols]   (memory-mapped on read)
+  months.npy         int32   [n_rows]           TA_YM as Period[M] ordinals
+  merchant_ids.npy   str     [n_merchants]      sorted ENCODED_MCT
+  offsets.npy        int64   [n_merchants + 1]  rows offsets[i]:offsets[i+1] belong to merchant_ids[i]
+  meta.json          column names, shapes, skipped (non-numeric) columns, source
+
+A lookup is a binary search over merchant_ids plus a slice of the memory map, so one merchant's
+history loads in microseconds without touching the rest of the file.
+
+Usage:
+  python feature_store.py --features ./out/dataset_features_labels.parquet --store ./out/feature_store
+  python feature_store.py --store ./out/feature_store --mct MCT00000042
+  python feature_store.py --store ./out/feature_store --bench 10000
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+ID, TIME = "ENCODED_MCT", "TA_YM"
+META_FILE = "meta.json"
+STORE_VERSION = 1
+
+
+# ------------------------
+# Writer
+# ------------------------
+
+def _store_columns(df: pd.DataFrame) -> Tuple[List[str], List[str]]:
+    """(numeric columns stored as float32, columns left out)."""
+    cols = [c for c in df.columns if c not in (ID, TIME)]
+    numeric = [c for c in cols if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])]
+    return numeric, [c for c in cols if c not in numeric]
+
+
+def write_feature_store(df: pd.DataFrame, store: str, source: Optional[str] = None) -> Dict[str, any]:
+    """Write the memory-mapped store for a data_transform / dataset_features_labels frame. Returns the metadata."""
+    out = Path(store); out.mkdir(parents=True, exist_ok=True)
+    (out / META_FILE).unlink(missing_ok=True)  # readers refuse the store until the rewrite is complete
+    df = df[df[ID].notna()]
+    columns, skipped = _store_columns(df)
+
+    months = df[TIME]
+    if isinstance(months.dtype, pd.PeriodDtype):
+        months = months.array.asi8
+    else:
+        months = pd.PeriodIndex(months.astype(str), freq="M").asi8
+    months = np.where(months == pd.NaT.value, np.iinfo(np.int32).max, months).astype(np.int32)  # NaT last
+
+    ids = df[ID].astype(str).to_numpy()
+    order = np.lexsort((months, ids))
+    ids, months = ids[order], months[order]
+    uniq, starts = np.unique(ids, return_index=True)
+    offsets = np.append(starts, len(ids)).astype(np.int64)
+
+    # column by column into the row-major map: only one column is materialized at a time
+    mat = np.lib.format.open_memmap(out / "features.npy", mode="w+", dtype=np.float32,
+                                    shape=(len(order), len(columns)))
+    for j, c in enumerate(columns):
+        mat[:, j] = df[c].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+    mat.flush()
+    del mat
+
+    np.save(out / "months.npy", months)
+    np.save(out / "merchant_ids.npy", uniq.astype(str))
+    np.save(out / "offsets.npy", offsets)
+
+    meta = {
+        "version": STORE_VERSION,
+        "id_col": ID,
+        "time_col": TIME,
+        "time_encoding": "period[M] ordinal (months since 1970-01)",
+        "dtype": "float32",
+        "n_rows": int(len(order)),
+        "n_merchants": int(len(uniq)),
+        "columns": columns,
+        "skipped_columns": skipped,
+        "source": source,
+    }
+    # meta.json last: a store without it is incomplete
+    (out / META_FILE).write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return meta
+
+
+# ------------------------
+# Reader
+# ------------------------
+
+class FeatureStore:
+    """Read-only view over a store written by write_feature_store; the feature matrix stays on disk."""
+
+    def __init__(self, store: str):
+        path = Path(store)
+        meta_path = path / META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"{meta_path} not found (store missing or incomplete).")
+        self.meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported feature store version {self.meta.get('version')} (expected {STORE_VERSION}).")
+        self.columns: List[str] = self.meta["columns"]
+        self._col_index = {c: j for j, c in enumerate(self.columns)}
+        self.values = np.load(path / "features.npy", mmap_mode="r")
+        self.months = np.load(path / "months.npy", mmap_mode="r")
+        self.merchant_ids = np.load(path / "merchant_ids.npy")
+        self.offsets = np.load(path / "offsets.npy")
+
+    def __len__(self) -> int:
+        return len(self.merchant_ids)
+
+    def __contains__(self, mct: str) -> bool:
+        return self._find(mct) is not None
+
+    def _find(self, mct: str) -> Optional[int]:
+        i = int(np.searchsorted(self.merchant_ids, mct))
+        if i < len(self.merchant_ids) and self.merchant_ids[i] == mct:
+            return i
+        return None
+
+    def row_range(self, mct: str) -> Tuple[int, int]:
+        i = self._find(mct)
+        if i is None:
+            raise KeyError(mct)
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def history_array(self, mct: str, columns: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(month ordinals, float32 matrix) for one merchant — views into the memory map when columns is None."""
+        lo, hi = self.row_range(mct)
+        block = self.values[lo:hi]
+        if columns is not None:
+            block = block[:, [self._col_index[c] for c in columns]]
+        return self.months[lo:hi], block
+
+    def history(self, mct: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """One merchant's rows as a DataFrame indexed by TA_YM (Period[M])."""
+        months, block = self.history_array(mct, columns)
+        ords = months.astype(np.int64)
+        ords[ords == np.iinfo(np.int32).max] = pd.NaT.value
+        index = pd.PeriodIndex.from_ordinals(ords, freq="M").rename(TIME)
+        return pd.DataFrame(np.asarray(block), index=index, columns=columns or self.columns)
+
+
+# ------------------------
+# CLI
+# ------------------------
+
+def _bench(fs: FeatureStore, n: int, seed: int = 42) -> None:
+    rng = np.random.default_rng(seed)
+    picks = fs.merchant_ids[rng.integers(0, len(fs), n)]
+    lookups = [("history_array", lambda m: np.array(fs.history_array(m)[1])),
+               ("history (DataFrame)", fs.history)]
+    for label, fn in lookups:
+        t0 = time.perf_counter()
+        for m in picks:
+            fn(m)
+        per = (time.perf_counter() - t0) / n * 1e6
+        print(f"[BENCH] {label:<20} {per:8.1f} us / merchant  ({n} random lookups)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Early Warning — memory-mapped merchant feature store")
+    ap.add_argument("--store", required=True, help="feature store directory")
+    ap.add_argument("--features", default=None, help="dataset_features_labels.parquet to (re)build the store from")
+    ap.add_argument("--mct", default=None, help="print one merchant's history")
+    ap.add_argument("--columns", nargs="+", default=None, help="columns to show with --mct")
+    ap.add_argument("--bench", type=int, default=0, help="time N random merchant lookups")
+    args = ap.parse_args()
+
+    if args.features:
+        t0 = time.perf_counter()
+        meta = write_feature_store(pd.read_parquet(args.features), args.store, source=args.features)
+        print(f"[SAVED] {args.store}: {meta['n_rows']} rows x {len(meta['columns'])} cols, "
+              f"{meta['n_merchants']} merchants ({time.perf_counter() - t0:.1f}s); "
+              f"skipped non-numeric: {', '.join(meta['skipped_columns']) or '-'}")
+
+    fs = FeatureStore(args.store)
+    if args.mct:
+        t0 = time.perf_counter()
+        hist = fs.history(args.mct, args.columns)
+        elapsed = (time.perf_counter() - t0) * 1e6
+        print(hist.to_string())
+        print(f"\n[LOOKUP] {args.mct}: {len(hist)} rows in {elapsed:.0f} us")
+    if args.bench:
+        _bench(fs, args.bench)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hyperparameter search for the early-warning models (LightGBM / Cox TV / XGBoost AFT)
+
+Random search with successive-halving pruning over time-based folds:
+  - trials run in a process pool, each capped to --threads_per_trial cores
+  - every rung evaluates the surviving trials on the next fold; only the top 1/eta go on
+  - the best configuration is merged into <outdir>/best_params.json, which
+    early_warning_methods.py picks up automatically on the next run
+
+Reads the cached feature matrix written by early_warning_methods.data_load, so the ETL is not re-run.
+
+Usage:
+  python hparam_search.py --features ./out/dataset_features_labels.parquet --model lgbm --n_trials 32 --n_jobs 4 --outdir ./out
+  python hparam_search.py --features ./out/dataset_features_labels.parquet --model cox  --n_trials 16 --outdir ./out
+  python hparam_search.py --features ./out/dataset_features_labels.parquet --model aft  --n_trials 32 --outdir ./out
+"""
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------
+# Search spaces
+# ------------------------
+
+def _log_uniform(rng: np.random.Generator, lo: float, hi: float) -> float:
+    return float(np.exp(rng.uniform(np.log(lo), np.log(hi))))
+
+
+SEARCH_SPACES: Dict[str, Callable[[np.random.Generator], Dict[str, any]]] = {
+    "lgbm": lambda rng: {
+        "n_estimators": int(rng.integers(200, 1201)),
+        "learning_rate": _log_uniform(rng, 0.01, 0.2),
+        "num_leaves": int(rng.integers(15, 256)),
+        "min_child_samples": int(rng.integers(10, 201)),
+        "subsample": float(rng.uniform(0.5, 1.0)),
+        "subsample_freq": 1,
+        "colsample_bytree": float(rng.uniform(0.4, 1.0)),
+        "reg_lambda": _log_uniform(rng, 1e-3, 10.0),
+    },
+    "cox": lambda rng: {
+        "penalizer": _log_uniform(rng, 1e-3, 10.0),
+        "l1_ratio": float(rng.choice([0.0, 0.1, 0.5, 0.9])),
+    },
+    "aft": lambda rng: {
+        "learning_rate": _log_uniform(rng, 0.01, 0.2),
+        "max_depth": int(rng.integers(3, 11)),
+        "min_child_weight": _log_uniform(rng, 0.5, 20.0),
+        "subsample": float(rng.uniform(0.5, 1.0)),
+        "colsample_bytree": float(rng.uniform(0.4, 1.0)),
+        "lambda": _log_uniform(rng, 1e-2, 10.0),
+        "aft_loss_distribution": str(rng.choice(["normal", "logistic", "extreme"])),
+        "aft_loss_distribution_scale": float(rng.choice([0.5, 1.0, 1.5, 2.0])),
+    },
+}
+
+
+# ------------------------
+# Time-based folds
+# ------------------------
+
+def time_folds(months: np.ndarray, n_folds: int, valid_months: int, test_months: int) -> List[Tuple[object, object]]:
+    """Expanding-window folds before the test window: [(valid_start, valid_end_exclusive), ...], oldest first."""
+    months = np.sort(months)
+    usable = months[:-test_months] if test_months else months
+    need = n_folds * valid_months + 3
+    if len(usable) < need:
+        raise ValueError(f"Not enough months for {n_folds} folds of {valid_months} month(s): need {need}, have {len(usable)}.")
+    # The last fold ends at the first test month so the test window never leaks into model selection.
+    test_start = months[len(usable)] if test_months else None
+    folds = []
+    for i in range(n_folds, 0, -1):
+        start = len(usable) - i * valid_months
+        end = start + valid_months
+        folds.append((usable[start], usable[end] if end < len(usable) else test_start))
+    assert test_start is None or all(end is not None and end <= test_start for _, end in folds)
+    return folds
+
+
+def _split(df: pd.DataFrame, fold: Tuple[object, object], time_col: str = "TA_YM") -> Tuple[pd.DataFrame, pd.DataFrame]:
+    start, end = fold
+    valid_mask = df[time_col] >= start
+    if end is not None:
+        valid_mask &= df[time_col] < end
+    return df[df[time_col] < start], df[valid_mask]
+
+
+# ------------------------
+# Worker side
+# ------------------------
+
+_DATA: Dict[str, pd.DataFrame] = {}
+
+
+def _init_worker(features_path: str, threads: int) -> None:
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    _DATA["merged"] = pd.read_parquet(features_path)
+    _DATA["threads"] = threads
+
+
+def _survival_frame() -> pd.DataFrame:
+    if "tv" not in _DATA:
+        import early_warning_methods as ew
+        _DATA["tv"] = ew.build_survival_frame_timevarying(_DATA["merged"], id_col="ENCODED_MCT", time_col="TA_YM")
+    return _DATA["tv"]
+
+
+def _score_lgbm(params: Dict[str, any], fold) -> float:
+    import early_warning_methods as ew
+    from sklearn.metrics import average_precision_score
+
+    merged = _DATA["merged"].dropna(subset=["y_risk_any"])
+    train_df, valid_df = _split(merged, fold)
+    feature_cols, cat_cols, num_cols = ew.lgbm_feature_columns(merged)
+    model = ew.build_lgbm_model(cat_cols, num_cols,
+                                params={**params, "n_jobs": _DATA["threads"], "verbosity": -1})
+    model.fit(train_df[feature_cols], train_df["y_risk_any"].astype(int))
+    y_valid = valid_df["y_risk_any"].astype(int)
+    if y_valid.nunique() < 2:
+        return float("nan")
+    return float(average_precision_score(y_valid, model.predict_proba(valid_df[feature_cols])[:, 1]))
+
+
+def _score_cox(params: Dict[str, any], fold) -> float:
+    import early_warning_methods as ew
+
+    tv_train, tv_valid = _split(_survival_frame(), fold)
+    ctv, covs = ew.train_cox_timevarying(tv_train, id_col="ENCODED_MCT", **params)
+    return float(ew.test_cox_timevarying(ctv, tv_valid, id_col="ENCODED_MCT", covariates=covs)["harrell_c"])
+
+
+def _score_aft(params: Dict[str, any], fold) -> float:
+    import early_warning_methods as ew
+
+    tv_train, tv_valid = _split(_survival_frame(), fold)
+    threads = _DATA["threads"]
+    dtrain, _ = ew.build_aft_dmatrix(tv_train, id_col="ENCODED_MCT", nthread=threads)
+    dvalid, _ = ew.build_aft_dmatrix(tv_valid, id_col="ENCODED_MCT", nthread=threads)
+    booster = ew.train_aft(dtrain, dvalid=dvalid, nthread=threads, params=params)
+    return -float(booster.attr("best_score"))
+
+
+_SCORERS = {"lgbm": _score_lgbm, "cox": _score_cox, "aft": _score_aft}
+
+
+def _evaluate(model: str, trial_id: int, params: Dict[str, any], fold) -> Tuple[int, float]:
+    try:
+        score = _SCORERS[model](params, fold)
+    except Exception as e:  # a diverging configuration should not kill the whole search
+        print(f"[WARN] trial {trial_id} failed: {type(e).__name__}: {e}")
+        score = float("nan")
+    return trial_id, score
+
+
+# ------------------------
+# Driver
+# ------------------------
+
+def run_search(features_path: str,
+               model: str,
+               n_trials: int = 32,
+               n_jobs: int = 4,
+               threads_per_trial: int = 2,
+               n_folds: int = 3,
+               valid_months: int = 2,
+               test_months: int = 2,
+               eta: int = 2,
+               seed: int = 42) -> Tuple[Dict[str, any], pd.DataFrame]:
+    """Random search + successive halving. Higher score is better (PR-AUC / Harrell C / -aft-nloglik)."""
+    months = pd.read_parquet(features_path, columns=["TA_YM"])["TA_YM"].dropna().unique()
+    folds = time_folds(months, n_folds=n_folds, valid_months=valid_months, test_months=test_months)
+
+    rng = np.random.default_rng(seed)
+    trials = [SEARCH_SPACES[model](rng) for _ in range(n_trials)]
+    scores: Dict[int, List[float]] = {i: [] for i in range(n_trials)}
+    alive = list(range(n_trials))
+    pruned_at: Dict[int, int] = {}
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(features_path, threads_per_trial)) as ex:
+        for rung, fold in enumerate(folds):
+            futures = [ex.submit(_evaluate, model, i, trials[i], fold) for i in alive]
+            for fut in futures:
+                i, score = fut.result()
+                scores[i].append(score)
+
+            running = {i: np.nanmean(scores[i]) if not np.all(np.isnan(scores[i])) else -np.inf for i in alive}
+            ranked = sorted(alive, key=lambda i: running[i], reverse=True)
+            print(f"[SEARCH] {model} fold {rung + 1}/{len(folds)}: {len(alive)} trials, "
+                  f"best mean={running[ranked[0]]:.4f}")
+            if rung < len(folds) - 1:
+                keep = max(1, math.ceil(len(ranked) / eta))
+                for i in ranked[keep:]:
+                    pruned_at[i] = rung + 1
+                alive = ranked[:keep]
+
+    rows = []
+    for i, params in enumerate(trials):
+        vals = scores[i]
+        rows.append({"trial": i, **params,
+                     "mean_score": float(np.nanmean(vals)) if not np.all(np.isnan(vals)) else float("nan"),
+                     "folds_run": len(vals),
+                     "status": f"pruned@{pruned_at[i]}" if i in pruned_at else "complete"})
+    table = pd.DataFrame(rows).sort_values(["folds_run", "mean_score"], ascending=False).reset_index(drop=True)
+    best = trials[int(table.iloc[0]["trial"])]
+    return best, table
+
+
+def main():
+    import early_warning_methods as ew
+
+    ap = argparse.ArgumentParser(description="Early Warning — hyperparameter search (lgbm / cox / aft)")
+    ap.add_argument("--features", required=True, help="dataset_features_labels.parquet from early_warning_methods")
+    ap.add_argument("--model", choices=sorted(SEARCH_SPACES), required=True)
+    ap.add_argument("--outdir", required=True, help=f"output folder ({ew.BEST_PARAMS_FILE} is updated here)")
+    ap.add_argument("--n_trials", type=int, default=32)
+    ap.add_argument("--n_jobs", type=int, default=4, help="parallel trial processes")
+    ap.add_argument("--threads_per_trial", type=int, default=max(1, (os.cpu_count() or 1) // 4))
+    ap.add_argument("--n_folds", type=int, default=3)
+    ap.add_argument("--valid_months", type=int, default=2, help="months per validation fold")
+    ap.add_argument("--test_months", type=int, default=2, help="final months excluded from the search")
+    ap.add_argument("--eta", type=int, default=2, help="keep the top 1/eta trials after each fold")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    best, table = run_search(args.features, args.model,
+                             n_trials=args.n_trials, n_jobs=args.n_jobs,
+                             threads_per_trial=args.threads_per_trial,
+                             n_folds=args.n_folds, valid_months=args.valid_months,
+                             test_months=args.test_months, eta=args.eta, seed=args.seed)
+
+    out = Path(args.outdir); out.mkdir(parents=True, exist_ok=True)
+    table.to_csv(out / f"hparam_trials_{args.model}.csv", index=False, encoding="utf-8")
+    ew.save_best_params(str(out / ew.BEST_PARAMS_FILE), args.model, best)
+    print(table.head(10).to_string(index=False))
+    print(f"\n[SAVED] best {args.model} params -> {out / ew.BEST_PARAMS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk merchant profiling: persona keys for a whole merchant portfolio
+
+Derives, for every merchant in the info CSV (big_data_set1), the five persona fields the Streamlit
+consultant collects one store at a time, and the plan-library persona key:
+  - 업종 / 프랜차이즈여부: MCT_NM through app/store_classifier.py (classify_names, each distinct name once)
+  - 점포연령: months from ARE_D to --as_of (default: latest TA_YM), <=12 신규 / <=24 전환기 / else 오래된
+  - 고객연령대: largest M12_{MAL,FME}_*_RAT band (10-20s / 30-40s / 50s+) in the merchant's latest month
+  - 고객행동: largest RC_M1_SHC_{RSD,WP,FLP}_UE_CLN_RAT share (resident / worker / floating)
+Rates are cleaned the way data_transform does it (standardize_rates: sentinels -> NaN, /100) and
+taken from either the raw customer CSV (big_data_set3) or an existing ETL output
+(dataset_features_labels.parquet from early_warning_methods.py). Per merchant the last non-null
+value per column wins. persona_key is empty when 업종 is 기타 or a field cannot be derived.
+
+Usage:
+  python merchant_profiles.py --info big_data_set1.csv --cust big_data_set3.csv --out ./out/merchant_profiles.parquet
+  python merchant_profiles.py --info big_data_set1.csv --features ./out/dataset_features_labels.parquet --out ./out/merchant_profiles.csv
+  python merchant_profiles.py --info ... --cust ... --out ... --plan_library app/plan_library.zip   # library coverage
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from early_warning_methods import SPECIAL_MISSING, to_period_month
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from plan_library import PERSONA_KEYS, open_library
+from store_classifier import OTHER, classify_names
+
+
+UNKNOWN = "미상"
+
+AGE_BANDS: Dict[str, List[str]] = {
+    "20대 이하 고객 중심": ["M12_MAL_1020_RAT", "M12_FME_1020_RAT"],
+    "30~40대 고객 중심": ["M12_MAL_30_RAT", "M12_FME_30_RAT", "M12_MAL_40_RAT", "M12_FME_40_RAT"],
+    "50대 이상 고객 중심": ["M12_MAL_50_RAT", "M12_FME_50_RAT", "M12_MAL_60_RAT", "M12_FME_60_RAT"],
+}
+
+BEHAVIOR_RATES: Dict[str, str] = {
+    "거주 고객 중심": "RC_M1_SHC_RSD_UE_CLN_RAT",
+    "직장인 고객 중심": "RC_M1_SHC_WP_UE_CLN_RAT",
+    "유동인구 고객 중심": "RC_M1_SHC_FLP_UE_CLN_RAT",
+}
+
+RATE_COLS = [c for cols in AGE_BANDS.values() for c in cols] + list(BEHAVIOR_RATES.values())
+
+# same thresholds as the chat flow (streamlit_app ② 개업 시기)
+STORE_AGE_EDGES = [12, 24]
+STORE_AGE_LABELS = ["신규", "전환기", "오래된"]
+
+
+# ----------------
+# Inputs
+# ----------------
+
+def read_info(path: str, sep: str = ",") -> pd.DataFrame:
+    cols = ["ENCODED_MCT", "MCT_NM", "ARE_D", "MCT_ME_D"]
+    df = pd.read_csv(path, sep=sep, dtype=str, encoding="utf-8", usecols=lambda c: c in cols)
+    df["ARE_D"] = pd.to_datetime(df["ARE_D"], errors="coerce", format="%Y%m%d")
+    if "MCT_ME_D" in df.columns:
+        df["MCT_ME_D"] = pd.to_datetime(df["MCT_ME_D"], errors="coerce", format="%Y%m%d")
+    return df
+
+
+def read_rates(cust_path: Optional[str], features_path: Optional[str], sep: str = ",") -> pd.DataFrame:
+    """Monthly (ENCODED_MCT, TA_YM Period[M], RATE_COLS as 0-1 floats), sorted by month."""
+    if features_path:
+        # ETL output is already standardized (data_transform -> data_load)
+        df = pd.read_parquet(features_path, columns=["ENCODED_MCT", "TA_YM"] + RATE_COLS)
+        if not isinstance(df["TA_YM"].dtype, pd.PeriodDtype):
+            df["TA_YM"] = pd.to_datetime(df["TA_YM"].astype(str), errors="coerce").dt.to_period("M")
+    else:
+        # only the key and rate columns; the Arrow parser reads the rates straight to floats
+        header = pd.read_csv(cust_path, sep=sep, encoding="utf-8", nrows=0).columns
+        df = pd.read_csv(cust_path, sep=sep, encoding="utf-8", engine="pyarrow",
+                         dtype={"ENCODED_MCT": str, "TA_YM": str},
+                         usecols=[c for c in header if c in ["ENCODED_MCT", "TA_YM"] + RATE_COLS])
+        df["TA_YM"] = to_period_month(df["TA_YM"])
+        cols = [c for c in RATE_COLS if c in df.columns]
+        for c in cols:
+            if df[c].dtype == object:
+                df[c] = pd.to_numeric(df[c].str.replace(",", ""), errors="coerce")
+        # standardize_rates on one float block: sentinels -> NaN, 0-100 -> 0-1
+        block = df[cols].to_numpy(dtype=float)
+        block[np.isin(block, list(SPECIAL_MISSING))] = np.nan
+        df[cols] = block / 100.0
+    missing = [c for c in RATE_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"rate columns missing from the customer data: {missing}")
+    return df.sort_values("TA_YM", kind="stable")
+
+
+# ----------------
+# Derivations (vectorized)
+# ----------------
+
+def _argmax_label(values: np.ndarray, labels: List[str]) -> np.ndarray:
+    """Row-wise argmax over columns -> label; rows with no value at all get UNKNOWN."""
+    filled = np.where(np.isnan(values), -np.inf, values)
+    out = np.asarray(labels, dtype=object)[filled.argmax(axis=1)]
+    out[np.isneginf(filled).all(axis=1)] = UNKNOWN
+    return out
+
+
+def store_age(are_d: pd.Series, as_of: pd.Period) -> np.ndarray:
+    months = (as_of.year * 12 + as_of.month) - (are_d.dt.year * 12 + are_d.dt.month).to_numpy(dtype=float)
+    ordinal = np.digitize(months, STORE_AGE_EDGES, right=True)
+    out = np.asarray(STORE_AGE_LABELS, dtype=object)[np.minimum(ordinal, len(STORE_AGE_LABELS) - 1)]
+    out[np.isnan(months)] = UNKNOWN
+    return out
+
+
+def customer_fields(latest: pd.DataFrame) -> pd.DataFrame:
+    """latest: one row per merchant with RATE_COLS -> 고객연령대, 고객행동."""
+    bands = np.column_stack([latest[cols].sum(axis=1, min_count=1).to_numpy(dtype=float)
+                             for cols in AGE_BANDS.values()])
+    shc = latest[list(BEHAVIOR_RATES.values())].to_numpy(dtype=float)
+    return pd.DataFrame({"고객연령대": _argmax_label(bands, list(AGE_BANDS)),
+                         "고객행동": _argmax_label(shc, list(BEHAVIOR_RATES))}, index=latest.index)
+
+
+def build_profiles(info: pd.DataFrame, rates: pd.DataFrame, as_of: Optional[pd.Period] = None,
+                   include_closed: bool = False) -> pd.DataFrame:
+    if as_of is None:
+        as_of = rates["TA_YM"].max() if rates["TA_YM"].notna().any() else pd.Period(pd.Timestamp.today(), "M")
+    if not include_closed and "MCT_ME_D" in info.columns:
+        info = info[info["MCT_ME_D"].isna()]
+
+    # groupby.last skips NaN per column: the latest month that reported each rate
+    latest = rates.groupby("ENCODED_MCT", sort=False)[RATE_COLS].last()
+    cust = customer_fields(latest).reindex(info["ENCODED_MCT"].to_numpy())
+
+    out = pd.DataFrame({"ENCODED_MCT": info["ENCODED_MCT"].to_numpy(), "MCT_NM": info["MCT_NM"].to_numpy()})
+    out = pd.concat([out, classify_names(out["MCT_NM"])], axis=1)
+    out["점포연령"] = store_age(info["ARE_D"].reset_index(drop=True), as_of)
+    out["고객연령대"] = cust["고객연령대"].fillna(UNKNOWN).to_numpy()
+    out["고객행동"] = cust["고객행동"].fillna(UNKNOWN).to_numpy()
+
+    known = (out["업종"] != OTHER).to_numpy()
+    for c in PERSONA_KEYS[2:]:
+        known &= (out[c] != UNKNOWN).to_numpy()
+    key = out[PERSONA_KEYS[0]].str.cat([out[c] for c in PERSONA_KEYS[1:]], sep="|")
+    out["persona_key"] = key.where(known)
+    out["as_of"] = str(as_of)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Persona fields and plan-library keys for every merchant")
+    ap.add_argument("--info", required=True, help="dataset1 CSV path (ENCODED_MCT, MCT_NM, ARE_D, MCT_ME_D)")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--cust", help="dataset3 CSV path (customer rates)")
+    src.add_argument("--features", help="dataset_features_labels.parquet from early_warning_methods.py")
+    ap.add_argument("--out", required=True, help=".parquet or .csv")
+    ap.add_argument("--sep", default=",", help="CSV separator")
+    ap.add_argument("--as_of", default=None, help="reference month for 점포연령 (YYYY-MM, default: latest TA_YM)")
+    ap.add_argument("--include_closed", action="store_true", help="keep merchants with MCT_ME_D")
+    ap.add_argument("--plan_library", default=None, help="report how many merchants already have a plan")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    info = read_info(args.info, args.sep)
+    rates = read_rates(args.cust, args.features, args.sep)
+    print(f"[LOAD] merchants={len(info):,} rate_rows={len(rates):,} ({time.perf_counter() - t0:.1f}s)")
+
+    t1 = time.perf_counter()
+    as_of = pd.Period(args.as_of, "M") if args.as_of else None
+    prof = build_profiles(info, rates, as_of=as_of, include_closed=args.include_closed)
+    print(f"[PROFILE] merchants={len(prof):,} with_key={prof['persona_key'].notna().sum():,} "
+          f"distinct_keys={prof['persona_key'].nunique():,} as_of={prof['as_of'].iat[0] if len(prof) else '-'} "
+          f"({time.perf_counter() - t1:.1f}s)")
+    for c in PERSONA_KEYS:
+        print(f"  {c}: {prof[c].value_counts().to_dict()}")
+
+    if args.plan_library:
+        lib = open_library(args.plan_library)
+        keys = prof["persona_key"].dropna()
+        if lib is None:
+            print(f"[LIBRARY] {args.plan_library} not found")
+        else:
+            have = keys.map(lambda k: k in lib)
+            print(f"[LIBRARY] merchants with a pre-generated plan: {int(have.sum()):,} / {len(keys):,}; "
+                  f"missing keys: {keys[~have].nunique():,}")
+
+    out = Path(args.out); out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix == ".parquet":
+        prof.to_parquet(out, index=False)
+    else:
+        prof.to_csv(out, index=False, encoding="utf-8")
+    print(f"[SAVED] {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Survival-aware evaluation for the early-warning Cox / AFT tracks
+
+Metrics (all on right-censored data, vectorized with numpy):
+  - Harrell's C-index
+  - Uno's C-index (IPCW, truncated at tau)
+  - cumulative/dynamic time-dependent AUC at given horizons
+  - IPCW Brier score and integrated Brier score
+
+Pairwise comparisons are never materialized: concordance counts are answered
+with a wavelet matrix over risk ranks (O(log n) per query, built once in
+O(n log n)), so the whole evaluation is O(n log n) and runs on millions of rows.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------
+# Rank counting primitives
+# ------------------------
+
+class _WaveletMatrix:
+    """Static wavelet matrix over non-negative int values for batched `count_less` range queries."""
+
+    def __init__(self, values: np.ndarray, n_bits: int):
+        self.n_bits = n_bits
+        self.levels = []
+        cur = values.astype(np.int64, copy=True)
+        for k in reversed(range(n_bits)):
+            bit = (cur >> k) & 1
+            zeros = np.zeros(len(cur) + 1, dtype=np.int64)
+            np.cumsum(bit == 0, out=zeros[1:])
+            self.levels.append((k, zeros, zeros[-1]))
+            cur = np.concatenate([cur[bit == 0], cur[bit == 1]])
+
+    def count_less(self, lo: np.ndarray, hi: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """Number of values < x[q] among positions [lo[q], hi[q]) for every query q."""
+        lo = lo.astype(np.int64, copy=True)
+        hi = hi.astype(np.int64, copy=True)
+        x = x.astype(np.int64, copy=False)
+        res = np.zeros(len(x), dtype=np.int64)
+        for k, zeros, n_zeros in self.levels:
+            one = ((x >> k) & 1).astype(bool)
+            zl, zr = zeros[lo], zeros[hi]
+            res += np.where(one, zr - zl, 0)
+            lo = np.where(one, n_zeros + lo - zl, zl)
+            hi = np.where(one, n_zeros + hi - zr, zr)
+        return res
+
+
+def _check_inputs(time, event, risk=None) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    time = np.asarray(time, dtype=float)
+    event = np.asarray(event).astype(bool)
+    if time.shape != event.shape:
+        raise ValueError("time and event must have the same shape.")
+    if risk is not None:
+        risk = np.asarray(risk, dtype=float)
+        if risk.shape != time.shape:
+            raise ValueError("risk must have the same shape as time.")
+        if np.isnan(risk).any():
+            raise ValueError("risk contains NaN.")
+    return time, event, risk
+
+
+def _later_risk_counts(time: np.ndarray, risk: np.ndarray, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """For each query row i: (#j with T_j > T_i, #those with risk_j < risk_i, #those with risk_j == risk_i)."""
+    order = np.argsort(time, kind="stable")
+    t_sorted = time[order]
+    _, ranks = np.unique(risk, return_inverse=True)
+    ranks = ranks.astype(np.int64)
+    n = len(time)
+    n_bits = max(1, int(ranks.max() + 1).bit_length()) if n else 1
+
+    wm = _WaveletMatrix(ranks[order], n_bits)
+    lo = np.searchsorted(t_sorted, time[query], side="right")
+    hi = np.full(len(lo), n, dtype=np.int64)
+    r = ranks[query]
+    lt = wm.count_less(lo, hi, r)
+    le = wm.count_less(lo, hi, r + 1)
+    return n - lo, lt, le - lt
+
+
+# ------------------------
+# Censoring distribution
+# ------------------------
+
+def censoring_survival(time, event) -> Tuple[np.ndarray, np.ndarray]:
+    """Kaplan-Meier estimate G(t) of the censoring survival function: (unique times, G at those times)."""
+    time, event, _ = _check_inputs(time, event)
+    uniq, inv = np.unique(time, return_inverse=True)
+    n_cens = np.bincount(inv, weights=(~event).astype(float), minlength=len(uniq))
+    n_total = np.bincount(inv, minlength=len(uniq)).astype(float)
+    at_risk = n_total[::-1].cumsum()[::-1]
+    G = np.cumprod(1.0 - n_cens / at_risk)
+    return uniq, G
+
+
+def _eval_step(grid: np.ndarray, values: np.ndarray, t: np.ndarray, left: bool = False) -> np.ndarray:
+    """Evaluate a right-continuous step function (1 before the first knot) at t, or its left limit."""
+    idx = np.searchsorted(grid, t, side="left" if left else "right") - 1
+    out = np.ones(len(np.atleast_1d(t)), dtype=float)
+    mask = idx >= 0
+    out[mask] = values[idx[mask]]
+    return out
+
+
+def _ipcw_at(time, event, t, train_time=None, train_event=None, left: bool = False) -> np.ndarray:
+    if train_time is None:
+        grid, G = censoring_survival(time, event)
+    else:
+        grid, G = censoring_survival(train_time, train_event)
+    g = _eval_step(grid, G, np.atleast_1d(np.asarray(t, dtype=float)), left=left)
+    return np.clip(g, 1e-12, None)
+
+
+# ------------------------
+# Concordance
+# ------------------------
+
+def harrell_c_index(time, event, risk) -> float:
+    """Harrell's C: P(risk_i > risk_j | T_i < T_j, i had the event). Ties in risk count 1/2."""
+    time, event, risk = _check_inputs(time, event, risk)
+    query = np.flatnonzero(event)
+    if len(query) == 0:
+        return float("nan")
+    comparable, lt, eq = _later_risk_counts(time, risk, query)
+    denom = comparable.sum()
+    if denom == 0:
+        return float("nan")
+    return float((lt.sum() + 0.5 * eq.sum()) / denom)
+
+
+def uno_c_index(time, event, risk,
+                tau: Optional[float] = None,
+                train_time=None, train_event=None) -> float:
+    """Uno's C: Harrell's C with 1/G(T_i-)^2 weights over events with T_i < tau (default: no truncation).
+
+    G is the Kaplan-Meier censoring survival, fitted on (train_time, train_event) when given.
+    """
+    time, event, risk = _check_inputs(time, event, risk)
+    if tau is None:
+        tau = np.inf
+    query = np.flatnonzero(event & (time < tau))
+    if len(query) == 0:
+        return float("nan")
+    comparable, lt, eq = _later_risk_counts(time, risk, query)
+    w = 1.0 / _ipcw_at(time, event, time[query], train_time, train_event, left=True) ** 2
+    denom = (w * comparable).sum()
+    if denom == 0:
+        return float("nan")
+    return float((w * (lt + 0.5 * eq)).sum() / denom)
+
+
+def cumulative_dynamic_auc(time, event, risk, times: Sequence[float],
+                           train_time=None, train_event=None) -> np.ndarray:
+    """Time-dependent AUC(t): cases T_i <= t with the event (IPCW-weighted) vs controls T_j > t.
+
+    Returns NaN for horizons without any case or control.
+    """
+    time, event, risk = _check_inputs(time, event, risk)
+    out = np.full(len(times), np.nan)
+    for k, t in enumerate(times):
+        cases = event & (time <= t)
+        controls = time > t
+        if not cases.any() or not controls.any():
+            continue
+        ctrl_sorted = np.sort(risk[controls])
+        case_risk = risk[cases]
+        lt = np.searchsorted(ctrl_sorted, case_risk, side="left")
+        eq = np.searchsorted(ctrl_sorted, case_risk, side="right") - lt
+        w = 1.0 / _ipcw_at(time, event, time[cases], train_time, train_event, left=True)
+        out[k] = (w * (lt + 0.5 * eq)).sum() / (w.sum() * len(ctrl_sorted))
+    return out
+
+
+# ------------------------
+# Brier score
+# ------------------------
+
+def brier_scores(time, event, surv_prob: np.ndarray, times: Sequence[float],
+                 train_time=None, train_event=None) -> np.ndarray:
+    """IPCW Brier score at each t in `times`; surv_prob[i, k] is the predicted S(times[k] | x_i)."""
+    time, event, _ = _check_inputs(time, event)
+    surv_prob = np.asarray(surv_prob, dtype=float).reshape(len(time), len(times))
+    times = np.asarray(times, dtype=float)
+
+    g_own = _ipcw_at(time, event, time, train_time, train_event, left=True)
+    g_t = _ipcw_at(time, event, times, train_time, train_event)
+
+    died = (event[:, None]) & (time[:, None] <= times[None, :])
+    alive = time[:, None] > times[None, :]
+    loss = np.where(died, surv_prob ** 2 / g_own[:, None], 0.0) + \
+           np.where(alive, (1.0 - surv_prob) ** 2 / g_t[None, :], 0.0)
+    return loss.mean(axis=0)
+
+
+def integrated_brier_score(time, event, surv_prob: np.ndarray, times: Sequence[float],
+                           train_time=None, train_event=None) -> float:
+    """Trapezoidal integral of the Brier score over `times`, normalized by the time span."""
+    times = np.asarray(times, dtype=float)
+    bs = brier_scores(time, event, surv_prob, times, train_time, train_event)
+    if len(times) < 2:
+        return float(bs[0])
+    area = (0.5 * (bs[1:] + bs[:-1]) * np.diff(times)).sum()
+    return float(area / (times[-1] - times[0]))
+
+
+# ------------------------
+# Counting-process helpers
+# ------------------------
+
+def landmark_subjects(tv_df: pd.DataFrame,
+                      id_col: str = "ENCODED_MCT",
+                      time_cols: Tuple[str, str] = ("start", "stop"),
+                      event_col: str = "event") -> pd.DataFrame:
+    """Collapse (start, stop, event) intervals to one row per subject, measured from its first interval.
+
+    Columns: `row` (positional index of the landmark interval in tv_df), `t0`, `duration`, `event`.
+    Predictions are taken at the landmark row, i.e. with the covariates known when the window opens.
+    """
+    start, stop = time_cols
+    frame = pd.DataFrame({
+        "id": tv_df[id_col].to_numpy(),
+        "start": tv_df[start].to_numpy(dtype=float),
+        "stop": tv_df[stop].to_numpy(dtype=float),
+        "event": tv_df[event_col].to_numpy(dtype=int),
+        "row": np.arange(len(tv_df)),
+    })
+    frame = frame.sort_values(["id", "start"], kind="stable")
+    frame["event_stop"] = frame["stop"].where(frame["event"] == 1)
+    g = frame.groupby("id", sort=False)
+    subj = pd.DataFrame({
+        "row": g["row"].first(),
+        "t0": g["start"].first(),
+        "stop": g["stop"].max(),
+        "event_stop": g["event_stop"].min(),
+    })
+    subj["event"] = subj["event_stop"].notna().astype(int)
+    # follow-up ends at the first event; rows after it are ignored
+    subj["duration"] = subj["event_stop"].fillna(subj["stop"]) - subj["t0"]
+    return subj[["row", "t0", "duration", "event"]].reset_index(drop=True)
+
+
+def evaluate_survival(time, event, risk,
+                      surv_fn=None,
+                      horizons: Sequence[float] = (1, 3, 6),
+                      train_time=None, train_event=None) -> Dict[str, float]:
+    """One metrics dict for a survival model.
+
+    risk:    higher = earlier event
+    surv_fn: optional callable(times) -> (n, len(times)) survival probabilities; enables the
+             integrated Brier score over whole months 1..max(horizons)
+
+    Horizons at or past the longest follow-up have no controls; their AUC is None and they are
+    listed under `horizons_past_follow_up`.
+    """
+    time, event, risk = _check_inputs(time, event, risk)
+    metrics = {
+        "n_subjects": int(len(time)),
+        "n_events": int(event.sum()),
+        "harrell_c": harrell_c_index(time, event, risk),
+        "uno_c": uno_c_index(time, event, risk, train_time=train_time, train_event=train_event),
+    }
+    follow_up = float(time.max()) if len(time) else 0.0
+    aucs = cumulative_dynamic_auc(time, event, risk, horizons, train_time, train_event)
+    for h, auc in zip(horizons, aucs):
+        metrics[f"auc_{h:g}m"] = float(auc) if h < follow_up else None
+    metrics["horizons_past_follow_up"] = [h for h in horizons if h >= follow_up]
+
+    if surv_fn is not None:
+        # integrate over whole months up to the last horizon (bounded by follow-up)
+        t_max = min(float(time.max()) if len(time) else 0.0, float(max(horizons)))
+        grid = np.arange(1, np.floor(t_max) + 1, dtype=float)
+        if len(grid):
+            metrics["integrated_brier"] = integrated_brier_score(time, event, surv_fn(grid), grid,
+                                                                 train_time, train_event)
+        else:
+            metrics["integrated_brier"] = float("nan")
+    return metrics
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic merchant panel for early_warning_methods.py
+
+Emits the three input CSVs with the real column names and value formats:
+  big_data_set1.csv  merchant info   (ENCODED_MCT, MCT_NM, MCT_SIGUNGU_NM, HPSN_MCT_BZN_CD_NM, ARE_D, MCT_ME_D, ...)
+  big_data_set2.csv  monthly KPI     (ENCODED_MCT, TA_YM, BUCKET_COLS as "1_10%이하" ... labels, KPI rate columns)
+  big_data_set3.csv  monthly customer (ENCODED_MCT, TA_YM, age/gender and revisit/new/resident/worker/floating rates)
+
+Each merchant has a latent health that drifts over time; closing merchants decline for a few
+months before MCT_ME_D and have no rows after it, so every label and survival track has signal.
+Rates carry the -999999.9 sentinel at a small rate. Rows are generated in merchant chunks so
+1M merchants fit in bounded memory.
+
+Usage:
+  python synthetic_data.py --merchants 10000 --months 24 --outdir ./data/synth_10k
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from early_warning_methods import BUCKET_COLS, RATE_COLS_0_100
+
+
+BUCKET_LABELS = [
+    "1_10%이하",
+    "2_10-25%",
+    "3_25-50%",
+    "4_50-75%",
+    "5_75-90%",
+    "6_90%초과(하위 10% 이하)",
+]
+
+KPI_RATE_COLS = RATE_COLS_0_100[:7]
+CUST_RATE_COLS = RATE_COLS_0_100[7:]
+
+SIGUNGU = ["서울 성동구", "서울 중구", "서울 종로구", "서울 마포구"]
+BZN = ["성수", "왕십리", "행당", "뚝섬", "종로", "을지로", "홍대", "합정"]
+ZCD = ["카페", "한식-백반/한정식", "한식-국밥/설렁탕", "일식-초밥/롤", "중식-중식당", "양식", "치킨", "호프/맥주", "분식"]
+NAME_STEMS = ["카페", "국밥", "초밥", "짬뽕", "피자", "치킨", "호프", "분식", "파리", "메가", "교촌", "왕십리돼지"]
+SENTINEL = -999999.9
+
+
+def _merchant_ids(start: int, n: int) -> np.ndarray:
+    return np.char.add("MCT", np.char.zfill(np.arange(start, start + n).astype(str), 8))
+
+
+def generate_chunk(first_id: int,
+                   n_merchants: int,
+                   months: pd.PeriodIndex,
+                   close_rate: float = 0.15,
+                   sentinel_rate: float = 0.01,
+                   seed: int = 0) -> Dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    n_months = len(months)
+    ids = _merchant_ids(first_id, n_merchants)
+
+    # --- info
+    open_offset = rng.integers(-120, n_months - 3, n_merchants)
+    first_obs = np.clip(open_offset, 0, None)
+    closes = rng.random(n_merchants) < close_rate
+    close_idx = np.where(closes, rng.integers(first_obs + 2, n_months), n_months + 10)
+
+    def ymd(offsets: np.ndarray) -> np.ndarray:
+        ym = pd.PeriodIndex.from_ordinals(months[0].ordinal + offsets, freq="M").strftime("%Y%m")
+        day = np.char.zfill(rng.integers(1, 29, len(offsets)).astype(str), 2)
+        return np.char.add(np.asarray(ym, dtype=str), day)
+
+    are_d = ymd(open_offset)
+    me_d = np.where(closes, ymd(np.minimum(close_idx, n_months - 1)), "")
+    info = pd.DataFrame({
+        "ENCODED_MCT": ids,
+        "MCT_BSE_AR": rng.choice(SIGUNGU, n_merchants),
+        "MCT_NM": np.char.add(rng.choice(NAME_STEMS, n_merchants), rng.integers(1, 999, n_merchants).astype(str)),
+        "MCT_BRD_NUM": np.where(rng.random(n_merchants) < 0.3, rng.integers(1, 500, n_merchants).astype(str), ""),
+        "MCT_SIGUNGU_NM": rng.choice(SIGUNGU, n_merchants),
+        "HPSN_MCT_ZCD_NM": rng.choice(ZCD, n_merchants),
+        "HPSN_MCT_BZN_CD_NM": rng.choice(BZN, n_merchants),
+        "ARE_D": are_d,
+        "MCT_ME_D": me_d,
+    })
+
+    # --- monthly rows: from first observed month until (and including) the close month
+    last_obs = np.minimum(close_idx, n_months - 1)
+    n_rows = (last_obs - first_obs + 1).clip(0, None)
+    row_mct = np.repeat(np.arange(n_merchants), n_rows)
+    row_start = np.repeat(np.cumsum(n_rows) - n_rows, n_rows)
+    row_t = np.arange(len(row_mct)) - row_start + first_obs[row_mct]
+    n = len(row_mct)
+
+    # latent health: merchant level + random walk, declining in the 4 months before closing
+    base = rng.normal(0, 1, n_merchants)[row_mct]
+    walk = rng.normal(0, 0.25, n)
+    walk = pd.Series(walk).groupby(row_mct).cumsum().to_numpy()
+    to_close = (close_idx[row_mct] - row_t).astype(float)
+    decline = np.where(closes[row_mct] & (to_close <= 4), (4 - to_close) * 0.6, 0.0)
+    health = base + walk - decline
+
+    def bucket(noise: float) -> np.ndarray:
+        score = health + rng.normal(0, noise, n)
+        # high health -> low ordinal ("1_" = top 10% of sales)
+        ordinal = np.digitize(-score, [-1.3, -0.7, 0.0, 0.7, 1.3])
+        return np.asarray(BUCKET_LABELS, dtype=object)[ordinal]
+
+    def rate(center: float, spread: float) -> np.ndarray:
+        v = np.clip(center + spread * rng.normal(0, 1, n) + 5 * health, 0, 100).round(1)
+        v[rng.random(n) < sentinel_rate] = SENTINEL
+        return v
+
+    ta_ym = np.asarray(months.strftime("%Y%m"))[row_t]
+    kpi = pd.DataFrame({"ENCODED_MCT": ids[row_mct], "TA_YM": ta_ym})
+    for i, c in enumerate(BUCKET_COLS):
+        kpi[c] = bucket(noise=0.3 + 0.1 * i)
+    for c in KPI_RATE_COLS:
+        kpi[c] = rate(50.0, 20.0)
+
+    cust = pd.DataFrame({"ENCODED_MCT": ids[row_mct], "TA_YM": ta_ym})
+    for c in CUST_RATE_COLS:
+        cust[c] = rate(15.0 if ("MAL" in c or "FME" in c) else 35.0, 10.0)
+
+    return {"info": info, "kpi": kpi, "cust": cust}
+
+
+def write_panel(outdir: str,
+                n_merchants: int,
+                n_months: int = 24,
+                start: str = "2023-01",
+                chunk_size: int = 50_000,
+                close_rate: float = 0.15,
+                seed: int = 42) -> Dict[str, str]:
+    out = Path(outdir); out.mkdir(parents=True, exist_ok=True)
+    paths = {"info": out / "big_data_set1.csv", "kpi": out / "big_data_set2.csv", "cust": out / "big_data_set3.csv"}
+    months = pd.period_range(start, periods=n_months, freq="M")
+
+    for k, first in enumerate(range(0, n_merchants, chunk_size)):
+        chunk = generate_chunk(first, min(chunk_size, n_merchants - first), months,
+                               close_rate=close_rate, seed=seed + k)
+        for name, df in chunk.items():
+            df.to_csv(paths[name], mode="w" if k == 0 else "a", header=(k == 0), index=False, encoding="utf-8")
+    return {k: str(v) for k, v in paths.items()}
+
+
+def main(argv: Optional[list] = None):
+    ap = argparse.ArgumentParser(description="Synthetic merchant panel for the early-warning ETL")
+    ap.add_argument("--merchants", type=int, default=10_000)
+    ap.add_argument("--months", type=int, default=24)
+    ap.add_argument("--start", default="2023-01", help="first TA_YM (YYYY-MM)")
+    ap.add_argument("--close_rate", type=float, default=0.15)
+    ap.add_argument("--chunk_size", type=int, default=50_000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--outdir", required=True)
+    args = ap.parse_args(argv)
+
+    paths = write_panel(args.outdir, args.merchants, n_months=args.months, start=args.start,
+                        chunk_size=args.chunk_size, close_rate=args.close_rate, seed=args.seed)
+    print("[SAVED]", paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Shared pytest setup for bigcontest: the `large` marker (100k/1M-merchant benchmarks) only runs when selected with -m large."""
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "large: 100k+ merchant benchmark, minutes and GBs of RAM; run with -m large")
+
+
+def pytest_collection_modifyitems(config, items):
+    if "large" in (config.getoption("-m") or ""):
+        return
+    skip = pytest.mark.skip(reason="large benchmark; run with -m large")
+    for item in items:
+        if "large" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,144 @@
+"""Scaling benchmark for early_warning_methods.py on synthetic panels (pytest-benchmark).
+
+Each ETL stage and model track is timed once per merchant count on a panel from synthetic_data.py;
+the process peak RSS after the stage goes to extra_info. 100k and 1M merchants are marked `large`.
+
+  pytest tests/test_benchmark_early_warning.py                        # 10k merchants
+  pytest tests/test_benchmark_early_warning.py -m large               # 100k and 1M
+  pytest tests/test_benchmark_early_warning.py --benchmark-json bench.json
+  pytest tests --benchmark-skip                                       # everything but the benchmarks
+"""
+
+import resource
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+ew = pytest.importorskip("early_warning_methods")
+synthetic_data = pytest.importorskip("synthetic_data")
+
+MONTHS = 24
+TEST_MONTHS = 7  # > max horizon (6), so auc_6m is defined
+SIZES = [
+    10_000,
+    pytest.param(100_000, marks=pytest.mark.large),
+    pytest.param(1_000_000, marks=pytest.mark.large),
+]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Panel:
+    """One synthetic panel and the stage outputs built from it so far (each built once, on demand)."""
+
+    def __init__(self, n_merchants: int, workdir: Path):
+        self.n_merchants = n_merchants
+        self.paths = synthetic_data.write_panel(str(workdir / "data"), n_merchants, n_months=MONTHS)
+        self.out = workdir / "out"
+        self.out.mkdir(exist_ok=True)
+        self._cache = {}
+
+    def get(self, key: str):
+        if key not in self._cache:
+            self._cache[key] = getattr(self, f"_build_{key}")()
+        return self._cache[key]
+
+    def put(self, key: str, value) -> None:
+        self._cache[key] = value
+
+    def drop(self, key: str) -> None:
+        self._cache.pop(key, None)
+
+    def _build_raw(self):
+        return ew.data_extract(self.paths["info"], self.paths["kpi"], self.paths["cust"])
+
+    def _build_merged(self):
+        merged = ew.data_transform(self.get("raw"))
+        self.drop("raw")
+        return merged
+
+    def _build_survival(self):
+        merged = self.get("merged")
+        tv = ew.build_survival_frame_timevarying(merged, id_col="ENCODED_MCT", time_col="TA_YM")
+        cutoff = np.sort(merged["TA_YM"].dropna().unique())[-TEST_MONTHS]
+        return tv[tv["TA_YM"] < cutoff], tv[tv["TA_YM"] >= cutoff]
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n}_merchants")
+def panel(request, tmp_path_factory):
+    return Panel(request.param, tmp_path_factory.mktemp(f"panel_{request.param}"))
+
+
+def _run(benchmark, panel: Panel, fn, *args, **kwargs):
+    benchmark.group = f"{panel.n_merchants:,} merchants"
+    result = benchmark.pedantic(fn, args=args, kwargs=kwargs, rounds=1, iterations=1, warmup_rounds=0)
+    benchmark.extra_info.update(merchants=panel.n_merchants, months=MONTHS, peak_rss_mb=round(_peak_rss_mb(), 1))
+    return result
+
+
+# ------------------------
+# ETL stages
+# ------------------------
+
+def test_extract(benchmark, panel):
+    raw = _run(benchmark, panel, ew.data_extract, panel.paths["info"], panel.paths["kpi"], panel.paths["cust"])
+    assert set(raw) == {"info", "kpi", "cust"}
+    panel.put("raw", raw)
+
+
+def test_transform(benchmark, panel):
+    merged = _run(benchmark, panel, ew.data_transform, panel.get("raw"))
+    assert merged["ENCODED_MCT"].nunique() == panel.n_merchants
+    panel.put("merged", merged)
+    panel.drop("raw")  # only the merged frame is needed from here on
+
+
+def test_load(benchmark, panel):
+    paths = _run(benchmark, panel, ew.data_load, panel.get("merged"), str(panel.out))
+    assert all(Path(p).exists() for p in paths.values())
+
+
+# ------------------------
+# Model tracks
+# ------------------------
+
+def test_lgbm(benchmark, panel):
+    _run(benchmark, panel, ew.run_lgbm, panel.get("merged"), panel.out, test_months=TEST_MONTHS)
+
+
+def test_lgbm_multi(benchmark, panel):
+    _run(benchmark, panel, ew.run_lgbm_multi, panel.get("merged"), panel.out, test_months=TEST_MONTHS)
+    assert (panel.out / "lgbm_multi_metrics.csv").exists()
+
+
+def test_cox(benchmark, panel):
+    tv_train, tv_test = panel.get("survival")
+
+    def cox():
+        ctv, covs = ew.train_cox_timevarying(tv_train, id_col="ENCODED_MCT")
+        return ew.test_cox_timevarying(ctv, tv_test, id_col="ENCODED_MCT", covariates=covs)
+
+    metrics = _run(benchmark, panel, cox)
+    assert metrics["horizons_past_follow_up"] == []
+
+
+def test_aft(benchmark, panel):
+    tv_train, tv_test = panel.get("survival")
+
+    def aft():
+        dtrain, _ = ew.build_aft_dmatrix(tv_train, id_col="ENCODED_MCT")
+        dtest, _ = ew.build_aft_dmatrix(tv_test, id_col="ENCODED_MCT")
+        model = ew.train_aft(dtrain, dvalid=dtest)
+        return ew.test_aft(model, dtest, tv_test)
+
+    metrics = _run(benchmark, panel, aft)
+    assert metrics["horizons_past_follow_up"] == []
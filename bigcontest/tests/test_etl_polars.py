@@ -0,0 +1,27 @@
+"""Parity test: the Polars ETL backend must reproduce early_warning_methods.data_transform on a small synthetic panel."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("polars")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+ew = pytest.importorskip("early_warning_methods")
+synthetic_data = pytest.importorskip("synthetic_data")
+
+import etl_polars  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def panel(tmp_path_factory):
+    return synthetic_data.write_panel(str(tmp_path_factory.mktemp("panel")), n_merchants=120, n_months=15, seed=7)
+
+
+def test_polars_etl_matches_pandas(panel):
+    expected = ew.data_transform(ew.data_extract(panel["info"], panel["kpi"], panel["cust"]))
+    actual = etl_polars.run_polars_etl(panel["info"], panel["kpi"], panel["cust"])
+
+    assert list(actual.columns) == list(expected.columns)
+    assert etl_polars.compare_frames(expected, actual) == []
@@ -0,0 +1,80 @@
+"""PersonaIndex: exact lookup over personas.json, the fallback ladder, behavior aliases and merged behaviors."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+APP = Path(__file__).resolve().parents[1] / "app"
+sys.path.insert(0, str(APP))
+
+from persona_index import PERSONA_FIELDS, PersonaIndex  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def personas():
+    return json.loads((APP / "personas.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="module")
+def index(personas):
+    return PersonaIndex(personas)
+
+
+def _persona(*values):
+    return dict(zip(PERSONA_FIELDS, values))
+
+
+def test_exact_lookup_covers_every_combination(personas, index):
+    assert len(personas) == 540
+    assert len({tuple(p[f] for f in PERSONA_FIELDS) for p in personas}) == 540
+    for p in personas:
+        assert index.find(*(p[f] for f in PERSONA_FIELDS)) is p
+
+
+def test_unknown_fields_are_wildcards(personas, index):
+    p = personas[0]
+    assert index.find(p["업종"], p["프랜차이즈여부"])["업종"] == p["업종"]
+    got = index.find(p["업종"], p["프랜차이즈여부"], 고객행동="일반 고객")
+    assert (got["업종"], got["프랜차이즈여부"]) == (p["업종"], p["프랜차이즈여부"])
+    assert index.find("기타", p["프랜차이즈여부"]) is None
+
+
+def test_fallback_ladder_drops_behavior_then_age_then_store_age_then_franchise():
+    p1 = _persona("한식", "개인점포", "신규", "20대 이하 고객 중심", "재방문 고객 중심")
+    p2 = _persona("한식", "개인점포", "오래된", "40대 고객 중심", "거주 고객 중심")
+    p3 = _persona("한식", "프랜차이즈", "신규", "20대 이하 고객 중심", "직장인 고객 중심")
+    p4 = _persona("양식", "배달전문", "신규", "20대 이하 고객 중심", "재방문 고객 중심")
+    index = PersonaIndex([p1, p2, p3, p4])
+
+    # 고객행동, 고객연령대를 버린 (한식, 개인점포, 신규) 가 연령대·행동이 맞는 p2 보다 먼저
+    assert index.find("한식", "개인점포", "신규", "40대 고객 중심", "거주 고객 중심") is p1
+    # 점포연령까지 버림
+    assert index.find("한식", "프랜차이즈", "오래된", "40대 고객 중심", "거주 고객 중심") is p3
+    # 프랜차이즈여부까지 버리면 업종만 남고, personas 순서상 첫 번째
+    assert index.find("한식", "배달전문", "신규", "20대 이하 고객 중심", "재방문 고객 중심") is p1
+    # 업종은 버리지 않는다
+    assert index.find("중식", "개인점포", "신규", "20대 이하 고객 중심", "재방문 고객 중심") is None
+
+
+def test_consultation_behavior_maps_to_persona_value(personas, index):
+    p = personas[0]
+    got = index.find(p["업종"], p["프랜차이즈여부"], p["점포연령"], p["고객연령대"], "유동 고객")
+    assert got["고객행동"] == "유동인구 고객 중심"
+    assert all(got[f] == p[f] for f in PERSONA_FIELDS[:4])
+
+
+def test_multiple_behaviors_are_merged(personas, index):
+    p = personas[0]
+    merged = index.find(p["업종"], p["프랜차이즈여부"], p["점포연령"], p["고객연령대"], "재방문 고객 + 직장인 고객")
+    assert merged["고객행동"] == "재방문 고객 중심 + 직장인 고객 중심"
+    assert [m["고객행동"] for m in merged["merged_from"]] == ["재방문 고객 중심", "직장인 고객 중심"]
+    assert all(merged[f] == p[f] for f in PERSONA_FIELDS[:4])
+    assert "재방문 고객 중심 + 직장인 고객 중심" in merged["prompt"]
+
+
+def test_repeated_behavior_is_not_merged(personas, index):
+    p = personas[0]
+    got = index.find(p["업종"], p["프랜차이즈여부"], p["점포연령"], p["고객연령대"], "재방문 고객 + 재방문 고객 중심")
+    assert got["고객행동"] == "재방문 고객 중심" and "merged_from" not in got